@@ -3,17 +3,29 @@ PrediGas - Dashboard Empresarial
 Proyecciones de Demanda de Gas Natural y Precios Internacionales
 """
 
+import os
+import time
+
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-import plotly.express as px
-from datetime import datetime, timedelta
-import numpy as np
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from motor import artefactos, graficos, memoria_compartida, telemetria
+from motor.datos import agregado_mensual, filtrar_ventana, rango_fechas
+from motor.resumen import marco_ventana, tabla_resumen, top_sectores
+from motor.derivadas import sobre_agregados, nombre_participacion
+from motor.comparacion import COBERTURA_MINIMA, cobertura, comparar, indicadores, mismo_periodo
+from motor.alertas import (
+    UMBRAL_SPREAD, UMBRAL_SPREAD_NORMAL, UMBRAL_VOLATILIDAD, VENTANAS, estado_en
+)
 
 # ===========================================================================
 # CONFIGURACIÓN
 # ===========================================================================
 
+inicio_rerun = time.perf_counter()
+
 st.set_page_config(
     page_title="PrediGAS | Dashboard Ejecutivo",
     page_icon="⛽",
@@ -21,23 +33,112 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Endpoint de métricas para Prometheus (opcional, ver motor/telemetria.py)
+@st.cache_resource
+def servidor_telemetria(puerto):
+    return telemetria.iniciar_servidor(puerto)
+
+if telemetria.PUERTO:
+    try:
+        servidor_telemetria(telemetria.PUERTO)
+    except OSError as e:
+        st.sidebar.warning(f"Telemetría desactivada: {e}")
+
+# Fechas y valores de los gráficos en binario compacto (ver motor/graficos.py)
+def graficar(fig, **kwargs):
+    st.plotly_chart(graficos.compactar_figura(fig) if graficos.BINARIOS else fig, **kwargs)
+
 # ===========================================================================
 # CARGAR DATOS
 # ===========================================================================
+# Los artefactos derivados de los CSV se guardan también en disco (ver
+# motor/artefactos.py), así un servidor reiniciado no los recalcula.
+
+@telemetria.medir_cache('preparar_datos', st.cache_data)
+def preparar_datos():
+    # El modelo 2 viene en formato largo; los tabs lo usan con una columna por variable.
+    # Ambas tablas incluyen las series derivadas de motor/derivadas.py.
+    # Solo con CSV nuevos se leen de verdad; los grandes van por trozos y muestran su avance.
+    barra = st.empty()
+    avance = lambda leidos, total: barra.progress(
+        min(leidos / total, 1.0), text=f"Leyendo predicciones... {leidos / 1024 ** 2:,.0f} de {total / 1024 ** 2:,.0f} MB"
+    )
+    try:
+        tablas = artefactos.cargar('modelo1', progreso=avance), artefactos.cargar('desagregado_ancho', progreso=avance)
+    except FileNotFoundError as e:
+        st.error(f"❌ Error: {e}\n\nAsegúrate de tener los archivos en data/")
+        st.stop()
+    barra.empty()
+    return tablas
+
+@telemetria.medir_cache('preparar_alertas', st.cache_data(max_entries=1))
+def preparar_alertas(generacion):
+    # Reglas de alerta evaluadas en todas las ventanas móviles del histórico;
+    # con la base de datos se leen de ella solo las columnas de las reglas
+    if RUTA_BD:
+        from motor.alertas import COLUMNAS, linea_tiempo_alertas
+        from motor.compactacion import expandir_fechas
+        
+        return linea_tiempo_alertas(expandir_fechas(pred_modelo1.ventana(*pred_modelo1.rango(), COLUMNAS)))
+    return artefactos.cargar('alertas')
 
-@st.cache_data
-def cargar_datos():
+@telemetria.medir_cache('preparar_estacionalidad', st.cache_data(max_entries=1))
+def preparar_estacionalidad(generacion):
+    # Tendencia + estacionalidad (Fourier) de todas las variables, una vez por versión de datos;
+    # con la base de datos se ajusta columna por columna leyendo de ella
+    if RUTA_BD:
+        from motor.estacionalidad import descomponer_bd
+        
+        return descomponer_bd(pred_modelo1, pred_modelo2_ancho)
+    return artefactos.cargar('estacionalidad')
+
+@telemetria.medir_cache('cargar_metricas', st.cache_data(max_entries=1))
+def cargar_metricas(generacion):
+    # Solo las dos tablas de métricas; las predicciones crudas no pasan por aquí
     try:
-        metricas_agregado = pd.read_csv('data/xgboost_metricas.csv')
-        metricas_desagregado = pd.read_csv('data/xgboost_metricas_desagregadas.csv')
-        pred_modelo1 = pd.read_csv('data/predicciones_modelo1_xgboost.csv', parse_dates=['Fecha'])
-        pred_modelo2 = pd.read_csv('data/predicciones_modelo2_desagregado.csv', parse_dates=['Fecha'])
-        return metricas_agregado, metricas_desagregado, pred_modelo1, pred_modelo2
+        return artefactos.cargar('metricas')
     except FileNotFoundError as e:
         st.error(f"❌ Error: {e}\n\nAsegúrate de tener los archivos en data/")
         st.stop()
 
-metricas_agregado, metricas_desagregado, pred_modelo1, pred_modelo2 = cargar_datos()
+# Modo multi-worker: las predicciones las publica un proceso cargador
+# (python -m motor.memoria_compartida) y aquí solo se adjuntan, sin copia.
+RUTA_COMPARTIDA = os.environ.get('PROYECTAGAS_MEMORIA_COMPARTIDA')
+
+@telemetria.medir_cache('adjuntar_compartidos', st.cache_resource(max_entries=1))
+def adjuntar_compartidos(generacion):
+    return memoria_compartida.adjuntar(RUTA_COMPARTIDA, generacion)
+
+# Las cachés que leen las tablas reciben `generacion` para no servir datos de una publicación anterior
+generacion = memoria_compartida.generacion_actual(RUTA_COMPARTIDA) if RUTA_COMPARTIDA else 0
+
+# Modo base de datos: las predicciones viven en SQLite (python -m motor.consultas);
+# las ventanas y agregados se consultan allí y a Python solo llega el resultado.
+RUTA_BD = os.environ.get('PROYECTAGAS_BD')
+
+@telemetria.medir_cache('abrir_bd', st.cache_resource)
+def abrir_bd(ruta):
+    from motor.consultas import TablaBD
+    try:
+        return TablaBD(ruta, 'modelo1'), TablaBD(ruta, 'desagregado')
+    except FileNotFoundError as e:
+        st.error(f"❌ Error: {e}")
+        st.stop()
+
+if RUTA_BD:
+    pred_modelo1, pred_modelo2_ancho = abrir_bd(RUTA_BD)
+    metricas_agregado, metricas_desagregado = cargar_metricas(generacion)
+elif generacion:
+    compartidas = adjuntar_compartidos(generacion)
+    pred_modelo1 = compartidas['pred_modelo1']
+    pred_modelo2_ancho = compartidas['desagregado_ancho']
+    metricas_agregado, metricas_desagregado = cargar_metricas(generacion)
+else:
+    metricas_agregado, metricas_desagregado = cargar_metricas(generacion)
+    pred_modelo1, pred_modelo2_ancho = preparar_datos()
+
+linea_alertas = preparar_alertas(generacion)
+estacionalidad = preparar_estacionalidad(generacion)
 
 # Limpiar nombres de variables
 metricas_agregado['Variable'] = metricas_agregado['Variable'].str.strip()
@@ -53,8 +154,7 @@ st.sidebar.markdown("---")
 
 # Selector de período
 st.sidebar.markdown("**📅 Período de Análisis**")
-fecha_min = pred_modelo1['Fecha'].min()
-fecha_max = pred_modelo1['Fecha'].max()
+fecha_min, fecha_max = rango_fechas(pred_modelo1)
 
 fecha_inicio = st.sidebar.date_input(
     "Desde:",
@@ -70,30 +170,170 @@ fecha_fin = st.sidebar.date_input(
     max_value=fecha_max
 )
 
+# Segunda ventana opcional para comparar todos los KPIs
+modo_comparacion = st.sidebar.selectbox(
+    "🔁 Comparar con:",
+    ["Sin comparación", "Mismo período del año anterior", "Otro período"]
+)
+
+if modo_comparacion == "Mismo período del año anterior":
+    comp_inicio, comp_fin = mismo_periodo(fecha_inicio, fecha_fin)
+elif modo_comparacion == "Otro período":
+    # Por defecto, la ventana de igual duración inmediatamente anterior
+    duracion = pd.Timestamp(fecha_fin) - pd.Timestamp(fecha_inicio)
+    anterior = max(pd.Timestamp(fecha_inicio) - duracion - pd.Timedelta(days=1), pd.Timestamp(fecha_min))
+    comp_inicio = st.sidebar.date_input(
+        "Comparar desde:",
+        value=anterior.date(),
+        min_value=fecha_min,
+        max_value=fecha_max
+    )
+    comp_fin = st.sidebar.date_input(
+        "Comparar hasta:",
+        value=max(anterior.date(), (pd.Timestamp(fecha_inicio) - pd.Timedelta(days=1)).date()),
+        min_value=fecha_min,
+        max_value=fecha_max
+    )
+
 st.sidebar.markdown("---")
 
 # Filtrar datos por fecha
-pred_modelo1_filtrado = pred_modelo1[
-    (pred_modelo1['Fecha'] >= pd.to_datetime(fecha_inicio)) &
-    (pred_modelo1['Fecha'] <= pd.to_datetime(fecha_fin))
-]
-
-pred_modelo2_filtrado = pred_modelo2[
-    (pred_modelo2['Fecha'] >= pd.to_datetime(fecha_inicio)) &
-    (pred_modelo2['Fecha'] <= pd.to_datetime(fecha_fin))
-]
+pred_modelo1_filtrado = filtrar_ventana(pred_modelo1, fecha_inicio, fecha_fin)
+pred_modelo2_filtrado = filtrar_ventana(pred_modelo2_ancho, fecha_inicio, fecha_fin)
 
 dias_proyeccion = len(pred_modelo1_filtrado)
 
+# Estadísticas de todas las variables de la ventana en una sola pasada
+resumen = tabla_resumen(marco_ventana(pred_modelo1_filtrado, pred_modelo2_filtrado))
+
+# Participaciones y razones del período (razón de promedios)
+agregados = sobre_agregados(resumen['media'])
+
+# KPIs compartidos entre tabs
+demanda = resumen.loc['Demanda_Total_pred']
+demanda_total_prom = demanda['media']
+demanda_total_max = demanda['max']
+demanda_total_min = demanda['min']
+
+hh_prom = resumen.loc['Henry_Hub_pred', 'media']
+hh_max = resumen.loc['Henry_Hub_pred', 'max']
+ttf_prom = resumen.loc['TTF_pred', 'media']
+ttf_max = resumen.loc['TTF_pred', 'max']
+
+spread = agregados['Spread_TTF_HH']
+
+# Mismos indicadores en la ventana de comparación y sus diferencias
+comparacion_periodos = None
+if modo_comparacion != "Sin comparación":
+    # Una ventana (p. ej. el año anterior) que los datos cubren solo en parte promedia
+    # otra estación que la del período; por debajo del mínimo los KPIs no muestran variación
+    cobertura_comparacion = cobertura(comp_inicio, comp_fin, fecha_min, fecha_max)
+    resumen_comparacion = tabla_resumen(marco_ventana(
+        filtrar_ventana(pred_modelo1, comp_inicio, comp_fin),
+        filtrar_ventana(pred_modelo2_ancho, comp_inicio, comp_fin)
+    ))
+    comparacion_periodos = comparar(
+        indicadores(resumen, agregados),
+        indicadores(resumen_comparacion, sobre_agregados(resumen_comparacion['media']))
+    )
+
+def delta_comparacion(indicador):
+    # Variación frente a la ventana de comparación para st.metric (None sin comparación)
+    if comparacion_periodos is None or pd.isna(comparacion_periodos.loc[indicador, 'delta']):
+        return None
+    if cobertura_comparacion < COBERTURA_MINIMA:
+        return None
+    fila = comparacion_periodos.loc[indicador]
+    if pd.isna(fila['variacion_pct']):
+        return f"{fila['delta']:+.2f} pts"
+    return f"{fila['variacion_pct']:+.1f}% vs comparación"
+
 st.sidebar.markdown(f"""
 **Proyección:** {dias_proyeccion} días  
 **Desde:** {fecha_inicio.strftime('%Y-%m-%d')}  
 **Hasta:** {fecha_fin.strftime('%Y-%m-%d')}
 """)
 
+if comparacion_periodos is not None:
+    st.sidebar.markdown(f"**Comparación:** {comp_inicio:%Y-%m-%d} a {comp_fin:%Y-%m-%d}")
+    if cobertura_comparacion < 1:
+        st.sidebar.warning(
+            f"Los datos cubren solo el {cobertura_comparacion:.0%} de la ventana de comparación"
+            + ("; los KPIs no muestran variación." if cobertura_comparacion < COBERTURA_MINIMA else ".")
+        )
+
+# Exportación del período seleccionado; el archivo se genera por bloques al hacer clic
+with st.sidebar.expander("📥 Exportar datos"):
+    from motor.exportacion import FORMATOS, exportar, formatos_disponibles
+    
+    formato = st.selectbox("Formato:", formatos_disponibles())
+    periodo = f"{fecha_inicio:%Y%m%d}_{fecha_fin:%Y%m%d}"
+    
+    exportables = {
+        'Proyecciones modelo 1': ('modelo1', pred_modelo1_filtrado),
+        'Proyecciones desagregadas': ('modelo2', pred_modelo2_filtrado),
+        'Estadísticas del período': ('estadisticas', resumen.rename_axis('Variable').reset_index()),
+        'Métricas agregadas': ('metricas', metricas_agregado),
+        'Métricas por sector': ('metricas_sector', metricas_desagregado),
+    }
+    
+    for etiqueta, (nombre, tabla) in exportables.items():
+        st.download_button(
+            etiqueta,
+            data=lambda tabla=tabla, formato=formato: exportar(tabla, formato),
+            file_name=f"proyectagas_{nombre}_{periodo}.{FORMATOS[formato]['extension']}",
+            mime=FORMATOS[formato]['mime'],
+            on_click="ignore",
+            use_container_width=True
+        )
+
 st.sidebar.markdown("---")
 st.sidebar.info("**Modelo:** XGBoost  \n**Variables:** 13 (11 Demanda + 2 Precios)")
 
+# Reporte de arranque: tiempo de importación de los módulos de app.py
+@telemetria.medir_cache('reporte_arranque', st.cache_data(ttl=600))
+def reporte_arranque():
+    from motor.arranque import reporte_importacion
+    return reporte_importacion()
+
+if st.sidebar.toggle("⏱️ Reporte de arranque"):
+    from motor.arranque import PRESUPUESTO_MS, total_ms
+    
+    reporte = reporte_arranque()
+    total_arranque = total_ms(reporte)
+    
+    if total_arranque > PRESUPUESTO_MS:
+        st.sidebar.error(f"Importación: {total_arranque:,.0f} ms (presupuesto {PRESUPUESTO_MS:,.0f} ms)")
+    else:
+        st.sidebar.success(f"Importación: {total_arranque:,.0f} ms (presupuesto {PRESUPUESTO_MS:,.0f} ms)")
+    
+    st.sidebar.dataframe(
+        reporte.loc[reporte['nivel'] <= 1, ['modulo', 'acumulado_ms']].head(10),
+        hide_index=True
+    )
+
+# Memoria de las tablas de predicciones antes y después de compactar (relee los CSV,
+# así que no se ofrece con la base de datos, donde las tablas no se cargan en memoria)
+@telemetria.medir_cache('reporte_memoria_tablas', st.cache_data)
+def reporte_memoria_tablas():
+    from motor.compactacion import compactar, reporte_memoria
+    
+    pares = {}
+    for nombre in ('pred_modelo1', 'pred_modelo2'):
+        original = pd.read_csv(artefactos.RUTAS[nombre], parse_dates=['Fecha'])
+        pares[nombre] = (original, compactar(original))
+    return reporte_memoria(pares)
+
+if not RUTA_BD and st.sidebar.toggle("💾 Memoria de tablas"):
+    st.sidebar.dataframe(
+        reporte_memoria_tablas().style.format({
+            'antes_kb': '{:,.1f}',
+            'despues_kb': '{:,.1f}',
+            'reduccion': '{:.1f}x'
+        }),
+        hide_index=True
+    )
+
 # ===========================================================================
 # HEADER
 # ===========================================================================
@@ -101,949 +341,1507 @@ st.sidebar.info("**Modelo:** XGBoost  \n**Variables:** 13 (11 Demanda + 2 Precio
 st.title("⛽ ProyectaGAS - Dashboard Ejecutivo")
 st.markdown(f"### Proyección de Demanda y Precios | {dias_proyeccion} días")
 
+# CSS para métricas más compactas
+st.markdown("""
+<style>
+[data-testid="stMetricValue"] {
+    font-size: 24px;
+}
+[data-testid="stMetricLabel"] {
+    font-size: 13px;
+}
+</style>
+""", unsafe_allow_html=True)
+
 # ===========================================================================
 # TABS
 # ===========================================================================
 
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
+# Solo se ejecuta el tab abierto: cambiar de tab provoca un rerun y los
+# módulos pesados que usa cada tab se importan dentro de él.
+tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
     "📊 Resumen Ejecutivo",
     "📈 Proyección Nacional",
     "🗺️ Proyección por Zona",
     "🏭 Proyección por Sector",
     "💰 Precios Internacionales",
-    "📉 Desempeño del Modelo"
-])
+    "📉 Desempeño del Modelo",
+    "🔬 Diagnóstico de Residuos"
+], key="tab_activo", on_change="rerun")
 
 # ===========================================================================
 # TAB 1: RESUMEN EJECUTIVO
 # ===========================================================================
 
-with tab1:
-    st.header("Resumen Ejecutivo - Proyecciones Clave")
-    
-    # CSS para métricas más compactas
-    st.markdown("""
-    <style>
-    [data-testid="stMetricValue"] {
-        font-size: 24px;
-    }
-    [data-testid="stMetricLabel"] {
-        font-size: 13px;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-    
-    # KPIs Principales
-    col1, col2, col3, col4 = st.columns(4)
-    
-    # Demanda Total Proyectada
-    demanda_total_prom = pred_modelo1_filtrado['Demanda_Total_pred'].mean()
-    demanda_total_max = pred_modelo1_filtrado['Demanda_Total_pred'].max()
-    
-    with col1:
-        st.metric(
-            "Demanda Promedio",
-            f"{demanda_total_prom:,.0f} MBTUD"
-        )
-        st.caption(f"Pico: {demanda_total_max:,.0f}")
-    
-    # Precio Henry Hub Proyectado
-    hh_prom = pred_modelo1_filtrado['Henry_Hub_pred'].mean()
-    hh_max = pred_modelo1_filtrado['Henry_Hub_pred'].max()
-    
-    with col2:
-        st.metric(
-            "Henry Hub",
-            f"${hh_prom:.2f}/MMBtu"
-        )
-        st.caption(f"Pico: ${hh_max:.2f}")
-    
-    # Precio TTF Proyectado
-    ttf_prom = pred_modelo1_filtrado['TTF_pred'].mean()
-    ttf_max = pred_modelo1_filtrado['TTF_pred'].max()
-    
-    with col3:
-        st.metric(
-            "TTF",
-            f"${ttf_prom:.2f}/MMBtu"
-        )
-        st.caption(f"Pico: ${ttf_max:.2f}")
-    
-    # Spread HH-TTF
-    spread = ttf_prom - hh_prom
-    
-    with col4:
-        st.metric(
-            "Spread TTF - HH",
-            f"${spread:.2f}/MMBtu",
-            delta=f"{(spread/hh_prom)*100:.1f}%"
-        )
-    
-    st.markdown("---")
-    
-    # Proyección Demanda Nacional
-    st.subheader("📈 Proyección Demanda Nacional")
-    
-    col1, col2 = st.columns([3, 1])
-    
-    with col1:
-        fig = go.Figure()
-        
-        # Submuestrear para mejor visualización
-        df_plot = pred_modelo1_filtrado.iloc[::max(1, len(pred_modelo1_filtrado)//100)]
+@telemetria.medir_cache('preparar_acumulados', st.cache_resource(max_entries=1))
+def preparar_acumulados(generacion):
+    # Sumas acumuladas de todo el histórico para barrer la ventana por años;
+    # con la base de datos cada barrido es una consulta y no se trae el histórico
+    from motor.comparacion import Acumulados, AcumuladosBD
+    
+    if RUTA_BD:
+        return AcumuladosBD(pred_modelo1, pred_modelo2_ancho)
+    return Acumulados(marco_ventana(
+        filtrar_ventana(pred_modelo1, fecha_min, fecha_max),
+        filtrar_ventana(pred_modelo2_ancho, fecha_min, fecha_max)
+    ))
+
+if tab1.open:
+    with tab1:
+        st.header("Resumen Ejecutivo - Proyecciones Clave")
         
-        fig.add_trace(go.Scatter(
-            x=df_plot['Fecha'],
-            y=df_plot['Demanda_Total_pred'],
-            name='Proyección XGBoost',
-            line=dict(color='#1f77b4', width=3),
-            fill='tonexty',
-            mode='lines'
-        ))
+        # KPIs Principales
+        col1, col2, col3, col4 = st.columns(4)
         
-        fig.update_layout(
-            height=350,
-            xaxis_title='Fecha',
-            yaxis_title='MBTUD',
-            hovermode='x unified',
-            showlegend=False
-        )
+        # Demanda Total Proyectada
+        with col1:
+            st.metric(
+                "Demanda Promedio",
+                f"{demanda_total_prom:,.0f} MBTUD",
+                delta=delta_comparacion('Demanda promedio'),
+                delta_color="off"
+            )
+            st.caption(f"Pico: {demanda_total_max:,.0f}")
         
-        st.plotly_chart(fig, use_container_width=True)
-    
-    with col2:
-        st.markdown("**Estadísticas**")
-        st.metric("Promedio", f"{demanda_total_prom:,.0f}")
-        st.metric("Mediana", f"{pred_modelo1_filtrado['Demanda_Total_pred'].median():,.0f}")
-        st.metric("Máximo", f"{demanda_total_max:,.0f}")
-        st.metric("Mínimo", f"{pred_modelo1_filtrado['Demanda_Total_pred'].min():,.0f}")
-        
-        rango = demanda_total_max - pred_modelo1_filtrado['Demanda_Total_pred'].min()
-        st.caption(f"Rango: {rango:,.0f} MBTUD")
-    
-    st.markdown("---")
-    
-    # Proyección por Sector - Top 5
-    st.subheader("🏭 Proyección por Sector - Top 5 Consumidores")
-    
-    sectores_cols = [col for col in pred_modelo2_filtrado.columns if '_pred' in col and 'Demanda_' in col]
-    
-    # Calcular promedios
-    promedios = {}
-    for col in sectores_cols:
-        nombre = col.replace('Demanda_', '').replace('_Total_MBTUD_pred', '').replace('_', ' ')
-        if nombre not in ['Total', 'Costa', 'Interior']:
-            promedios[nombre] = pred_modelo2_filtrado[col].mean()
-    
-    # Top 5
-    top5 = sorted(promedios.items(), key=lambda x: x[1], reverse=True)[:5]
-    
-    col1, col2 = st.columns([2, 1])
-    
-    with col1:
-        fig = go.Figure(data=[
-            go.Bar(
-                x=[x[1] for x in top5],
-                y=[x[0] for x in top5],
-                orientation='h',
-                marker=dict(color='#2ca02c'),
-                text=[f"{x[1]:,.0f}" for x in top5],
-                textposition='auto'
+        # Precio Henry Hub Proyectado
+        with col2:
+            st.metric(
+                "Henry Hub",
+                f"${hh_prom:.2f}/MMBtu",
+                delta=delta_comparacion('Henry Hub promedio'),
+                delta_color="inverse"
             )
-        ])
+            st.caption(f"Pico: ${hh_max:.2f}")
         
-        fig.update_layout(
-            height=300,
-            xaxis_title='MBTUD Promedio',
-            yaxis_title='',
-            showlegend=False
-        )
+        # Precio TTF Proyectado
+        with col3:
+            st.metric(
+                "TTF",
+                f"${ttf_prom:.2f}/MMBtu",
+                delta=delta_comparacion('TTF promedio'),
+                delta_color="inverse"
+            )
+            st.caption(f"Pico: ${ttf_max:.2f}")
         
-        st.plotly_chart(fig, use_container_width=True)
-    
-    with col2:
-        st.markdown("**Distribución %**")
-        total_top5 = sum([x[1] for x in top5])
-        for nombre, valor in top5:
-            pct = (valor / demanda_total_prom) * 100
+        # Spread HH-TTF
+        with col4:
             st.metric(
-                nombre.replace('GeneracionTermica', 'Gen. Térmica'),
-                f"{pct:.1f}%",
-                f"{valor:,.0f} MBTUD"
+                "Spread TTF - HH",
+                f"${spread:.2f}/MMBtu",
+                delta=delta_comparacion('Spread_TTF_HH') or f"{(spread/hh_prom)*100:.1f}%"
             )
-    
-    st.markdown("---")
-    
-    # Alertas y Recomendaciones
-    st.subheader("⚠️ Alertas e Insights Operacionales")
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.info("""
-        **📊 Demanda Nacional**
         
-        Proyección estable en rango {min:,.0f} - {max:,.0f} MBTUD.
+        st.markdown("---")
         
-        **Acción:** Mantener capacidad de suministro base.
-        """.format(
-            min=pred_modelo1_filtrado['Demanda_Total_pred'].min(),
-            max=demanda_total_max
-        ))
-    
-    with col2:
-        if spread > 5:
-            st.warning(f"""
-            **💰 Spread HH-TTF Elevado**
+        # Todos los indicadores frente a la ventana de comparación
+        if comparacion_periodos is not None:
+            st.subheader("🔁 Comparación de Períodos")
+            st.caption(
+                f"{fecha_inicio:%Y-%m-%d} a {fecha_fin:%Y-%m-%d} frente a "
+                f"{comp_inicio:%Y-%m-%d} a {comp_fin:%Y-%m-%d}. "
+                "Las participaciones y el CV se comparan en puntos porcentuales."
+            )
+            if cobertura_comparacion < 1:
+                st.warning(
+                    f"Los datos cubren solo el {cobertura_comparacion:.0%} de la ventana de comparación: "
+                    "sus promedios son de los días disponibles y pueden no ser comparables."
+                )
             
-            Diferencia de ${spread:.2f}/MMBtu favorece importación desde EE.UU.
+            nombres_indicadores = lambda n: (n.replace('Participacion_', 'Participación ')
+                                             .replace('Spread_TTF_HH', 'Spread TTF - HH')
+                                             .replace('Ratio_Costa_Interior', 'Razón Costa / Interior'))
             
-            **Acción:** Evaluar contratos GNL indexados a Henry Hub.
-            """)
-        else:
-            st.success("""
-            **💰 Spread HH-TTF Normal**
+            def color_delta(valor):
+                if pd.isna(valor) or valor == 0:
+                    return ''
+                return 'color: #2ca02c' if valor > 0 else 'color: #d62728'
             
-            Mercados en equilibrio.
+            st.dataframe(
+                comparacion_periodos.rename(index=nombres_indicadores).rename(columns={
+                    'actual': 'Período actual',
+                    'referencia': 'Comparación',
+                    'delta': 'Diferencia',
+                    'variacion_pct': 'Variación (%)'
+                }).style.format('{:,.2f}', na_rep='—').map(color_delta, subset=['Diferencia']),
+                use_container_width=True,
+                height=420
+            )
             
-            **Acción:** Mantener estrategia actual.
-            """)
-    
-    with col3:
-        # Calcular volatilidad
-        volatilidad = pred_modelo1_filtrado['Demanda_Total_pred'].std() / demanda_total_prom * 100
+            # Misma ventana en cada año anterior: una resta por año sobre las sumas acumuladas
+            with st.expander("📆 Misma ventana en años anteriores"):
+                barrido = preparar_acumulados(generacion).barrido_anual(fecha_inicio, fecha_fin)
+                
+                if len(barrido) < 2:
+                    st.info("Los datos no cubren esta ventana en años anteriores.")
+                else:
+                    opciones_barrido = {
+                        'Demanda Total': 'Demanda_Total_pred',
+                        'Demanda Costa': 'Demanda_Costa_Total_MBTUD_pred',
+                        'Demanda Interior': 'Demanda_Interior_Total_MBTUD_pred',
+                        'Henry Hub': 'Henry_Hub_pred',
+                        'TTF': 'TTF_pred',
+                        'Spread TTF - HH': 'Spread_TTF_HH',
+                        **{nombres_indicadores(c): c for c in barrido.columns if c.startswith('Participacion_')}
+                    }
+                    etiqueta_barrido = st.selectbox("Indicador:", list(opciones_barrido))
+                    valores_barrido = barrido[opciones_barrido[etiqueta_barrido]]
+                    
+                    etiquetas_anios = [
+                        f"{desde:%Y-%m-%d} a {hasta:%Y-%m-%d}"
+                        for desde, hasta in zip(barrido['desde'], barrido['hasta'])
+                    ]
+                    
+                    fig = go.Figure(go.Bar(
+                        x=etiquetas_anios[::-1],
+                        y=valores_barrido.to_numpy()[::-1],
+                        marker_color=['#c7c7c7'] * (len(barrido) - 1) + ['#1f77b4'],
+                        text=[f"{v:,.2f}" for v in valores_barrido.to_numpy()[::-1]],
+                        textposition='auto'
+                    ))
+                    
+                    fig.update_layout(
+                        height=300,
+                        xaxis_title='',
+                        yaxis_title=etiqueta_barrido,
+                        showlegend=False
+                    )
+                    
+                    graficar(fig, use_container_width=True)
+                    
+                    # Variación del período actual frente a cada año anterior
+                    actual = valores_barrido.iloc[0]
+                    st.caption(" | ".join(
+                        f"vs {etiqueta}: {(actual / valor - 1) * 100:+.1f}%"
+                        for etiqueta, valor in zip(etiquetas_anios[1:], valores_barrido.iloc[1:])
+                        if pd.notna(valor) and valor
+                    ))
+            
+            st.markdown("---")
+        
+        # Proyección Demanda Nacional
+        st.subheader("📈 Proyección Demanda Nacional")
+        
+        col1, col2 = st.columns([3, 1])
         
-        if volatilidad > 15:
-            st.warning(f"""
-            **📈 Alta Variabilidad**
+        with col1:
+            fig = go.Figure()
             
-            Volatilidad: {volatilidad:.1f}%
+            # Submuestrear para mejor visualización
+            df_plot = pred_modelo1_filtrado.iloc[::max(1, len(pred_modelo1_filtrado)//100)]
             
-            **Acción:** Aumentar inventarios de seguridad.
-            """)
-        else:
-            st.success(f"""
-            **📈 Demanda Estable**
+            fig.add_trace(go.Scatter(
+                x=df_plot['Fecha'],
+                y=df_plot['Demanda_Total_pred'],
+                name='Proyección XGBoost',
+                line=dict(color='#1f77b4', width=3),
+                fill='tonexty',
+                mode='lines'
+            ))
             
-            Volatilidad: {volatilidad:.1f}%
+            fig.update_layout(
+                height=350,
+                xaxis_title='Fecha',
+                yaxis_title='MBTUD',
+                hovermode='x unified',
+                showlegend=False
+            )
             
-            **Acción:** Optimización normal.
-            """)
-
-# ===========================================================================
-# TAB 2: PROYECCIÓN NACIONAL
-# ===========================================================================
-
-with tab2:
-    st.header("Proyección Demanda Nacional")
-    
-    # KPIs más compactos
-    col1, col2, col3, col4, col5 = st.columns(5)
-    
-    with col1:
-        st.metric("Promedio", f"{demanda_total_prom:,.0f}")
-    
-    with col2:
-        st.metric("Máximo", f"{demanda_total_max:,.0f}")
-    
-    with col3:
-        st.metric("Mínimo", f"{pred_modelo1_filtrado['Demanda_Total_pred'].min():,.0f}")
-    
-    with col4:
-        desv = pred_modelo1_filtrado['Demanda_Total_pred'].std()
-        st.metric("Desv. Std", f"{desv:,.0f}")
-    
-    with col5:
-        cv = (desv / demanda_total_prom) * 100
-        st.metric("Coef. Var.", f"{cv:.1f}%")
-    
-    st.markdown("---")
-    
-    # Gráfico principal
-    st.subheader("📊 Proyección Temporal")
-    
-    fig = go.Figure()
-    
-    df_plot = pred_modelo1_filtrado.iloc[::max(1, len(pred_modelo1_filtrado)//200)]
-    
-    # Banda de confianza (±10%)
-    fig.add_trace(go.Scatter(
-        x=df_plot['Fecha'],
-        y=df_plot['Demanda_Total_pred'] * 1.1,
-        mode='lines',
-        line=dict(width=0),
-        showlegend=False,
-        hoverinfo='skip'
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=df_plot['Fecha'],
-        y=df_plot['Demanda_Total_pred'] * 0.9,
-        mode='lines',
-        line=dict(width=0),
-        fillcolor='rgba(31, 119, 180, 0.2)',
-        fill='tonexty',
-        showlegend=True,
-        name='Banda ±10%',
-        hoverinfo='skip'
-    ))
-    
-    # Proyección
-    fig.add_trace(go.Scatter(
-        x=df_plot['Fecha'],
-        y=df_plot['Demanda_Total_pred'],
-        name='Proyección',
-        line=dict(color='#1f77b4', width=3),
-        mode='lines'
-    ))
-    
-    fig.update_layout(
-        height=500,
-        xaxis_title='Fecha',
-        yaxis_title='MBTUD',
-        hovermode='x unified'
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
-    
-    st.markdown("---")
-    
-    # Distribución mensual
-    st.subheader("📅 Distribución por Mes")
-    
-    pred_modelo1_filtrado['Mes'] = pred_modelo1_filtrado['Fecha'].dt.month
-    mensual = pred_modelo1_filtrado.groupby('Mes')['Demanda_Total_pred'].agg(['mean', 'min', 'max'])
-    
-    meses = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
-    mensual.index = [meses[i-1] for i in mensual.index]
-    
-    fig = go.Figure()
-    
-    fig.add_trace(go.Bar(
-        x=mensual.index,
-        y=mensual['mean'],
-        name='Promedio',
-        marker_color='#1f77b4',
-        error_y=dict(
-            type='data',
-            symmetric=False,
-            array=mensual['max'] - mensual['mean'],
-            arrayminus=mensual['mean'] - mensual['min']
-        )
-    ))
-    
-    fig.update_layout(
-        height=400,
-        xaxis_title='Mes',
-        yaxis_title='MBTUD',
-        showlegend=False
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
-    
-    st.markdown("---")
-    
-    # Recomendaciones
-    st.subheader("💡 Recomendaciones Operacionales")
-    
-    mes_mayor = mensual['mean'].idxmax()
-    mes_menor = mensual['mean'].idxmin()
-    amplitud = mensual['mean'].max() - mensual['mean'].min()
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown(f"""
-        **📈 Planificación de Capacidad**
+            graficar(fig, use_container_width=True)
         
-        - **Mes de mayor demanda:** {mes_mayor} ({mensual.loc[mes_mayor, 'mean']:,.0f} MBTUD)
-        - **Mes de menor demanda:** {mes_menor} ({mensual.loc[mes_menor, 'mean']:,.0f} MBTUD)
-        - **Amplitud estacional:** {amplitud:,.0f} MBTUD ({(amplitud/demanda_total_prom)*100:.1f}%)
+        with col2:
+            st.markdown("**Estadísticas**")
+            st.metric("Promedio", f"{demanda_total_prom:,.0f}")
+            st.metric("Mediana", f"{demanda['mediana']:,.0f}")
+            st.metric("Máximo", f"{demanda_total_max:,.0f}")
+            st.metric("Mínimo", f"{demanda_total_min:,.0f}")
+            
+            rango = demanda_total_max - demanda_total_min
+            st.caption(f"Rango: {rango:,.0f} MBTUD")
         
-        **Acciones:**
-        - Asegurar capacidad de {mensual['max'].max():,.0f} MBTUD en picos
-        - Optimizar inventarios para variación estacional
-        """)
-    
-    with col2:
-        st.markdown(f"""
-        **🔧 Gestión de Contratos**
+        st.markdown("---")
         
-        - **Demanda base:** {mensual['min'].min():,.0f} MBTUD (contratos firmes)
-        - **Demanda variable:** {mensual['max'].max() - mensual['min'].min():,.0f} MBTUD (contratos flexibles)
-        - **Coeficiente variación:** {cv:.1f}%
+        # Proyección por Sector - Top 5
+        st.subheader("🏭 Proyección por Sector - Top 5 Consumidores")
         
-        **Estrategia:**
-        - 70% contratos largo plazo (base)
-        - 30% contratos flexibles (picos)
-        """)
+        # Top 5 desde la tabla resumen
+        top5 = list(top_sectores(resumen, 5).items())
+        
+        col1, col2 = st.columns([2, 1])
+        
+        with col1:
+            fig = go.Figure(data=[
+                go.Bar(
+                    x=[x[1] for x in top5],
+                    y=[x[0] for x in top5],
+                    orientation='h',
+                    marker=dict(color='#2ca02c'),
+                    text=[f"{x[1]:,.0f}" for x in top5],
+                    textposition='auto'
+                )
+            ])
+            
+            fig.update_layout(
+                height=300,
+                xaxis_title='MBTUD Promedio',
+                yaxis_title='',
+                showlegend=False
+            )
+            
+            graficar(fig, use_container_width=True)
+        
+        with col2:
+            st.markdown("**Distribución %**")
+            total_top5 = sum([x[1] for x in top5])
+            for nombre, valor in top5:
+                pct = agregados[f"Participacion_{nombre.replace(' ', '_')}"]
+                st.metric(
+                    nombre.replace('GeneracionTermica', 'Gen. Térmica'),
+                    f"{pct:.1f}%",
+                    f"{valor:,.0f} MBTUD"
+                )
+        
+        st.markdown("---")
+        
+        # Alertas y Recomendaciones
+        st.subheader("⚠️ Alertas e Insights Operacionales")
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.info("""
+            **📊 Demanda Nacional**
+            
+            Proyección estable en rango {min:,.0f} - {max:,.0f} MBTUD.
+            
+            **Acción:** Mantener capacidad de suministro base.
+            """.format(
+                min=demanda_total_min,
+                max=demanda_total_max
+            ))
+        
+        with col2:
+            if spread > UMBRAL_SPREAD:
+                st.warning(f"""
+                **💰 Spread HH-TTF Elevado**
+                
+                Diferencia de ${spread:.2f}/MMBtu favorece importación desde EE.UU.
+                
+                **Acción:** Evaluar contratos GNL indexados a Henry Hub.
+                """)
+            else:
+                st.success("""
+                **💰 Spread HH-TTF Normal**
+                
+                Mercados en equilibrio.
+                
+                **Acción:** Mantener estrategia actual.
+                """)
+        
+        with col3:
+            # Calcular volatilidad
+            volatilidad = demanda['cv']
+            
+            if volatilidad > UMBRAL_VOLATILIDAD:
+                st.warning(f"""
+                **📈 Alta Variabilidad**
+                
+                Volatilidad: {volatilidad:.1f}%
+                
+                **Acción:** Aumentar inventarios de seguridad.
+                """)
+            else:
+                st.success(f"""
+                **📈 Demanda Estable**
+                
+                Volatilidad: {volatilidad:.1f}%
+                
+                **Acción:** Optimización normal.
+                """)
+        
+        # Historial de alertas en ventanas móviles
+        with st.expander("🕒 Historial de Alertas (ventanas móviles)"):
+            ventana_alerta = st.radio(
+                "Ventana móvil:",
+                VENTANAS,
+                format_func=lambda v: f"{v} días",
+                horizontal=True
+            )
+            
+            nombres_reglas = {
+                'spread_elevado': f'Spread > {UMBRAL_SPREAD} USD',
+                'volatilidad_demanda': f'Volatilidad > {UMBRAL_VOLATILIDAD}%',
+                'clasificacion_spread': 'Clasificación spread'
+            }
+            colores_estado = {
+                'elevado': '#d62728', 'alta': '#d62728', 'oportunidad': '#2ca02c',
+                'normal': '#1f77b4', 'estable': '#1f77b4', 'bajo': '#ff7f0e',
+                'sin datos': '#c7c7c7'
+            }
+            
+            tramos = linea_alertas[linea_alertas['ventana'] == ventana_alerta]
+            
+            fig = go.Figure()
+            
+            for estado, grupo in tramos.groupby('estado'):
+                fig.add_trace(go.Bar(
+                    base=grupo['inicio'],
+                    x=(grupo['fin'] - grupo['inicio'] + pd.Timedelta(days=1)).dt.total_seconds() * 1000,
+                    y=grupo['regla'].map(nombres_reglas),
+                    orientation='h',
+                    name=estado,
+                    marker_color=colores_estado.get(estado, '#7f7f7f')
+                ))
+            
+            fig.add_vrect(x0=fecha_inicio, x1=fecha_fin, fillcolor='grey', opacity=0.15, line_width=0)
+            
+            fig.update_layout(
+                height=250,
+                barmode='overlay',
+                xaxis_type='date',
+                xaxis_title='Fecha',
+                yaxis_title=''
+            )
+            
+            graficar(fig, use_container_width=True)
+            
+            # Estado de cada regla al cierre del período seleccionado
+            cols = st.columns(len(nombres_reglas))
+            for col, (regla, nombre) in zip(cols, nombres_reglas.items()):
+                with col:
+                    estado = estado_en(linea_alertas, regla, ventana_alerta, fecha_fin)
+                    st.metric(nombre, estado or 'fuera de rango')
+            
+            activas = tramos[tramos['activa']]
+            dias_alerta = ((activas['fin'] - activas['inicio']).dt.days + 1).groupby(activas['regla']).sum()
+            st.caption("Días con alerta activa en el histórico: " + ", ".join(
+                f"{nombres_reglas[r]}: {d}" for r, d in dias_alerta.items()
+            ))
 
 # ===========================================================================
-# TAB 3: PROYECCIÓN POR ZONA
+# TAB 2: PROYECCIÓN NACIONAL
 # ===========================================================================
 
-with tab3:
-    st.header("Proyección por Zona Geográfica")
-    
-    # KPIs por zona más compactos
-    costa_prom = pred_modelo2_filtrado['Demanda_Costa_Total_MBTUD_pred'].mean()
-    interior_prom = pred_modelo2_filtrado['Demanda_Interior_Total_MBTUD_pred'].mean()
-    total_zonas = costa_prom + interior_prom
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.metric(
-            "🌊 Costa",
-            f"{costa_prom:,.0f} MBTUD",
-            f"{(costa_prom/total_zonas)*100:.1f}%"
-        )
-    
-    with col2:
-        st.metric(
-            "🏔️ Interior",
-            f"{interior_prom:,.0f} MBTUD",
-            f"{(interior_prom/total_zonas)*100:.1f}%"
-        )
-    
-    with col3:
-        diferencia = abs(costa_prom - interior_prom)
-        st.metric(
-            "Diferencia",
-            f"{diferencia:,.0f} MBTUD",
-            f"{(diferencia/total_zonas)*100:.1f}%"
-        )
-    
-    st.markdown("---")
-    
-    # Gráficos comparativos
-    col1, col2 = st.columns(2)
-    
-    df_plot = pred_modelo2_filtrado.iloc[::max(1, len(pred_modelo2_filtrado)//100)]
-    
-    with col1:
-        st.subheader("🌊 Costa Atlántica")
+@telemetria.medir_cache('optimizar_contratos', st.cache_data(max_entries=64))
+def optimizar_contratos(generacion, fecha_inicio, fecha_fin, costos):
+    # Cacheado por (versión de datos, ventana, costos)
+    from motor.contratos import optimizar
+
+    return optimizar(marco_ventana(
+        filtrar_ventana(pred_modelo1, fecha_inicio, fecha_fin, ['Demanda_Total_pred']),
+        filtrar_ventana(pred_modelo2_ancho, fecha_inicio, fecha_fin)
+    ), dict(costos))
+
+if tab2.open:
+    with tab2:
+        st.header("Proyección Demanda Nacional")
         
-        fig = go.Figure()
+        # KPIs más compactos
+        col1, col2, col3, col4, col5 = st.columns(5)
         
-        fig.add_trace(go.Scatter(
-            x=df_plot['Fecha'],
-            y=df_plot['Demanda_Costa_Total_MBTUD_pred'],
-            name='Proyección',
-            line=dict(color='#ff7f0e', width=2),
-            fill='tonexty'
-        ))
+        with col1:
+            st.metric("Promedio", f"{demanda_total_prom:,.0f}")
         
-        fig.update_layout(
-            height=350,
-            xaxis_title='Fecha',
-            yaxis_title='MBTUD',
-            showlegend=False
-        )
+        with col2:
+            st.metric("Máximo", f"{demanda_total_max:,.0f}")
         
-        st.plotly_chart(fig, use_container_width=True)
+        with col3:
+            st.metric("Mínimo", f"{demanda_total_min:,.0f}")
         
-        st.markdown(f"""
-        **Características:**
-        - Participación: {(costa_prom/total_zonas)*100:.1f}%
-        - Promedio: {costa_prom:,.0f} MBTUD
-        - Rango: {pred_modelo2_filtrado['Demanda_Costa_Total_MBTUD_pred'].min():,.0f} - {pred_modelo2_filtrado['Demanda_Costa_Total_MBTUD_pred'].max():,.0f} MBTUD
+        with col4:
+            st.metric("Desv. Std", f"{demanda['desv']:,.0f}")
         
-        **Sectores principales:**
-        - Industrial (petroquímica, zona franca)
-        - Refinería de Cartagena
-        - Residencial urbano
-        """)
-    
-    with col2:
-        st.subheader("🏔️ Interior")
+        with col5:
+            cv = demanda['cv']
+            st.metric("Coef. Var.", f"{cv:.1f}%")
+        
+        st.markdown("---")
+        
+        # Gráfico principal
+        st.subheader("📊 Proyección Temporal")
         
         fig = go.Figure()
         
+        df_plot = pred_modelo1_filtrado.iloc[::max(1, len(pred_modelo1_filtrado)//200)]
+        
+        # Banda de confianza (±10%)
         fig.add_trace(go.Scatter(
             x=df_plot['Fecha'],
-            y=df_plot['Demanda_Interior_Total_MBTUD_pred'],
+            y=df_plot['Demanda_Total_pred'] * 1.1,
+            mode='lines',
+            line=dict(width=0),
+            showlegend=False,
+            hoverinfo='skip'
+        ))
+        
+        fig.add_trace(go.Scatter(
+            x=df_plot['Fecha'],
+            y=df_plot['Demanda_Total_pred'] * 0.9,
+            mode='lines',
+            line=dict(width=0),
+            fillcolor='rgba(31, 119, 180, 0.2)',
+            fill='tonexty',
+            showlegend=True,
+            name='Banda ±10%',
+            hoverinfo='skip'
+        ))
+        
+        # Proyección
+        fig.add_trace(go.Scatter(
+            x=df_plot['Fecha'],
+            y=df_plot['Demanda_Total_pred'],
             name='Proyección',
-            line=dict(color='#2ca02c', width=2),
-            fill='tonexty'
+            line=dict(color='#1f77b4', width=3),
+            mode='lines'
         ))
         
         fig.update_layout(
-            height=350,
+            height=500,
             xaxis_title='Fecha',
             yaxis_title='MBTUD',
-            showlegend=False
+            hovermode='x unified'
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        graficar(fig, use_container_width=True)
         
-        st.markdown(f"""
-        **Características:**
-        - Participación: {(interior_prom/total_zonas)*100:.1f}%
-        - Promedio: {interior_prom:,.0f} MBTUD
-        - Rango: {pred_modelo2_filtrado['Demanda_Interior_Total_MBTUD_pred'].min():,.0f} - {pred_modelo2_filtrado['Demanda_Interior_Total_MBTUD_pred'].max():,.0f} MBTUD
+        st.markdown("---")
         
-        **Sectores principales:**
-        - Residencial (Bogotá, Medellín)
-        - Generación térmica
-        - Industrial manufacturero
-        """)
-    
-    st.markdown("---")
-    
-    # Comparación directa
-    st.subheader("📊 Comparación Temporal")
-    
-    fig = go.Figure()
-    
-    fig.add_trace(go.Scatter(
-        x=df_plot['Fecha'],
-        y=df_plot['Demanda_Costa_Total_MBTUD_pred'],
-        name='Costa',
-        line=dict(color='#ff7f0e', width=2)
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=df_plot['Fecha'],
-        y=df_plot['Demanda_Interior_Total_MBTUD_pred'],
-        name='Interior',
-        line=dict(color='#2ca02c', width=2)
-    ))
-    
-    fig.update_layout(
-        height=400,
-        xaxis_title='Fecha',
-        yaxis_title='MBTUD',
-        hovermode='x unified'
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
-    
-    st.markdown("---")
-    
-    # Estrategia por zona
-    st.subheader("🎯 Estrategia Operacional por Zona")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("""
-        **Costa Atlántica**
-        
-        📦 **Infraestructura:**
-        - Mayor capacidad de almacenamiento
-        - Flexibilidad en contratos industriales
-        - Acceso a terminales de GNL
-        
-        ⚡ **Gestión:**
-        - Coordinación con grandes consumidores
-        - Contratos interrumpibles
-        - Provisión para paradas de refinería
-        """)
-    
-    with col2:
-        st.markdown("""
-        **Interior**
-        
-        📦 **Infraestructura:**
-        - Red de distribución residencial densa
-        - Interconexión con hidrogeneración
-        - Gasoductos principales
-        
-        ⚡ **Gestión:**
-        - Estacionalidad predecible
-        - Contratos de largo plazo
-        - Coordinación con generación eléctrica
-        """)
+        # Distribución mensual
+        st.subheader("📅 Distribución por Mes")
+        
+        mensual = agregado_mensual(pred_modelo1, fecha_inicio, fecha_fin, 'Demanda_Total_pred')
+        
+        meses = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+        mensual.index = [meses[i-1] for i in mensual.index]
+        
+        fig = go.Figure()
+        
+        fig.add_trace(go.Bar(
+            x=mensual.index,
+            y=mensual['mean'],
+            name='Promedio',
+            marker_color='#1f77b4',
+            error_y=dict(
+                type='data',
+                symmetric=False,
+                array=mensual['max'] - mensual['mean'],
+                arrayminus=mensual['mean'] - mensual['min']
+            )
+        ))
+        
+        # Perfil estacional del histórico completo sobre el nivel del período
+        perfil_demanda = estacionalidad['perfil_mensual']['Demanda_Total_pred']
+        
+        fig.add_trace(go.Scatter(
+            x=mensual.index,
+            y=demanda_total_prom + perfil_demanda[mensual.index],
+            name='Perfil estacional',
+            mode='lines+markers',
+            line=dict(color='#ff7f0e', width=2, dash='dot')
+        ))
+        
+        fig.update_layout(
+            height=400,
+            xaxis_title='Mes',
+            yaxis_title='MBTUD',
+            hovermode='x unified'
+        )
+        
+        graficar(fig, use_container_width=True)
+        
+        st.markdown("---")
+        
+        # Cómo cambió la proyección entre emisiones (python -m motor.versiones registrar)
+        from motor import versiones
+        
+        registradas = versiones.listar()
+        
+        with st.expander("🕰️ Versiones del Pronóstico"):
+            if len(registradas) < 2:
+                st.info(
+                    f"Hay {len(registradas)} versión(es) registrada(s). Registra cada emisión con "
+                    "`python -m motor.versiones registrar --emision AAAA-MM-DD` para comparar."
+                )
+            else:
+                emisiones = [v['emision'] for v in registradas]
+                variables_version = {
+                    columna: tabla
+                    for tabla, info in registradas[-1]['tablas'].items()
+                    for columna in info['columnas'] if columna.endswith('_pred')
+                }
+                
+                col1, col2 = st.columns([2, 1])
+                
+                with col1:
+                    variable_version = st.selectbox(
+                        "Variable:",
+                        list(variables_version),
+                        format_func=lambda c: c.removesuffix('_pred').replace('_Total_MBTUD', '').replace('_', ' ')
+                    )
+                
+                with col2:
+                    fecha_objetivo = st.date_input(
+                        "Fecha proyectada:",
+                        value=fecha_fin,
+                        key="fecha_version"
+                    )
+                
+                tabla_version = variables_version[variable_version]
+                cambios = versiones.historial(tabla_version, variable_version, fecha_objetivo).dropna()
+                
+                if cambios.empty:
+                    st.warning("Ninguna versión cubre esa fecha.")
+                else:
+                    col1, col2, col3 = st.columns(3)
+                    
+                    with col1:
+                        st.metric(f"Primera ({cambios.index[0]})", f"{cambios.iloc[0]:,.2f}")
+                    
+                    with col2:
+                        st.metric(
+                            f"Última ({cambios.index[-1]})",
+                            f"{cambios.iloc[-1]:,.2f}",
+                            f"{(cambios.iloc[-1] / cambios.iloc[0] - 1) * 100:+.1f}%"
+                        )
+                    
+                    with col3:
+                        st.metric("Versiones", len(cambios))
+                    
+                    fig = go.Figure(go.Scatter(
+                        x=pd.to_datetime(cambios.index),
+                        y=cambios.to_numpy(),
+                        mode='lines+markers',
+                        line=dict(color='#1f77b4', width=2)
+                    ))
+                    
+                    fig.update_layout(
+                        height=300,
+                        xaxis_title='Fecha de emisión',
+                        yaxis_title=f'Proyección para {fecha_objetivo:%Y-%m-%d}'
+                    )
+                    
+                    graficar(fig, use_container_width=True)
+                
+                emisiones_sel = st.multiselect("Comparar curvas:", emisiones, default=emisiones[-2:])
+                
+                if emisiones_sel:
+                    curvas = versiones.curvas(tabla_version, variable_version, emisiones_sel)
+                    curvas = curvas.loc[pd.Timestamp(fecha_inicio):pd.Timestamp(fecha_fin)]
+                    
+                    fig = go.Figure()
+                    
+                    for emision in emisiones_sel:
+                        fig.add_trace(go.Scatter(
+                            x=curvas.index,
+                            y=curvas[emision],
+                            name=emision,
+                            mode='lines'
+                        ))
+                    
+                    fig.update_layout(
+                        height=400,
+                        xaxis_title='Fecha',
+                        hovermode='x unified'
+                    )
+                    
+                    graficar(fig, use_container_width=True)
+        
+        st.markdown("---")
+        
+        # Recomendaciones
+        st.subheader("💡 Recomendaciones Operacionales")
+        
+        # Meses pico/valle y amplitud desde la descomposición estacional (histórico completo,
+        # no del período: un año de ciclo no se ajusta sobre unas semanas)
+        estacional_demanda = estacionalidad['resumen'].loc['Demanda_Total_pred']
+        mes_mayor = estacional_demanda['mes_pico']
+        mes_menor = estacional_demanda['mes_valle']
+        amplitud = estacional_demanda['amplitud']
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown(f"""
+            **📈 Planificación de Capacidad**
+            
+            Estacionalidad del histórico completo, sobre el nivel del período:
+            - **Mes de mayor demanda:** {mes_mayor} ({demanda_total_prom + perfil_demanda[mes_mayor]:,.0f} MBTUD)
+            - **Mes de menor demanda:** {mes_menor} ({demanda_total_prom + perfil_demanda[mes_menor]:,.0f} MBTUD)
+            - **Amplitud estacional:** {amplitud:,.0f} MBTUD ({(amplitud/demanda_total_prom)*100:.1f}%)
+            
+            **Acciones:**
+            - Asegurar capacidad de {mensual['max'].max():,.0f} MBTUD en picos (máximo del período)
+            - Optimizar inventarios para variación estacional
+            """)
+        
+        from motor.contratos import COSTOS_POR_DEFECTO, NOMBRES_COSTOS, REGLA_FIJA, validar_costos
+
+        with st.expander("⚙️ Costos de contratos (USD/MBTU)"):
+            cols = st.columns(len(NOMBRES_COSTOS))
+            costos_contratos = {}
+            for col, (clave, nombre) in zip(cols, NOMBRES_COSTOS.items()):
+                with col:
+                    costos_contratos[clave] = st.number_input(
+                        nombre.capitalize(), min_value=0.0, value=COSTOS_POR_DEFECTO[clave], step=0.1,
+                        key=f"costo_contrato_{clave}"
+                    )
+
+        problemas_costos = validar_costos(costos_contratos)
+        if problemas_costos:
+            st.warning("⚠️ Costos de contratos no válidos; se muestra la regla fija "
+                       f"{REGLA_FIJA[0]:.0%}/{REGLA_FIJA[1]:.0%}.\n\n" + "\n".join(f"- {p}" for p in problemas_costos))
+            contratos = pd.DataFrame()
+        else:
+            contratos = optimizar_contratos(
+                generacion, fecha_inicio, fecha_fin, tuple(costos_contratos.items())
+            )
+
+        with col2:
+            if 'Nacional' in contratos.index:
+                nacional = contratos.loc['Nacional']
+                st.markdown(f"""
+                **🔧 Gestión de Contratos**
+
+                - **Demanda base:** {nacional['firme']:,.0f} MBTUD (contratos firmes)
+                - **Capacidad flexible:** {nacional['flexible']:,.0f} MBTUD (contratos flexibles)
+                - **Coeficiente variación:** {cv:.1f}%
+
+                **Estrategia (mezcla de menor costo esperado):**
+                - {nacional['participacion_firme']:.0f}% contratos largo plazo (base)
+                - {100 - nacional['participacion_firme']:.0f}% contratos flexibles (picos)
+                - Cobertura sin déficit: {nacional['cobertura']:.0f}% de los días
+                - Ahorro frente a 70/30: {nacional['ahorro_pct']:.1f}%
+                """)
+            elif problemas_costos:
+                st.markdown(f"""
+                **🔧 Gestión de Contratos**
+
+                - **Demanda base:** {mensual['min'].min():,.0f} MBTUD (contratos firmes)
+                - **Demanda variable:** {mensual['max'].max() - mensual['min'].min():,.0f} MBTUD (contratos flexibles)
+                - **Coeficiente variación:** {cv:.1f}%
+
+                **Estrategia (regla fija):**
+                - {REGLA_FIJA[0]:.0%} contratos largo plazo (base)
+                - {REGLA_FIJA[1]:.0%} contratos flexibles (picos)
+                """)
+            else:
+                st.info("No hay proyección nacional en el período seleccionado.")
+
+        if not contratos.empty:
+            with st.expander("📑 Mezcla de contratos por zona y sector"):
+                tabla_contratos = contratos.rename(columns={
+                    'firme': 'Firme (MBTUD)',
+                    'flexible': 'Flexible (MBTUD)',
+                    'participacion_firme': 'Firme (%)',
+                    'cobertura': 'Cobertura (%)',
+                    'costo_diario': 'Costo diario (USD)',
+                    'costo_unitario': 'Costo (USD/MBTU)',
+                    'costo_regla': 'Costo 70/30 (USD)',
+                    'ahorro_pct': 'Ahorro vs 70/30 (%)',
+                })
+                tabla_contratos.index.name = 'Zona / sector'
+                st.dataframe(tabla_contratos.style.format('{:,.1f}'), use_container_width=True)
+                st.caption(
+                    "Firme y flexible minimizan el costo diario esperado sobre la distribución de la "
+                    "demanda proyectada en el período; la regla 70/30 se evalúa sobre el pico. "
+                    f"{contratos.attrs.get('iteraciones', 0)} iteraciones de L-BFGS-B."
+                )
 
 # ===========================================================================
-# TAB 4: PROYECCIÓN POR SECTOR
+# TAB 3: PROYECCIÓN POR ZONA
 # ===========================================================================
 
-with tab4:
-    st.header("Proyección por Sector de Consumo")
-    
-    # Selector de sector
-    sectores_map = {
-        'Residencial': 'Demanda_Residencial_Total_MBTUD_pred',
-        'Industrial': 'Demanda_Industrial_Total_MBTUD_pred',
-        'Comercial': 'Demanda_Comercial_Total_MBTUD_pred',
-        'Generación Térmica': 'Demanda_GeneracionTermica_Total_MBTUD_pred',
-        'Refinería': 'Demanda_Refineria_Total_MBTUD_pred',
-        'Petrolero': 'Demanda_Petrolero_Total_MBTUD_pred',
-        'GNVC (Transporte)': 'Demanda_GNVC_Total_MBTUD_pred',
-        'Compresora': 'Demanda_Compresora_Total_MBTUD_pred'
-    }
-    
-    sector_sel = st.selectbox("Selecciona un sector:", list(sectores_map.keys()))
-    col_name = sectores_map[sector_sel]
-    
-    # KPIs del sector más compactos
-    sector_prom = pred_modelo2_filtrado[col_name].mean()
-    sector_max = pred_modelo2_filtrado[col_name].max()
-    sector_min = pred_modelo2_filtrado[col_name].min()
-    sector_pct = (sector_prom / demanda_total_prom) * 100
-    
-    col1, col2, col3, col4, col5 = st.columns(5)
-    
-    with col1:
-        st.metric("Promedio", f"{sector_prom:,.0f}")
-    
-    with col2:
-        st.metric("Máximo", f"{sector_max:,.0f}")
-    
-    with col3:
-        st.metric("Mínimo", f"{sector_min:,.0f}")
-    
-    with col4:
-        st.metric("Participación", f"{sector_pct:.1f}%")
-    
-    with col5:
-        rango = sector_max - sector_min
-        st.metric("Rango", f"{rango:,.0f}")
-    
-    st.markdown("---")
-    
-    # Gráfico principal
-    st.subheader(f"📈 Proyección: {sector_sel}")
-    
-    fig = go.Figure()
-    
-    df_plot = pred_modelo2_filtrado.iloc[::max(1, len(pred_modelo2_filtrado)//150)]
-    
-    fig.add_trace(go.Scatter(
-        x=df_plot['Fecha'],
-        y=df_plot[col_name],
-        name='Proyección',
-        line=dict(color='#9467bd', width=3),
-        fill='tonexty',
-        mode='lines'
-    ))
-    
-    fig.update_layout(
-        height=450,
-        xaxis_title='Fecha',
-        yaxis_title='MBTUD',
-        hovermode='x unified',
-        showlegend=False
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
-    
-    st.markdown("---")
-    
-    # Análisis específico por sector
-    col1, col2 = st.columns([2, 1])
-    
-    with col1:
-        st.subheader(f"📊 Análisis: {sector_sel}")
+@telemetria.medir_cache('preparar_jerarquia', st.cache_resource(max_entries=1))
+def preparar_jerarquia(generacion):
+    # Rollups de todos los nodos y sumas acumuladas; una vez por versión de datos.
+    # Con la base de datos solo se arma el árbol y las sumas se consultan por ventana.
+    from motor.jerarquia import JerarquiaBD, construir, leer_definicion
+    
+    definicion = leer_definicion()
+    if RUTA_BD:
+        return JerarquiaBD(definicion, [pred_modelo1, pred_modelo2_ancho])
+    necesarias = set(definicion['columna'].dropna())
+    tablas = [
+        filtrar_ventana(tabla, fecha_min, fecha_max, [c for c in tabla.columns if c in necesarias])
+        for tabla in (pred_modelo1, pred_modelo2_ancho)
+    ]
+    return construir(tablas, definicion)
+
+if tab3.open:
+    with tab3:
+        st.header("Proyección por Zona Geográfica")
         
-        # Distribución mensual
-        pred_modelo2_filtrado['Mes'] = pred_modelo2_filtrado['Fecha'].dt.month
-        mensual_sector = pred_modelo2_filtrado.groupby('Mes')[col_name].mean()
+        # KPIs por zona más compactos
+        costa = resumen.loc['Demanda_Costa_Total_MBTUD_pred']
+        interior = resumen.loc['Demanda_Interior_Total_MBTUD_pred']
+        costa_prom = costa['media']
+        interior_prom = interior['media']
+        costa_pct = agregados['Participacion_Costa']
+        interior_pct = agregados['Participacion_Interior']
+        total_zonas = costa_prom + interior_prom
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric(
+                "🌊 Costa",
+                f"{costa_prom:,.0f} MBTUD",
+                f"{costa_pct:.1f}%"
+            )
+        
+        with col2:
+            st.metric(
+                "🏔️ Interior",
+                f"{interior_prom:,.0f} MBTUD",
+                f"{interior_pct:.1f}%"
+            )
+        
+        with col3:
+            diferencia = abs(costa_prom - interior_prom)
+            st.metric(
+                "Diferencia",
+                f"{diferencia:,.0f} MBTUD",
+                f"{(diferencia/total_zonas)*100:.1f}%"
+            )
+        
+        st.markdown("---")
+        
+        # Gráficos comparativos
+        col1, col2 = st.columns(2)
+        
+        df_plot = pred_modelo2_filtrado.iloc[::max(1, len(pred_modelo2_filtrado)//100)]
+        
+        with col1:
+            st.subheader("🌊 Costa Atlántica")
+            
+            fig = go.Figure()
+            
+            fig.add_trace(go.Scatter(
+                x=df_plot['Fecha'],
+                y=df_plot['Demanda_Costa_Total_MBTUD_pred'],
+                name='Proyección',
+                line=dict(color='#ff7f0e', width=2),
+                fill='tonexty'
+            ))
+            
+            fig.update_layout(
+                height=350,
+                xaxis_title='Fecha',
+                yaxis_title='MBTUD',
+                showlegend=False
+            )
+            
+            graficar(fig, use_container_width=True)
+            
+            st.markdown(f"""
+            **Características:**
+            - Participación: {costa_pct:.1f}%
+            - Promedio: {costa_prom:,.0f} MBTUD
+            - Rango: {costa['min']:,.0f} - {costa['max']:,.0f} MBTUD
+            
+            **Sectores principales:**
+            - Industrial (petroquímica, zona franca)
+            - Refinería de Cartagena
+            - Residencial urbano
+            """)
+        
+        with col2:
+            st.subheader("🏔️ Interior")
+            
+            fig = go.Figure()
+            
+            fig.add_trace(go.Scatter(
+                x=df_plot['Fecha'],
+                y=df_plot['Demanda_Interior_Total_MBTUD_pred'],
+                name='Proyección',
+                line=dict(color='#2ca02c', width=2),
+                fill='tonexty'
+            ))
+            
+            fig.update_layout(
+                height=350,
+                xaxis_title='Fecha',
+                yaxis_title='MBTUD',
+                showlegend=False
+            )
+            
+            graficar(fig, use_container_width=True)
+            
+            st.markdown(f"""
+            **Características:**
+            - Participación: {interior_pct:.1f}%
+            - Promedio: {interior_prom:,.0f} MBTUD
+            - Rango: {interior['min']:,.0f} - {interior['max']:,.0f} MBTUD
+            
+            **Sectores principales:**
+            - Residencial (Bogotá, Medellín)
+            - Generación térmica
+            - Industrial manufacturero
+            """)
         
-        meses_abr = ['E', 'F', 'M', 'A', 'M', 'J', 'J', 'A', 'S', 'O', 'N', 'D']
-        mensual_sector.index = [meses_abr[i-1] for i in mensual_sector.index]
+        st.markdown("---")
+        
+        # Comparación directa
+        st.subheader("📊 Comparación Temporal")
+        
+        fig = go.Figure()
         
-        fig = go.Figure(data=[
-            go.Bar(x=mensual_sector.index, y=mensual_sector.values, marker_color='#9467bd')
-        ])
+        fig.add_trace(go.Scatter(
+            x=df_plot['Fecha'],
+            y=df_plot['Demanda_Costa_Total_MBTUD_pred'],
+            name='Costa',
+            line=dict(color='#ff7f0e', width=2)
+        ))
+        
+        fig.add_trace(go.Scatter(
+            x=df_plot['Fecha'],
+            y=df_plot['Demanda_Interior_Total_MBTUD_pred'],
+            name='Interior',
+            line=dict(color='#2ca02c', width=2)
+        ))
         
         fig.update_layout(
-            height=300,
-            xaxis_title='Mes',
-            yaxis_title='MBTUD Promedio',
-            showlegend=False
+            height=400,
+            xaxis_title='Fecha',
+            yaxis_title='MBTUD',
+            hovermode='x unified'
         )
         
-        st.plotly_chart(fig, use_container_width=True)
-    
-    with col2:
-        st.subheader("📋 Estadísticas")
+        graficar(fig, use_container_width=True)
         
-        st.metric("Media", f"{sector_prom:,.0f}")
-        st.metric("Mediana", f"{pred_modelo2_filtrado[col_name].median():,.0f}")
-        st.metric("Desv. Std", f"{pred_modelo2_filtrado[col_name].std():,.0f}")
+        st.markdown("---")
         
-        cv_sector = (pred_modelo2_filtrado[col_name].std() / sector_prom) * 100
-        st.metric("Coef. Var.", f"{cv_sector:.1f}%")
+        # Drill-down por la jerarquía: totales por nodo desde las sumas acumuladas
+        st.subheader("🌳 Exploración Jerárquica")
         
-        st.metric("P95", f"{pred_modelo2_filtrado[col_name].quantile(0.95):,.0f}")
-        st.metric("P5", f"{pred_modelo2_filtrado[col_name].quantile(0.05):,.0f}")
-    
-    st.markdown("---")
-    
-    # Recomendaciones por sector
-    st.subheader("💡 Recomendaciones Operacionales")
-    
-    recomendaciones = {
-        'Residencial': {
-            'caracteristicas': '• Patrón estacional fuerte\n• Picos en meses fríos\n• Alta predictibilidad',
-            'estrategia': '• Contratos estacionales diferenciados\n• Gestión de picos invernales\n• Programas de eficiencia energética'
-        },
-        'Industrial': {
-            'caracteristicas': '• Correlación con actividad económica\n• Sensible a ciclos\n• Mix heterogéneo',
-            'estrategia': '• Contratos indexados a PMI\n• Flexibilidad en volúmenes\n• Segmentar por subsector'
-        },
-        'Comercial': {
-            'caracteristicas': '• Pico diciembre (+35%)\n• Horarios laborales\n• Estacionalidad comercial',
-            'estrategia': '• Provisión fin de año\n• Tarifas incentivadas fuera de pico\n• Contratos trimestrales'
-        },
-        'Generación Térmica': {
-            'caracteristicas': '• Alta volatilidad\n• Complementa hidráulica\n• Picos en El Niño',
-            'estrategia': '• CRÍTICO: Integrar hidrología\n• Monitoreo ENSO\n• Contratos de respaldo flexibles'
-        },
-        'Refinería': {
-            'caracteristicas': '• Volatilidad por paradas\n• Mantenimientos programados\n• Cartagena dominante',
-            'estrategia': '• Coordinación mantenimientos\n• Cláusulas de flexibilidad\n• Inventarios ampliados'
-        },
-        'Petrolero': {
-            'caracteristicas': '• Muy estable\n• Baja volatilidad\n• Operación continua',
-            'estrategia': '• Contratos largo plazo fijos\n• Bajo riesgo\n• Inventarios mínimos'
-        },
-        'GNVC (Transporte)': {
-            'caracteristicas': '• Crecimiento +8% anual\n• Expansión red\n• Urbano principalmente',
-            'estrategia': '• Proyectar crecimiento\n• Expansión infraestructura\n• Incentivos conversión'
-        },
-        'Compresora': {
-            'caracteristicas': '• Alta volatilidad\n• Depende de flujos\n• No independiente',
-            'estrategia': '• NO proyectar independiente\n• Modelar como f(Total)\n• Coordinación transporte'
-        }
-    }
-    
-    if sector_sel in recomendaciones:
-        rec = recomendaciones[sector_sel]
+        jerarquia = preparar_jerarquia(generacion)
+        vista = jerarquia.ventana(fecha_inicio, fecha_fin)
+        
+        col1, col2 = st.columns([1, 2])
+        
+        with col1:
+            raiz = st.selectbox("Jerarquía:", jerarquia.raices())
+            nodo = st.selectbox(
+                "Nodo:",
+                jerarquia.descendientes(raiz),
+                format_func=lambda n: '— ' * int(vista.loc[n, 'profundidad']) + n
+            )
+            
+            fila = vista.loc[nodo]
+            st.metric("Promedio", f"{fila['media']:,.0f} MBTUD")
+            if fila['profundidad'] > 0:
+                st.metric(f"Participación en {fila['padre']}", f"{fila['participacion']:.1f}%")
+            if fila['profundidad'] > 1:
+                st.metric(f"Participación en {raiz}", f"{fila['media'] / vista.loc[raiz, 'media'] * 100:.1f}%")
+            
+            # Roll-up: el nodo y sus ancestros
+            st.caption(" › ".join(f"{n} ({vista.loc[n, 'media']:,.0f})" for n in jerarquia.ruta(nodo)))
+        
+        with col2:
+            hijos = jerarquia.hijos_de(nodo)
+            
+            if hijos:
+                detalle = vista.loc[hijos].sort_values('media', ascending=False)
+                
+                fig = go.Figure(go.Bar(
+                    x=detalle.index,
+                    y=detalle['media'],
+                    text=detalle['participacion'].map('{:.1f}%'.format),
+                    marker_color='#1f77b4'
+                ))
+                
+                fig.update_layout(
+                    height=350,
+                    xaxis_title='',
+                    yaxis_title='MBTUD promedio'
+                )
+            else:
+                serie = jerarquia.serie(nodo, fecha_inicio, fecha_fin)
+                serie = serie.iloc[::max(1, len(serie)//150)]
+                
+                fig = go.Figure(go.Scatter(
+                    x=serie.index,
+                    y=serie.to_numpy(),
+                    mode='lines',
+                    line=dict(color='#1f77b4', width=2)
+                ))
+                
+                fig.update_layout(
+                    height=350,
+                    xaxis_title='Fecha',
+                    yaxis_title='MBTUD'
+                )
+            
+            graficar(fig, use_container_width=True)
+        
+        st.markdown("---")
+        
+        # Estrategia por zona
+        st.subheader("🎯 Estrategia Operacional por Zona")
         
         col1, col2 = st.columns(2)
         
         with col1:
-            st.markdown("**Características del Sector:**")
-            st.info(rec['caracteristicas'])
+            st.markdown("""
+            **Costa Atlántica**
+            
+            📦 **Infraestructura:**
+            - Mayor capacidad de almacenamiento
+            - Flexibilidad en contratos industriales
+            - Acceso a terminales de GNL
+            
+            ⚡ **Gestión:**
+            - Coordinación con grandes consumidores
+            - Contratos interrumpibles
+            - Provisión para paradas de refinería
+            """)
         
         with col2:
-            st.markdown("**Estrategia Recomendada:**")
-            st.success(rec['estrategia'])
+            st.markdown("""
+            **Interior**
+            
+            📦 **Infraestructura:**
+            - Red de distribución residencial densa
+            - Interconexión con hidrogeneración
+            - Gasoductos principales
+            
+            ⚡ **Gestión:**
+            - Estacionalidad predecible
+            - Contratos de largo plazo
+            - Coordinación con generación eléctrica
+            """)
 
 # ===========================================================================
-# TAB 5: PRECIOS INTERNACIONALES
+# TAB 4: PROYECCIÓN POR SECTOR
 # ===========================================================================
 
-with tab5:
-    st.header("Precios Internacionales de Gas Natural")
-    
-    # KPIs comparativos más compactos
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.metric(
-            "Henry Hub",
-            f"${hh_prom:.2f}/MMBtu"
-        )
-    
-    with col2:
-        st.metric(
-            "TTF",
-            f"${ttf_prom:.2f}/MMBtu"
-        )
-    
-    with col3:
-        st.metric(
-            "Spread TTF - HH",
-            f"${spread:.2f}/MMBtu",
-            delta=f"{(spread/hh_prom)*100:.1f}%"
+if tab4.open:
+    with tab4:
+        st.header("Proyección por Sector de Consumo")
+        
+        # Selector de sector
+        sectores_map = {
+            'Residencial': 'Demanda_Residencial_Total_MBTUD_pred',
+            'Industrial': 'Demanda_Industrial_Total_MBTUD_pred',
+            'Comercial': 'Demanda_Comercial_Total_MBTUD_pred',
+            'Generación Térmica': 'Demanda_GeneracionTermica_Total_MBTUD_pred',
+            'Refinería': 'Demanda_Refineria_Total_MBTUD_pred',
+            'Petrolero': 'Demanda_Petrolero_Total_MBTUD_pred',
+            'GNVC (Transporte)': 'Demanda_GNVC_Total_MBTUD_pred',
+            'Compresora': 'Demanda_Compresora_Total_MBTUD_pred'
+        }
+        
+        # Modo comparación: todos los sectores en una sola figura; mostrar u ocultar
+        # sectores se resuelve en el navegador (leyenda y botones) sin rerun
+        if st.toggle("🔀 Comparar sectores"):
+            col1, col2 = st.columns([3, 1])
+            
+            with col1:
+                sectores_comp = st.multiselect(
+                    "Sectores:",
+                    list(sectores_map.keys()),
+                    default=list(sectores_map.keys())
+                )
+            
+            with col2:
+                vista = st.radio("Vista:", ["Trazas", "Paneles"], horizontal=True)
+            
+            if sectores_comp:
+                df_plot = pred_modelo2_filtrado.iloc[::max(1, len(pred_modelo2_filtrado)//150)]
+                colores = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728',
+                           '#9467bd', '#8c564b', '#e377c2', '#17becf']
+                
+                if vista == "Trazas":
+                    fig = go.Figure()
+                    
+                    for i, sector in enumerate(sectores_comp):
+                        fig.add_trace(go.Scatter(
+                            x=df_plot['Fecha'],
+                            y=df_plot[sectores_map[sector]],
+                            name=sector,
+                            line=dict(color=colores[i % len(colores)], width=2),
+                            mode='lines'
+                        ))
+                    
+                    # Botones: todos o un sector a la vez (solo cambian visibilidad)
+                    botones = [dict(label="Todos", method="restyle",
+                                    args=[{"visible": [True] * len(sectores_comp)}])]
+                    for i, sector in enumerate(sectores_comp):
+                        botones.append(dict(
+                            label=sector,
+                            method="restyle",
+                            args=[{"visible": [j == i for j in range(len(sectores_comp))]}]
+                        ))
+                    
+                    fig.update_layout(
+                        height=500,
+                        xaxis_title='Fecha',
+                        yaxis_title='MBTUD',
+                        hovermode='x unified',
+                        updatemenus=[dict(type="dropdown", buttons=botones, x=0, xanchor="left",
+                                          y=1.15, yanchor="top")]
+                    )
+                else:
+                    from plotly.subplots import make_subplots
+                    
+                    filas = -(-len(sectores_comp) // 2)
+                    fig = make_subplots(rows=filas, cols=2, shared_xaxes=True,
+                                        subplot_titles=sectores_comp, vertical_spacing=0.08)
+                    
+                    for i, sector in enumerate(sectores_comp):
+                        fig.add_trace(go.Scatter(
+                            x=df_plot['Fecha'],
+                            y=df_plot[sectores_map[sector]],
+                            name=sector,
+                            line=dict(color=colores[i % len(colores)], width=2),
+                            mode='lines'
+                        ), row=i // 2 + 1, col=i % 2 + 1)
+                    
+                    fig.update_layout(height=220 * filas, showlegend=False)
+                
+                graficar(fig, use_container_width=True)
+                
+                # Tabla comparativa desde la tabla resumen
+                columnas_comp = [sectores_map[s] for s in sectores_comp]
+                comparacion = resumen.loc[columnas_comp, ['media', 'min', 'max', 'cv']].set_axis(sectores_comp)
+                comparacion['participacion'] = [agregados[nombre_participacion(c)] for c in columnas_comp]
+                
+                st.dataframe(
+                    comparacion.style.format({
+                        'media': '{:,.0f}',
+                        'min': '{:,.0f}',
+                        'max': '{:,.0f}',
+                        'cv': '{:.1f}%',
+                        'participacion': '{:.1f}%'
+                    }),
+                    use_container_width=True
+                )
+            
+            st.markdown("---")
+        
+        sector_sel = st.selectbox("Selecciona un sector:", list(sectores_map.keys()))
+        col_name = sectores_map[sector_sel]
+        
+        # KPIs del sector más compactos
+        sector = resumen.loc[col_name]
+        sector_prom = sector['media']
+        sector_max = sector['max']
+        sector_min = sector['min']
+        sector_pct = agregados[nombre_participacion(col_name)]
+        
+        col1, col2, col3, col4, col5 = st.columns(5)
+        
+        with col1:
+            st.metric("Promedio", f"{sector_prom:,.0f}")
+        
+        with col2:
+            st.metric("Máximo", f"{sector_max:,.0f}")
+        
+        with col3:
+            st.metric("Mínimo", f"{sector_min:,.0f}")
+        
+        with col4:
+            st.metric("Participación", f"{sector_pct:.1f}%")
+        
+        with col5:
+            rango = sector_max - sector_min
+            st.metric("Rango", f"{rango:,.0f}")
+        
+        st.markdown("---")
+        
+        # Gráfico principal
+        st.subheader(f"📈 Proyección: {sector_sel}")
+        
+        fig = go.Figure()
+        
+        df_plot = pred_modelo2_filtrado.iloc[::max(1, len(pred_modelo2_filtrado)//150)]
+        
+        fig.add_trace(go.Scatter(
+            x=df_plot['Fecha'],
+            y=df_plot[col_name],
+            name='Proyección',
+            line=dict(color='#9467bd', width=3),
+            fill='tonexty',
+            mode='lines'
+        ))
+        
+        fig.update_layout(
+            height=450,
+            xaxis_title='Fecha',
+            yaxis_title='MBTUD',
+            hovermode='x unified',
+            showlegend=False
         )
-    
-    st.markdown("---")
-    
-    # Comparación precios
-    st.subheader("📊 Comparación de Mercados")
-    
-    fig = go.Figure()
-    
-    df_plot = pred_modelo1_filtrado.iloc[::max(1, len(pred_modelo1_filtrado)//100)]
-    
-    fig.add_trace(go.Scatter(
-        x=df_plot['Fecha'],
-        y=df_plot['Henry_Hub_pred'],
-        name='Henry Hub (EE.UU.)',
-        line=dict(color='#1f77b4', width=2)
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=df_plot['Fecha'],
-        y=df_plot['TTF_pred'],
-        name='TTF (Europa)',
-        line=dict(color='#ff7f0e', width=2)
-    ))
-    
-    fig.update_layout(
-        height=450,
-        xaxis_title='Fecha',
-        yaxis_title='USD/MMBtu',
-        hovermode='x unified'
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
-    
-    st.markdown("---")
-    
-    # Detalle por mercado
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("🇺🇸 Henry Hub (EE.UU.)")
-        
-        col_a, col_b, col_c = st.columns(3)
-        with col_a:
-            st.metric("Promedio", f"${hh_prom:.2f}")
-        with col_b:
-            st.metric("Máximo", f"${hh_max:.2f}")
-        with col_c:
-            st.metric("Mínimo", f"${pred_modelo1_filtrado['Henry_Hub_pred'].min():.2f}")
-        
-        st.markdown("""
-        **Características:**
-        - Mercado líquido y maduro
-        - Producción shale abundante
-        - Estacionalidad marcada
-        
-        **Rango típico:** $2-4/MMBtu  
-        **Drivers:** Almacenamiento, clima, exportaciones GNL
-        
-        **Aplicaciones para Colombia:**
-        - Referencia contratos importación GNL
-        - Indexación con spread
-        - Hedge en NYMEX futures
-        """)
-    
-    with col2:
-        st.subheader("🇪🇺 TTF (Europa)")
-        
-        col_a, col_b, col_c = st.columns(3)
-        with col_a:
-            st.metric("Promedio", f"${ttf_prom:.2f}")
-        with col_b:
-            st.metric("Máximo", f"${ttf_max:.2f}")
-        with col_c:
-            st.metric("Mínimo", f"${pred_modelo1_filtrado['TTF_pred'].min():.2f}")
-        
-        st.markdown("""
-        **Características:**
-        - Mayor volatilidad
-        - Suministro ruso reducido
-        - Competencia GNL con Asia
-        
-        **Rango típico:** $8-15/MMBtu  
-        **Drivers:** Geopolítica, almacenamiento, clima europeo
-        
-        **Aplicaciones para Colombia:**
-        - Competencia GNL global
-        - Arbitraje internacional
-        - Diversificación portafolio
-        """)
-    
-    st.markdown("---")
-    
-    # Análisis de spread
-    st.subheader("💰 Análisis de Spread y Oportunidades")
-    
-    spread_serie = pred_modelo1_filtrado['TTF_pred'] - pred_modelo1_filtrado['Henry_Hub_pred']
-    spread_prom = spread_serie.mean()
-    spread_max = spread_serie.max()
-    spread_min = spread_serie.min()
-    
-    col1, col2 = st.columns([2, 1])
-    
-    with col1:
+        
+        graficar(fig, use_container_width=True)
+        
+        st.markdown("---")
+        
+        # Análisis específico por sector
+        col1, col2 = st.columns([2, 1])
+        
+        with col1:
+            st.subheader(f"📊 Análisis: {sector_sel}")
+            
+            # Distribución mensual
+            mensual_sector = agregado_mensual(pred_modelo2_ancho, fecha_inicio, fecha_fin, col_name)['mean']
+            
+            meses = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+            mensual_sector.index = [meses[i-1] for i in mensual_sector.index]
+            perfil_sector = estacionalidad['perfil_mensual'][col_name]
+            
+            fig = go.Figure(data=[
+                go.Bar(x=mensual_sector.index, y=mensual_sector.values, marker_color='#9467bd', name='Promedio'),
+                go.Scatter(
+                    x=mensual_sector.index,
+                    y=sector_prom + perfil_sector[mensual_sector.index],
+                    name='Perfil estacional',
+                    mode='lines+markers',
+                    line=dict(color='#ff7f0e', width=2, dash='dot')
+                )
+            ])
+            
+            fig.update_layout(
+                height=300,
+                xaxis_title='Mes',
+                yaxis_title='MBTUD Promedio',
+                showlegend=False
+            )
+            
+            graficar(fig, use_container_width=True)
+        
+        with col2:
+            st.subheader("📋 Estadísticas")
+            
+            st.metric("Media", f"{sector_prom:,.0f}")
+            st.metric("Mediana", f"{sector['mediana']:,.0f}")
+            st.metric("Desv. Std", f"{sector['desv']:,.0f}")
+            st.metric("Coef. Var.", f"{sector['cv']:.1f}%")
+            st.metric("P95", f"{sector['p95']:,.0f}")
+            st.metric("P5", f"{sector['p5']:,.0f}")
+        
+        st.markdown("---")
+        
+        # Recomendaciones por sector
+        st.subheader("💡 Recomendaciones Operacionales")
+        
+        recomendaciones = {
+            'Residencial': {
+                'caracteristicas': '• Patrón estacional fuerte\n• Picos en meses fríos\n• Alta predictibilidad',
+                'estrategia': '• Contratos estacionales diferenciados\n• Gestión de picos invernales\n• Programas de eficiencia energética'
+            },
+            'Industrial': {
+                'caracteristicas': '• Correlación con actividad económica\n• Sensible a ciclos\n• Mix heterogéneo',
+                'estrategia': '• Contratos indexados a PMI\n• Flexibilidad en volúmenes\n• Segmentar por subsector'
+            },
+            'Comercial': {
+                'caracteristicas': '• Pico diciembre (+35%)\n• Horarios laborales\n• Estacionalidad comercial',
+                'estrategia': '• Provisión fin de año\n• Tarifas incentivadas fuera de pico\n• Contratos trimestrales'
+            },
+            'Generación Térmica': {
+                'caracteristicas': '• Alta volatilidad\n• Complementa hidráulica\n• Picos en El Niño',
+                'estrategia': '• CRÍTICO: Integrar hidrología\n• Monitoreo ENSO\n• Contratos de respaldo flexibles'
+            },
+            'Refinería': {
+                'caracteristicas': '• Volatilidad por paradas\n• Mantenimientos programados\n• Cartagena dominante',
+                'estrategia': '• Coordinación mantenimientos\n• Cláusulas de flexibilidad\n• Inventarios ampliados'
+            },
+            'Petrolero': {
+                'caracteristicas': '• Muy estable\n• Baja volatilidad\n• Operación continua',
+                'estrategia': '• Contratos largo plazo fijos\n• Bajo riesgo\n• Inventarios mínimos'
+            },
+            'GNVC (Transporte)': {
+                'caracteristicas': '• Crecimiento +8% anual\n• Expansión red\n• Urbano principalmente',
+                'estrategia': '• Proyectar crecimiento\n• Expansión infraestructura\n• Incentivos conversión'
+            },
+            'Compresora': {
+                'caracteristicas': '• Alta volatilidad\n• Depende de flujos\n• No independiente',
+                'estrategia': '• NO proyectar independiente\n• Modelar como f(Total)\n• Coordinación transporte'
+            }
+        }
+        
+        if sector_sel in recomendaciones:
+            rec = recomendaciones[sector_sel]
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown("**Características del Sector:**")
+                st.info(rec['caracteristicas'])
+            
+            with col2:
+                st.markdown("**Estrategia Recomendada:**")
+                st.success(rec['estrategia'])
+
+# ===========================================================================
+# TAB 5: PRECIOS INTERNACIONALES
+# ===========================================================================
+
+if tab5.open:
+    with tab5:
+        st.header("Precios Internacionales de Gas Natural")
+        
+        # KPIs comparativos más compactos
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric(
+                "Henry Hub",
+                f"${hh_prom:.2f}/MMBtu",
+                delta=delta_comparacion('Henry Hub promedio'),
+                delta_color="inverse"
+            )
+        
+        with col2:
+            st.metric(
+                "TTF",
+                f"${ttf_prom:.2f}/MMBtu",
+                delta=delta_comparacion('TTF promedio'),
+                delta_color="inverse"
+            )
+        
+        with col3:
+            st.metric(
+                "Spread TTF - HH",
+                f"${spread:.2f}/MMBtu",
+                delta=delta_comparacion('Spread_TTF_HH') or f"{(spread/hh_prom)*100:.1f}%"
+            )
+        
+        st.markdown("---")
+        
+        # Comparación precios
+        st.subheader("📊 Comparación de Mercados")
+        
         fig = go.Figure()
         
         df_plot = pred_modelo1_filtrado.iloc[::max(1, len(pred_modelo1_filtrado)//100)]
-        spread_plot = df_plot['TTF_pred'] - df_plot['Henry_Hub_pred']
         
         fig.add_trace(go.Scatter(
             x=df_plot['Fecha'],
-            y=spread_plot,
-            name='Spread TTF - HH',
-            line=dict(color='#2ca02c', width=2),
-            fill='tozeroy'
+            y=df_plot['Henry_Hub_pred'],
+            name='Henry Hub (EE.UU.)',
+            line=dict(color='#1f77b4', width=2)
         ))
         
-        fig.add_hline(y=spread_prom, line_dash="dash", line_color="red", 
-                      annotation_text=f"Promedio: ${spread_prom:.2f}")
+        fig.add_trace(go.Scatter(
+            x=df_plot['Fecha'],
+            y=df_plot['TTF_pred'],
+            name='TTF (Europa)',
+            line=dict(color='#ff7f0e', width=2)
+        ))
         
         fig.update_layout(
-            height=350,
+            height=450,
             xaxis_title='Fecha',
-            yaxis_title='Spread (USD/MMBtu)',
-            showlegend=False
+            yaxis_title='USD/MMBtu',
+            hovermode='x unified'
         )
         
-        st.plotly_chart(fig, use_container_width=True)
-    
-    with col2:
-        st.markdown("**Estadísticas Spread**")
-        st.metric("Promedio", f"${spread_prom:.2f}")
-        st.metric("Máximo", f"${spread_max:.2f}")
-        st.metric("Mínimo", f"${spread_min:.2f}")
+        graficar(fig, use_container_width=True)
         
         st.markdown("---")
         
-        if spread_prom > 5:
-            st.success("""
-            **🔥 Oportunidad**
+        # Detalle por mercado
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("🇺🇸 Henry Hub (EE.UU.)")
             
-            Spread elevado favorece:
-            - Importación desde EE.UU.
-            - Contratos indexados HH
-            - Arbitraje GNL
-            """)
-        elif spread_prom > 3:
-            st.info("""
-            **✓ Normal**
+            col_a, col_b, col_c = st.columns(3)
+            with col_a:
+                st.metric("Promedio", f"${hh_prom:.2f}")
+            with col_b:
+                st.metric("Máximo", f"${hh_max:.2f}")
+            with col_c:
+                st.metric("Mínimo", f"${resumen.loc['Henry_Hub_pred', 'min']:.2f}")
+            
+            st.markdown("""
+            **Características:**
+            - Mercado líquido y maduro
+            - Producción shale abundante
+            - Estacionalidad marcada
             
-            Spread en rango normal.
-            Mantener estrategia.
+            **Rango típico:** $2-4/MMBtu  
+            **Drivers:** Almacenamiento, clima, exportaciones GNL
+            
+            **Aplicaciones para Colombia:**
+            - Referencia contratos importación GNL
+            - Indexación con spread
+            - Hedge en NYMEX futures
             """)
-        else:
-            st.warning("""
-            **⚠️ Spread Bajo**
+        
+        with col2:
+            st.subheader("🇪🇺 TTF (Europa)")
+            
+            col_a, col_b, col_c = st.columns(3)
+            with col_a:
+                st.metric("Promedio", f"${ttf_prom:.2f}")
+            with col_b:
+                st.metric("Máximo", f"${ttf_max:.2f}")
+            with col_c:
+                st.metric("Mínimo", f"${resumen.loc['TTF_pred', 'min']:.2f}")
+            
+            st.markdown("""
+            **Características:**
+            - Mayor volatilidad
+            - Suministro ruso reducido
+            - Competencia GNL con Asia
+            
+            **Rango típico:** $8-15/MMBtu  
+            **Drivers:** Geopolítica, almacenamiento, clima europeo
             
-            Evaluar competitividad
-            contratos actuales.
+            **Aplicaciones para Colombia:**
+            - Competencia GNL global
+            - Arbitraje internacional
+            - Diversificación portafolio
             """)
+        
+        st.markdown("---")
+        
+        # Análisis de spread
+        st.subheader("💰 Análisis de Spread y Oportunidades")
+        
+        spread_prom = resumen.loc['Spread_TTF_HH', 'media']
+        spread_max = resumen.loc['Spread_TTF_HH', 'max']
+        spread_min = resumen.loc['Spread_TTF_HH', 'min']
+        
+        col1, col2 = st.columns([2, 1])
+        
+        with col1:
+            fig = go.Figure()
+            
+            df_plot = pred_modelo1_filtrado.iloc[::max(1, len(pred_modelo1_filtrado)//100)]
+            spread_plot = df_plot['Spread_TTF_HH']
+            
+            fig.add_trace(go.Scatter(
+                x=df_plot['Fecha'],
+                y=spread_plot,
+                name='Spread TTF - HH',
+                line=dict(color='#2ca02c', width=2),
+                fill='tozeroy'
+            ))
+            
+            fig.add_hline(y=spread_prom, line_dash="dash", line_color="red", 
+                          annotation_text=f"Promedio: ${spread_prom:.2f}")
+            
+            fig.update_layout(
+                height=350,
+                xaxis_title='Fecha',
+                yaxis_title='Spread (USD/MMBtu)',
+                showlegend=False
+            )
+            
+            graficar(fig, use_container_width=True)
+        
+        with col2:
+            st.markdown("**Estadísticas Spread**")
+            st.metric("Promedio", f"${spread_prom:.2f}")
+            st.metric("Máximo", f"${spread_max:.2f}")
+            st.metric("Mínimo", f"${spread_min:.2f}")
+            
+            st.markdown("---")
+            
+            if spread_prom > UMBRAL_SPREAD:
+                st.success("""
+                **🔥 Oportunidad**
+                
+                Spread elevado favorece:
+                - Importación desde EE.UU.
+                - Contratos indexados HH
+                - Arbitraje GNL
+                """)
+            elif spread_prom > UMBRAL_SPREAD_NORMAL:
+                st.info("""
+                **✓ Normal**
+                
+                Spread en rango normal.
+                Mantener estrategia.
+                """)
+            else:
+                st.warning("""
+                **⚠️ Spread Bajo**
+                
+                Evaluar competitividad
+                contratos actuales.
+                """)
 
 # ===========================================================================
 # TAB 6: DESEMPEÑO DEL MODELO
 # ===========================================================================
 
-with tab6:
-    st.header("Desempeño del Modelo XGBoost")
-    
-    st.info("""
-    Esta sección presenta métricas de precisión del modelo. Las proyecciones mostradas 
-    en los demás tabs se basan en el desempeño aquí documentado.
-    """)
-    
-    # Comparación de modelos
-    st.subheader("📊 Comparación de Modelos - Precios")
-    
-    # Tabla comparativa precios
-    comp_precios = []
-    
-    for var in ['Demanda', 'Henry Hub', 'TTF']:
-        var_clean = var.strip()
-        if var_clean in metricas_agregado['Variable'].values:
-            row = metricas_agregado[metricas_agregado['Variable'] == var_clean].iloc[0]
-            comp_precios.append({
-                'Variable': var,
-                'MAPE (%)': row['MAPE_Test'],
-                'R²': row['R2_Test'],
-                'MAE': row['MAE_Test'],
-                'RMSE': row['RMSE_Test']
-            })
+@telemetria.medir_cache('registrar_metricas', st.cache_resource(max_entries=1))
+def registrar_metricas(generacion):
+    # Las métricas de data/ quedan como una corrida del almacén (una vez por contenido)
+    from motor import metricas
     
-    if comp_precios:
-        df_comp = pd.DataFrame(comp_precios)
+    return metricas.registrar_actuales()
+
+if tab6.open:
+    with tab6:
+        st.header("Desempeño del Modelo XGBoost")
+        
+        st.info("""
+        Esta sección presenta métricas de precisión del modelo. Las proyecciones mostradas 
+        en los demás tabs se basan en el desempeño aquí documentado.
+        """)
+        
+        # Leaderboard desde el almacén de métricas: filtros, orden y paginación en SQL
+        st.subheader("📊 Leaderboard de Métricas")
+        
+        from motor import metricas
+        
+        registrar_metricas(generacion)
+        disponibles = metricas.opciones()
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            corridas_sel = st.multiselect(
+                "Corrida:",
+                list(disponibles['corrida']),
+                default=list(disponibles['corrida'])[:1],
+                format_func=disponibles['corrida'].get
+            )
+        
+        with col2:
+            modelos_sel = st.multiselect("Modelo:", disponibles['modelo'])
+        
+        with col3:
+            variables_sel = st.multiselect(
+                "Variable:",
+                disponibles['variable'],
+                format_func=lambda v: v.replace('Demanda_', '').replace('_Total_MBTUD', '').replace('_', ' ')
+            )
+        
+        with col4:
+            particiones_sel = st.multiselect("Partición:", disponibles['particion'])
+        
+        col1, col2, col3 = st.columns([2, 1, 1])
+        
+        with col1:
+            ordenar_por = st.selectbox(
+                "Ordenar por:",
+                disponibles['metrica'],
+                index=disponibles['metrica'].index('MAPE') if 'MAPE' in disponibles['metrica'] else 0
+            )
+        
+        with col2:
+            ascendente = st.toggle("Ascendente", value=ordenar_por != 'R2')
+        
+        filtros = {
+            'corrida': corridas_sel,
+            'modelo': modelos_sel,
+            'variable': variables_sel,
+            'particion': particiones_sel,
+        }
+        total = metricas.contar(filtros=filtros)
+        paginas = max(1, -(-total // metricas.FILAS_POR_PAGINA))
+        
+        with col3:
+            pagina = st.number_input("Página:", min_value=1, max_value=paginas, value=1)
+        
+        df_comp = metricas.consultar(
+            filtros=filtros, ordenar_por=ordenar_por, ascendente=ascendente, pagina=pagina - 1
+        )
         
         # Colorear según MAPE sin usar matplotlib
         def color_mape(val):
@@ -1056,117 +1854,262 @@ with tab6:
             else:
                 return 'background-color: #f5c6cb'
         
-        st.dataframe(
-            df_comp.style.format({
+        if df_comp.empty:
+            st.info("No hay métricas para los filtros seleccionados.")
+        else:
+            df_comp = df_comp.drop(columns='corrida').rename(columns={
+                'nombre': 'Corrida',
+                'modelo': 'Modelo',
+                'variable': 'Variable',
+                'particion': 'Partición',
+                'MAPE': 'MAPE (%)',
+                'R2': 'R²'
+            })
+            df_comp['Variable'] = df_comp['Variable'].str.replace('Demanda_', '').str.replace('_Total_MBTUD', '').str.replace('_', ' ')
+            
+            estilo = df_comp.style.format({
                 'MAPE (%)': '{:.2f}',
                 'R²': '{:.3f}',
-                'MAE': '{:.2f}',
-                'RMSE': '{:.2f}'
-            }).applymap(color_mape, subset=['MAPE (%)']),
+                'MAE': '{:,.2f}',
+                'RMSE': '{:,.2f}'
+            }, na_rep='-')
+            if 'MAPE (%)' in df_comp.columns:
+                estilo = estilo.map(color_mape, subset=['MAPE (%)'])
+            
+            st.dataframe(estilo, use_container_width=True, hide_index=True)
+            
+            inicio_pagina = (pagina - 1) * metricas.FILAS_POR_PAGINA
+            st.caption(f"Filas {inicio_pagina + 1}-{inicio_pagina + len(df_comp)} de {total}")
+        
+        st.markdown("---")
+        
+        # Métricas por sector
+        st.subheader("📊 Desempeño por Sector")
+        
+        df_sectores = metricas_desagregado.copy()
+        df_sectores['Variable'] = df_sectores['Variable'].str.replace('Demanda_', '').str.replace('_Total_MBTUD', '').str.replace('_', ' ')
+        df_sectores = df_sectores.sort_values('MAPE_Test')
+        
+        # Clasificación
+        def clasificar(mape):
+            if mape < 5:
+                return "🟢 Excelente"
+            elif mape < 10:
+                return "🟡 Bueno"
+            elif mape < 20:
+                return "🟠 Aceptable"
+            else:
+                return "🔴 Requiere mejora"
+        
+        df_sectores['Clasificación'] = df_sectores['MAPE_Test'].apply(clasificar)
+        
+        st.dataframe(
+            df_sectores[['Variable', 'MAPE_Test', 'R2_Test', 'Clasificación']].style.format({
+                'MAPE_Test': '{:.2f}%',
+                'R2_Test': '{:.3f}'
+            }),
             use_container_width=True,
             hide_index=True
         )
-    
-    st.markdown("---")
-    
-    # Métricas por sector
-    st.subheader("📊 Desempeño por Sector")
-    
-    df_sectores = metricas_desagregado.copy()
-    df_sectores['Variable'] = df_sectores['Variable'].str.replace('Demanda_', '').str.replace('_Total_MBTUD', '').str.replace('_', ' ')
-    df_sectores = df_sectores.sort_values('MAPE_Test')
-    
-    # Clasificación
-    def clasificar(mape):
-        if mape < 5:
-            return "🟢 Excelente"
-        elif mape < 10:
-            return "🟡 Bueno"
-        elif mape < 20:
-            return "🟠 Aceptable"
+        
+        st.markdown("---")
+        
+        # Gráfico de MAPE
+        st.subheader("📈 MAPE por Variable")
+        
+        import plotly.express as px
+        
+        fig = px.bar(
+            df_sectores,
+            x='Variable',
+            y='MAPE_Test',
+            color='MAPE_Test',
+            color_continuous_scale='RdYlGn_r',
+            labels={'MAPE_Test': 'MAPE (%)'}
+        )
+        
+        fig.update_layout(
+            height=400,
+            xaxis_tickangle=-45,
+            showlegend=False
+        )
+        
+        graficar(fig, use_container_width=True)
+        
+        st.markdown("---")
+        
+        # Interpretación
+        st.subheader("💡 Interpretación de Métricas")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("""
+            **MAPE (Mean Absolute Percentage Error):**
+            - Mide el error promedio en porcentaje
+            - Valores menores son mejores
+            - <5%: Excelente predicción
+            - 5-10%: Buena predicción
+            - 10-20%: Aceptable
+            - >20%: Requiere mejoras
+            
+            **R² (Coeficiente de Determinación):**
+            - Mide qué % de varianza captura el modelo
+            - Rango: -∞ a 1
+            - >0.7: Excelente
+            - 0.4-0.7: Bueno
+            - 0-0.4: Moderado
+            - <0: Modelo peor que promedio simple
+            """)
+        
+        with col2:
+            st.markdown("""
+            **Hallazgos Clave:**
+            
+            ✅ **Fortalezas:**
+            - Residencial: 3.07% MAPE (excelente)
+            - TTF: 6.67% MAPE (mejor precio)
+            - 6 de 11 sectores con MAPE <10%
+            
+            ⚠️ **Áreas de Mejora:**
+            - Generación Térmica: 33.55% MAPE
+              → Requiere variables hidrológicas
+            - Compresora: 53.23% MAPE
+              → Mejor modelar como f(Total)
+            
+            📊 **Conclusión:**
+            El modelo XGBoost proporciona proyecciones 
+            confiables para planificación operacional y 
+            estratégica, con alta precisión en sectores 
+            clave y precios internacionales.
+            """)
+
+# ===========================================================================
+# TAB 7: DIAGNÓSTICO DE RESIDUOS
+# ===========================================================================
+
+@telemetria.medir_cache('diagnostico_ventana', st.cache_data(max_entries=64))
+def diagnostico_ventana(generacion, base, fecha_inicio, fecha_fin, nlags):
+    # Cacheado por (variable, ventana): la ACF por FFT solo se recalcula al cambiarlas
+    from motor.diagnostico import diagnostico
+    
+    tabla = pred_modelo1 if f'{base}_real' in pred_modelo1.columns else pred_modelo2_ancho
+    ventana = filtrar_ventana(tabla, fecha_inicio, fecha_fin, [f'{base}_pred', f'{base}_real'])
+    return diagnostico(ventana, base, nlags)
+
+if tab7.open:
+    with tab7:
+        st.header("Diagnóstico de Residuos (Real - Proyección)")
+        
+        from motor.diagnostico import variables_con_residuo
+        
+        bases = variables_con_residuo(pred_modelo1, pred_modelo2_ancho)
+        
+        col1, col2 = st.columns([3, 1])
+        
+        with col1:
+            base_sel = st.selectbox(
+                "Variable:",
+                bases,
+                format_func=lambda b: b.replace('_', ' ')
+            )
+        
+        with col2:
+            nlags = st.number_input("Rezagos ACF/PACF:", min_value=5, max_value=180, value=30)
+        
+        diag = diagnostico_ventana(generacion, base_sel, fecha_inicio, fecha_fin, nlags)
+        residuo = diag['residuo']
+        
+        if len(residuo) < 3:
+            st.warning("No hay suficientes observaciones reales en el período seleccionado.")
         else:
-            return "🔴 Requiere mejora"
-    
-    df_sectores['Clasificación'] = df_sectores['MAPE_Test'].apply(clasificar)
-    
-    st.dataframe(
-        df_sectores[['Variable', 'MAPE_Test', 'R2_Test', 'Clasificación']].style.format({
-            'MAPE_Test': '{:.2f}%',
-            'R2_Test': '{:.3f}'
-        }),
-        use_container_width=True,
-        hide_index=True
-    )
-    
-    st.markdown("---")
-    
-    # Gráfico de MAPE
-    st.subheader("📈 MAPE por Variable")
-    
-    fig = px.bar(
-        df_sectores,
-        x='Variable',
-        y='MAPE_Test',
-        color='MAPE_Test',
-        color_continuous_scale='RdYlGn_r',
-        labels={'MAPE_Test': 'MAPE (%)'}
-    )
-    
-    fig.update_layout(
-        height=400,
-        xaxis_tickangle=-45,
-        showlegend=False
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
-    
-    st.markdown("---")
-    
-    # Interpretación
-    st.subheader("💡 Interpretación de Métricas")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("""
-        **MAPE (Mean Absolute Percentage Error):**
-        - Mide el error promedio en porcentaje
-        - Valores menores son mejores
-        - <5%: Excelente predicción
-        - 5-10%: Buena predicción
-        - 10-20%: Aceptable
-        - >20%: Requiere mejoras
-        
-        **R² (Coeficiente de Determinación):**
-        - Mide qué % de varianza captura el modelo
-        - Rango: -∞ a 1
-        - >0.7: Excelente
-        - 0.4-0.7: Bueno
-        - 0-0.4: Moderado
-        - <0: Modelo peor que promedio simple
-        """)
-    
-    with col2:
-        st.markdown("""
-        **Hallazgos Clave:**
-        
-        ✅ **Fortalezas:**
-        - Residencial: 3.07% MAPE (excelente)
-        - TTF: 6.67% MAPE (mejor precio)
-        - 6 de 11 sectores con MAPE <10%
-        
-        ⚠️ **Áreas de Mejora:**
-        - Generación Térmica: 33.55% MAPE
-          → Requiere variables hidrológicas
-        - Compresora: 53.23% MAPE
-          → Mejor modelar como f(Total)
-        
-        📊 **Conclusión:**
-        El modelo XGBoost proporciona proyecciones 
-        confiables para planificación operacional y 
-        estratégica, con alta precisión en sectores 
-        clave y precios internacionales.
-        """)
+            # KPIs de residuos
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                st.metric("Sesgo (media)", f"{residuo.mean():,.2f}")
+            
+            with col2:
+                st.metric("MAE", f"{abs(residuo).mean():,.2f}")
+            
+            with col3:
+                st.metric("RMSE", f"{(residuo ** 2).mean() ** 0.5:,.2f}")
+            
+            with col4:
+                st.metric("Observaciones", f"{len(residuo)}")
+            
+            st.markdown("---")
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.subheader("📊 Distribución de Residuos")
+                
+                fig = go.Figure(data=[go.Histogram(x=residuo, nbinsx=40, marker_color='#1f77b4')])
+                fig.add_vline(x=0, line_dash="dash", line_color="red")
+                
+                fig.update_layout(
+                    height=350,
+                    xaxis_title='Residuo',
+                    yaxis_title='Frecuencia',
+                    showlegend=False
+                )
+                
+                graficar(fig, use_container_width=True)
+            
+            with col2:
+                st.subheader("🎯 Residuo vs Proyección")
+                
+                fig = go.Figure(data=[go.Scattergl(
+                    x=diag['pred'],
+                    y=residuo,
+                    mode='markers',
+                    marker=dict(color='#ff7f0e', size=5, opacity=0.6)
+                )])
+                fig.add_hline(y=0, line_dash="dash", line_color="red")
+                
+                fig.update_layout(
+                    height=350,
+                    xaxis_title='Proyección',
+                    yaxis_title='Residuo',
+                    showlegend=False
+                )
+                
+                graficar(fig, use_container_width=True)
+            
+            st.markdown("---")
+            
+            col1, col2 = st.columns(2)
+            
+            for col, titulo, valores in [
+                (col1, "🔁 Autocorrelación (ACF)", diag['acf']),
+                (col2, "🔂 Autocorrelación Parcial (PACF)", diag['pacf'])
+            ]:
+                with col:
+                    st.subheader(titulo)
+                    
+                    fig = go.Figure(data=[go.Bar(
+                        x=list(range(1, len(valores))),
+                        y=valores[1:],
+                        marker_color='#2ca02c'
+                    )])
+                    fig.add_hline(y=diag['banda'], line_dash="dash", line_color="grey")
+                    fig.add_hline(y=-diag['banda'], line_dash="dash", line_color="grey")
+                    
+                    fig.update_layout(
+                        height=300,
+                        xaxis_title='Rezago (días hábiles)',
+                        yaxis_title='Correlación',
+                        showlegend=False
+                    )
+                    
+                    graficar(fig, use_container_width=True)
+            
+            fuera = (abs(diag['acf'][1:]) > diag['banda']).sum()
+            st.caption(
+                f"{fuera} de {len(diag['acf']) - 1} rezagos fuera de la banda del 95% (±{diag['banda']:.3f}). "
+                "Autocorrelación significativa indica estructura que el modelo no captura."
+            )
 
 # ===========================================================================
 # FOOTER
@@ -1179,3 +2122,11 @@ st.markdown("""
     <p>Modelo XGBoost | 13 Variables | Horizonte {dias} días</p>
 </div>
 """.format(dias=dias_proyeccion), unsafe_allow_html=True)
+
+# Latencia del rerun completo para la telemetría
+contexto = get_script_run_ctx()
+telemetria.registrar_rerun(
+    contexto.session_id if contexto else '',
+    st.session_state.get('tab_activo'),
+    time.perf_counter() - inicio_rerun
+)
@@ -0,0 +1,5 @@
+"""
+PrediGas - Motores de cálculo
+Funciones puras (pandas/numpy) usadas por el dashboard y por las herramientas
+de línea de comandos. No dependen de Streamlit.
+"""
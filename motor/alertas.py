@@ -0,0 +1,108 @@
+"""
+PrediGas - Línea de tiempo de alertas
+Evalúa las reglas de alerta del dashboard sobre ventanas móviles de todo el
+histórico y guarda los períodos de cada estado como intervalos.
+"""
+
+import numpy as np
+import pandas as pd
+
+UMBRAL_SPREAD = 5           # USD/MMBtu: spread elevado / oportunidad
+UMBRAL_SPREAD_NORMAL = 3    # USD/MMBtu: por debajo, spread bajo
+UMBRAL_VOLATILIDAD = 15     # %: coeficiente de variación de la demanda
+
+VENTANAS = (30, 60, 90)
+
+# Columnas de pred_modelo1 que usan las reglas
+COLUMNAS = ('Spread_TTF_HH', 'Demanda_Total_pred')
+
+ESTADOS_ACTIVOS = {
+    'spread_elevado': 'elevado',
+    'volatilidad_demanda': 'alta',
+    'clasificacion_spread': 'oportunidad',
+}
+
+
+def clasificar_spread(spread):
+    """Clasificación del Tab 5 para un arreglo de spreads promedio."""
+    return np.select(
+        [spread > UMBRAL_SPREAD, spread > UMBRAL_SPREAD_NORMAL, np.isnan(spread)],
+        ['oportunidad', 'normal', 'sin datos'],
+        default='bajo'
+    )
+
+
+def _estados_por_fecha(pred_modelo1, ventana):
+    """Estado de cada regla al cierre de cada día para una ventana móvil de `ventana` días.
+
+    Mientras el histórico no cubre una ventana completa (los primeros
+    `ventana` días) todas las reglas quedan en 'sin datos'."""
+    serie = pred_modelo1.set_index('Fecha').sort_index()
+    movil = f'{ventana}D'
+
+    spread = serie['Spread_TTF_HH'].rolling(movil).mean().to_numpy()
+    demanda = serie['Demanda_Total_pred'].rolling(movil, min_periods=2)
+    volatilidad = (demanda.std() / demanda.mean() * 100).to_numpy()
+
+    # Ventanas incompletas: una alerta sobre unos pocos días no es comparable
+    incompleta = serie.index < serie.index[0] + pd.Timedelta(days=ventana - 1)
+    spread = np.where(incompleta, np.nan, spread)
+    volatilidad = np.where(incompleta, np.nan, volatilidad)
+
+    return pd.DataFrame({
+        'spread_elevado': np.select(
+            [np.isnan(spread), spread > UMBRAL_SPREAD], ['sin datos', 'elevado'], default='normal'
+        ),
+        'volatilidad_demanda': np.where(
+            np.isnan(volatilidad), 'sin datos',
+            np.where(volatilidad > UMBRAL_VOLATILIDAD, 'alta', 'estable')
+        ),
+        'clasificacion_spread': clasificar_spread(spread),
+    }, index=serie.index)
+
+
+def _tramos(estados):
+    """Agrupa días consecutivos con el mismo estado en (inicio, fin, estado).
+
+    Los tramos son contiguos: cada uno termina el día anterior al inicio del
+    siguiente, así fines de semana y festivos entre dos filas quedan en el
+    estado vigente (el de la última fecha con datos)."""
+    valores = estados.to_numpy()
+    cambios = np.flatnonzero(valores[1:] != valores[:-1]) + 1
+    inicios = np.r_[0, cambios]
+    fechas = estados.index
+    return pd.DataFrame({
+        'inicio': fechas[inicios],
+        'fin': fechas[cambios].append(fechas[-1:] + pd.Timedelta(days=1)) - pd.Timedelta(days=1),
+        'estado': valores[inicios],
+    })
+
+
+def linea_tiempo_alertas(pred_modelo1, ventanas=VENTANAS):
+    """Tramos de estado de cada regla y ventana sobre todo el histórico.
+
+    `pred_modelo1` debe incluir la serie derivada Spread_TTF_HH.
+
+    El resultado está indexado por un IntervalIndex cerrado [inicio, fin] y
+    tiene columnas regla, ventana, estado, inicio y fin."""
+    partes = []
+    for ventana in ventanas:
+        estados = _estados_por_fecha(pred_modelo1, ventana)
+        for regla in estados.columns:
+            tramos = _tramos(estados[regla])
+            tramos.insert(0, 'ventana', ventana)
+            tramos.insert(0, 'regla', regla)
+            partes.append(tramos)
+
+    linea = pd.concat(partes, ignore_index=True)
+    linea['activa'] = linea['estado'] == linea['regla'].map(ESTADOS_ACTIVOS)
+    linea.index = pd.IntervalIndex.from_arrays(linea['inicio'], linea['fin'], closed='both')
+    return linea
+
+
+def estado_en(linea, regla, ventana, fecha):
+    """Estado de `regla` con ventana móvil `ventana` en `fecha` (None si fuera del histórico)."""
+    tramos = linea[(linea['regla'] == regla) & (linea['ventana'] == ventana)]
+    consulta = pd.to_datetime([fecha]).as_unit(tramos.index.left.unit)
+    posicion = tramos.index.get_indexer(consulta)[0]
+    return None if posicion < 0 else tramos['estado'].iloc[posicion]
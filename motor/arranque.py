@@ -0,0 +1,105 @@
+"""
+PrediGas - Tiempo de arranque
+Reporte de tiempos de importación (como `python -X importtime`) de los módulos
+que app.py importa al iniciar, con verificación contra un presupuesto.
+
+    python -m motor.arranque --presupuesto 1500
+"""
+
+import argparse
+import ast
+import importlib.machinery
+import importlib.util
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+PRESUPUESTO_MS = float(os.environ.get('PROYECTAGAS_PRESUPUESTO_ARRANQUE_MS', '2000'))
+RUTA_APP = Path(__file__).resolve().parent.parent / 'app.py'
+
+_LINEA = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def _submodulo(paquete, nombre):
+    """True si `nombre` es un submódulo de `paquete` (se busca sin importarlo)."""
+    try:
+        especificacion = importlib.util.find_spec(paquete)
+    except (ImportError, ValueError):
+        return False
+    if especificacion is None or not especificacion.submodule_search_locations:
+        return False
+    return importlib.machinery.PathFinder.find_spec(nombre, especificacion.submodule_search_locations) is not None
+
+
+def modulos_arranque(ruta_app=RUTA_APP):
+    """Módulos importados en el nivel superior de app.py (los de dentro de un tab no cuentan).
+
+    `from motor import artefactos, graficos` cuenta motor, motor.artefactos y
+    motor.graficos; los nombres que no son submódulos (funciones, constantes)
+    ya quedan cubiertos por su módulo."""
+    arbol = ast.parse(Path(ruta_app).read_text(encoding='utf-8'))
+    modulos = []
+    for nodo in arbol.body:
+        if isinstance(nodo, ast.Import):
+            modulos += [alias.name for alias in nodo.names]
+        elif isinstance(nodo, ast.ImportFrom) and nodo.module:
+            modulos.append(nodo.module)
+            modulos += [f'{nodo.module}.{alias.name}' for alias in nodo.names
+                        if _submodulo(nodo.module, alias.name)]
+    return list(dict.fromkeys(modulos))
+
+
+def reporte_importacion(modulos=None):
+    """Tiempos de importación en un intérprete limpio.
+
+    Devuelve un DataFrame con modulo, nivel, propio_ms y acumulado_ms, ordenado
+    por tiempo acumulado. El total es la suma de los módulos de nivel 0."""
+    modulos = modulos or modulos_arranque()
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + ', '.join(modulos)],
+        capture_output=True, text=True, cwd=RUTA_APP.parent
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(proceso.stderr.strip().splitlines()[-1])
+
+    filas = []
+    for linea in proceso.stderr.splitlines():
+        encontrado = _LINEA.match(linea)
+        if encontrado:
+            propio, acumulado, sangria, modulo = encontrado.groups()
+            filas.append({
+                'modulo': modulo,
+                'nivel': (len(sangria) - 1) // 2,
+                'propio_ms': int(propio) / 1000,
+                'acumulado_ms': int(acumulado) / 1000,
+            })
+    return pd.DataFrame(filas).sort_values('acumulado_ms', ascending=False, ignore_index=True)
+
+
+def total_ms(reporte):
+    return reporte.loc[reporte['nivel'] == 0, 'acumulado_ms'].sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de importación del arranque de app.py.")
+    parser.add_argument('--presupuesto', type=float, default=PRESUPUESTO_MS, help="milisegundos")
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    reporte = reporte_importacion()
+    print(reporte.head(args.top).to_string(index=False))
+
+    total = total_ms(reporte)
+    print(f"\nTotal: {total:,.0f} ms (presupuesto {args.presupuesto:,.0f} ms)")
+    if total > args.presupuesto:
+        print("❌ El arranque excede el presupuesto")
+        sys.exit(1)
+    print("✅ Dentro del presupuesto")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+PrediGas - Artefactos derivados
+Registro de todo lo que se deriva de los CSV (tablas leídas, pivotes, series
+derivadas, descomposición estacional, línea de tiempo de alertas) y su carga a través de la caché en disco.
+
+Precalcular antes de desplegar:
+    python -m motor.artefactos
+"""
+
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from motor import cache_disco
+from motor.alertas import linea_tiempo_alertas
+from motor.compactacion import expandir_fechas
+from motor.datos import pivotar_desagregado
+from motor.derivadas import ampliar
+from motor.estacionalidad import descomponer
+from motor.ingesta import leer_csv
+
+RUTAS = {
+    'metricas_agregado': 'data/xgboost_metricas.csv',
+    'metricas_desagregado': 'data/xgboost_metricas_desagregadas.csv',
+    'pred_modelo1': 'data/predicciones_modelo1_xgboost.csv',
+    'pred_modelo2': 'data/predicciones_modelo2_desagregado.csv',
+}
+
+
+def leer_metricas():
+    """Lee las dos tablas de métricas de test."""
+    metricas_agregado = pd.read_csv(RUTAS['metricas_agregado'])
+    metricas_desagregado = pd.read_csv(RUTAS['metricas_desagregado'])
+    return metricas_agregado, metricas_desagregado
+
+
+def leer_tablas(progreso=None):
+    """Lee los cuatro CSV del dashboard; las predicciones quedan compactadas
+    (Fecha como días int32, ver motor/compactacion.py) y los archivos grandes
+    se leen por trozos en paralelo (motor/ingesta.py).
+
+    `progreso(bytes_leidos, bytes_totales)` cubre las dos predicciones."""
+    metricas_agregado, metricas_desagregado = leer_metricas()
+    rutas = [RUTAS['pred_modelo1'], RUTAS['pred_modelo2']]
+    total = sum(os.path.getsize(ruta) for ruta in rutas)
+    tablas, previos = [], 0
+    for ruta in rutas:
+        avance = (lambda leidos, _, previos=previos: progreso(previos + leidos, total)) if progreso else None
+        tablas.append(leer_csv(ruta, progreso=avance))
+        previos += os.path.getsize(ruta)
+    pred_modelo1, pred_modelo2 = tablas
+    return metricas_agregado, metricas_desagregado, pred_modelo1, pred_modelo2
+
+
+# nombre -> función(directorio, progreso); las dependencias también pasan por la caché
+ARTEFACTOS = {
+    'tablas': lambda directorio, progreso: leer_tablas(progreso),
+    'metricas': lambda directorio, progreso: leer_metricas(),
+    'modelo1': lambda directorio, progreso: ampliar(cargar('tablas', directorio, progreso)[2]),
+    'desagregado_ancho': lambda directorio, progreso: ampliar(
+        pivotar_desagregado(cargar('tablas', directorio, progreso)[3])
+    ),
+    'estacionalidad': lambda directorio, progreso: descomponer(
+        cargar('modelo1', directorio, progreso), cargar('desagregado_ancho', directorio, progreso)
+    ),
+    'alertas': lambda directorio, progreso: linea_tiempo_alertas(
+        expandir_fechas(cargar('modelo1', directorio, progreso))
+    ),
+}
+
+
+# Artefactos que no dependen de todos los CSV (el resto usa RUTAS completas)
+ENTRADAS = {'metricas': (RUTAS['metricas_agregado'], RUTAS['metricas_desagregado'])}
+
+
+def cargar(nombre, directorio=cache_disco.DIRECTORIO_CACHE, progreso=None):
+    """Artefacto desde la caché en disco; se calcula y guarda si no existe.
+    `progreso` recibe el avance de la lectura de los CSV si hay que leerlos."""
+    clave = cache_disco.huella(ENTRADAS.get(nombre, RUTAS.values()), directorio)
+    return cache_disco.obtener_o_calcular(
+        nombre, clave, lambda: ARTEFACTOS[nombre](directorio, progreso), directorio
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precalcula los artefactos derivados en la caché en disco.")
+    parser.add_argument('--directorio', default=str(cache_disco.DIRECTORIO_CACHE))
+    args = parser.parse_args()
+
+    for nombre in ARTEFACTOS:
+        inicio = time.perf_counter()
+        cargar(nombre, args.directorio)
+        print(f"{nombre}: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    total = cache_disco.podar(args.directorio)
+    print(f"Caché en {args.directorio}: {total / 1024 ** 2:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+PrediGas - Caché en disco
+Artefactos derivados guardados en disco con clave = huella del contenido de los
+archivos de entrada + versión del código. Tamaño acotado con desalojo LRU.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+DIRECTORIO_CACHE = Path(os.environ.get('PROYECTAGAS_CACHE', '.cache/proyectagas'))
+LIMITE_BYTES = int(os.environ.get('PROYECTAGAS_CACHE_MB', '512')) * 1024 ** 2
+
+_BLOQUE = 1024 * 1024
+_ARCHIVO_HUELLAS = 'huellas.json'
+
+
+@functools.lru_cache(maxsize=1)
+def version_codigo():
+    """Huella del código de `motor/`: cambiar cualquier cálculo invalida la caché.
+    Se calcula una vez por proceso."""
+    sha = hashlib.sha256()
+    for ruta in sorted(Path(__file__).parent.glob('*.py')):
+        sha.update(ruta.name.encode())
+        sha.update(ruta.read_bytes())
+    return sha.hexdigest()
+
+
+def _huella_archivo(ruta, conocidas):
+    """SHA-256 del contenido; se reutiliza mientras tamaño y mtime no cambien."""
+    estado = os.stat(ruta)
+    firma = [estado.st_size, estado.st_mtime_ns]
+    previa = conocidas.get(str(ruta))
+    if previa and previa['firma'] == firma:
+        return previa['sha']
+
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(_BLOQUE), b''):
+            sha.update(bloque)
+    conocidas[str(ruta)] = {'firma': firma, 'sha': sha.hexdigest()}
+    return sha.hexdigest()
+
+
+def huella(rutas, directorio=DIRECTORIO_CACHE):
+    """Huella combinada de los archivos de entrada y de la versión del código."""
+    directorio = Path(directorio)
+    registro = directorio / _ARCHIVO_HUELLAS
+    try:
+        conocidas = json.loads(registro.read_text())
+    except (FileNotFoundError, ValueError):
+        conocidas = {}
+    previas = dict(conocidas)
+
+    sha = hashlib.sha256(version_codigo().encode())
+    for ruta in sorted(str(r) for r in rutas):
+        sha.update(ruta.encode())
+        sha.update(_huella_archivo(ruta, conocidas).encode())
+
+    # Solo se reescribe si algún archivo se volvió a hashear
+    if conocidas != previas:
+        directorio.mkdir(parents=True, exist_ok=True)
+        _escribir_atomico(registro, json.dumps(conocidas).encode())
+    return sha.hexdigest()
+
+
+def _escribir_atomico(destino, contenido):
+    # Otro proceso nunca ve un archivo a medio escribir
+    fd, temporal = tempfile.mkstemp(dir=destino.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(contenido)
+        os.replace(temporal, destino)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+
+
+def _ruta(nombre, clave, directorio):
+    return Path(directorio) / f"{nombre}-{clave[:20]}.pkl"
+
+
+def obtener(nombre, clave, directorio=DIRECTORIO_CACHE):
+    """Valor guardado o None. Cada lectura renueva su posición LRU."""
+    ruta = _ruta(nombre, clave, directorio)
+    try:
+        with open(ruta, 'rb') as f:
+            valor = pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+    os.utime(ruta)
+    return valor
+
+
+def guardar(nombre, clave, valor, directorio=DIRECTORIO_CACHE, limite_bytes=LIMITE_BYTES):
+    ruta = _ruta(nombre, clave, directorio)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    _escribir_atomico(ruta, pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+    podar(directorio, limite_bytes)
+
+
+def obtener_o_calcular(nombre, clave, funcion, directorio=DIRECTORIO_CACHE, limite_bytes=LIMITE_BYTES):
+    valor = obtener(nombre, clave, directorio)
+    if valor is None:
+        valor = funcion()
+        guardar(nombre, clave, valor, directorio, limite_bytes)
+    return valor
+
+
+def podar(directorio=DIRECTORIO_CACHE, limite_bytes=LIMITE_BYTES):
+    """Borra los artefactos usados hace más tiempo hasta quedar bajo el límite."""
+    archivos = []
+    for ruta in Path(directorio).glob('*.pkl'):
+        try:
+            estado = ruta.stat()
+        except FileNotFoundError:
+            continue
+        archivos.append((estado.st_mtime, estado.st_size, ruta))
+
+    total = sum(tamano for _, tamano, _ in archivos)
+    for _, tamano, ruta in sorted(archivos):
+        if total <= limite_bytes:
+            break
+        ruta.unlink(missing_ok=True)
+        total -= tamano
+    return total
@@ -0,0 +1,90 @@
+"""
+PrediGas - Compactación de tablas
+Representación compacta en memoria de las tablas de predicciones: texto
+repetido como categoría, valores en float32 cuando la precisión lo permite y
+fechas como días (int32) desde 1970-01-01.
+
+    python -m motor.compactacion    # reporte de memoria antes / después
+"""
+
+import numpy as np
+import pandas as pd
+
+EPOCA = np.datetime64('1970-01-01', 'D')
+TOLERANCIA_FLOAT32 = 1e-6
+
+
+def fecha_a_dia(fecha):
+    """Día (int) desde 1970-01-01 de una fecha o Timestamp."""
+    return int((np.datetime64(pd.Timestamp(fecha).date(), 'D') - EPOCA).astype(int))
+
+
+def dias_a_fechas(dias):
+    """Arreglo de días int32 a datetime64."""
+    return pd.to_datetime(np.asarray(dias, dtype='int64'), unit='D')
+
+
+def expandir_fechas(df, columna='Fecha'):
+    """Copia de `df` con la columna de días convertida de nuevo a fechas."""
+    if df[columna].dtype.kind != 'i':
+        return df
+    return df.assign(**{columna: dias_a_fechas(df[columna])})
+
+
+def cabe_en_float32(valores, tolerancia=TOLERANCIA_FLOAT32):
+    """Si `valores` pasan a float32 con error relativo <= `tolerancia` (sin
+    desbordar; los NaN cuentan como iguales)."""
+    compactos = valores.astype(np.float32)
+    if not np.isfinite(compactos[np.isfinite(valores)]).all():
+        return False
+    return np.allclose(compactos, valores, rtol=tolerancia, atol=0, equal_nan=True)
+
+
+def compactar(df, tolerancia=TOLERANCIA_FLOAT32):
+    """Versión compacta de `df`; las columnas que no se pueden reducir sin
+    pérdida mayor a `tolerancia` (error relativo) se dejan como están."""
+    compacto = {}
+    for columna, serie in df.items():
+        tipo = serie.dtype
+        if tipo.kind == 'M':
+            compacto[columna] = ((serie.to_numpy().astype('datetime64[D]') - EPOCA)
+                                 .astype(np.int32))
+        elif tipo.kind == 'f' and tipo != np.float32 and cabe_en_float32(serie.to_numpy(), tolerancia):
+            compacto[columna] = serie.to_numpy().astype(np.float32)
+        elif tipo.kind in 'OT' and serie.nunique() <= len(serie) // 2:
+            compacto[columna] = serie.astype('category')
+        else:
+            compacto[columna] = serie
+    return pd.DataFrame(compacto, index=df.index)
+
+
+def reporte_memoria(pares):
+    """Memoria por tabla antes y después de compactar.
+
+    `pares` es un dict nombre -> (tabla_original, tabla_compacta)."""
+    filas = []
+    for nombre, (antes, despues) in pares.items():
+        bytes_antes = antes.memory_usage(deep=True).sum()
+        bytes_despues = despues.memory_usage(deep=True).sum()
+        filas.append({
+            'tabla': nombre,
+            'filas': len(antes),
+            'antes_kb': bytes_antes / 1024,
+            'despues_kb': bytes_despues / 1024,
+            'reduccion': bytes_antes / bytes_despues,
+        })
+    return pd.DataFrame(filas)
+
+
+def main():
+    from motor.artefactos import RUTAS
+
+    pares = {}
+    for nombre in ('pred_modelo1', 'pred_modelo2'):
+        original = pd.read_csv(RUTAS[nombre], parse_dates=['Fecha'])
+        pares[nombre] = (original, compactar(original))
+    print(reporte_memoria(pares).to_string(index=False, float_format='{:,.1f}'.format))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+PrediGas - Comparación de períodos
+Indicadores del período seleccionado frente a otra ventana (p. ej. el mismo
+trimestre del año anterior): todos los KPIs, participaciones y spreads se
+sacan de la tabla resumen y las derivadas de cada ventana y las diferencias
+salen de una sola operación sobre la matriz períodos x indicadores.
+
+Para recorrer la misma ventana en todos los años anteriores se usan sumas
+acumuladas por columna (una vez por versión de datos): el promedio de cada
+variable en cada año es una resta, y las participaciones y spreads se evalúan
+como razón de promedios sobre la matriz resultante. Con el backend SQLite
+(AcumuladosBD) los promedios de todas las ventanas salen de una consulta.
+"""
+
+import numpy as np
+import pandas as pd
+
+from motor.compactacion import fecha_a_dia
+from motor.derivadas import COSTA, DERIVADAS, INTERIOR, sobre_agregados
+
+# (indicador, variable, estadística de la tabla resumen)
+INDICADORES = [
+    ('Demanda promedio', 'Demanda_Total_pred', 'media'),
+    ('Demanda pico', 'Demanda_Total_pred', 'max'),
+    ('Demanda mínima', 'Demanda_Total_pred', 'min'),
+    ('Volatilidad demanda (CV %)', 'Demanda_Total_pred', 'cv'),
+    ('Costa promedio', COSTA, 'media'),
+    ('Interior promedio', INTERIOR, 'media'),
+    ('Henry Hub promedio', 'Henry_Hub_pred', 'media'),
+    ('Henry Hub pico', 'Henry_Hub_pred', 'max'),
+    ('TTF promedio', 'TTF_pred', 'media'),
+    ('TTF pico', 'TTF_pred', 'max'),
+]
+
+# Derivadas que se comparan: spread, razón y participaciones
+PREFIJOS_DERIVADAS = ('Spread_', 'Ratio_', 'Participacion_')
+
+# Por debajo de esta cobertura la ventana de comparación no da variaciones confiables
+COBERTURA_MINIMA = 0.8
+
+
+def indicadores(resumen, agregados):
+    """Serie indicador -> valor de una ventana (NaN si la variable no está)."""
+    estadisticas = resumen.reindex([variable for _, variable, _ in INDICADORES])
+    columnas = estadisticas.columns.get_indexer([estadistica for _, _, estadistica in INDICADORES])
+    valores = estadisticas.to_numpy()[np.arange(len(INDICADORES)), columnas]
+    derivadas = agregados[agregados.index.str.startswith(PREFIJOS_DERIVADAS)]
+    return pd.concat([
+        pd.Series(valores, index=[nombre for nombre, _, _ in INDICADORES]),
+        derivadas,
+    ])
+
+
+def comparar(actual, referencia):
+    """Actual, referencia, diferencia y variación % de cada indicador.
+
+    `actual` y `referencia` son Series de `indicadores`; las participaciones
+    (en %) se comparan en puntos porcentuales, no en variación relativa."""
+    valores = np.vstack([actual.to_numpy(dtype=float), referencia.reindex(actual.index).to_numpy(dtype=float)])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        delta = valores[0] - valores[1]
+        variacion = np.where(valores[1] != 0, delta / np.abs(valores[1]) * 100, np.nan)
+    en_puntos = actual.index.str.startswith('Participacion_') | actual.index.str.contains('%')
+    return pd.DataFrame({
+        'actual': valores[0],
+        'referencia': valores[1],
+        'delta': delta,
+        'variacion_pct': np.where(en_puntos, np.nan, variacion),
+    }, index=actual.index)
+
+
+def mismo_periodo(fecha_inicio, fecha_fin, anios=1):
+    """La misma ventana `anios` años antes (29-feb pasa a 28-feb)."""
+    desplazamiento = pd.DateOffset(years=anios)
+    return ((pd.Timestamp(fecha_inicio) - desplazamiento).date(),
+            (pd.Timestamp(fecha_fin) - desplazamiento).date())
+
+
+def cobertura(fecha_inicio, fecha_fin, primera, ultima):
+    """Fracción de los días de [fecha_inicio, fecha_fin] que caen dentro del
+    rango con datos [primera, ultima]. Se cuentan días de calendario y no
+    filas: los datos son de días hábiles."""
+    inicio, fin = pd.Timestamp(fecha_inicio), pd.Timestamp(fecha_fin)
+    if fin < inicio:
+        return 0.0
+    cubiertos = (min(fin, pd.Timestamp(ultima)) - max(inicio, pd.Timestamp(primera))).days + 1
+    return max(cubiertos, 0) / ((fin - inicio).days + 1)
+
+
+class Acumulados:
+    """Sumas acumuladas por columna de un marco indexado por Fecha (fechas o
+    días int). Solo columnas base: las derivadas se evalúan después sobre los
+    promedios. `acumulado` y `validos` tienen una fila más que fechas."""
+
+    def __init__(self, marco):
+        numericas = marco.select_dtypes('number')
+        numericas = numericas.drop(columns=[c for c in numericas.columns if c in DERIVADAS])
+        fechas = numericas.index.to_numpy()
+        if fechas.dtype.kind == 'M':
+            fechas = (fechas.astype('datetime64[D]') - np.datetime64('1970-01-01', 'D')).astype(np.int64)
+        orden = np.argsort(fechas, kind='stable')
+        valores = numericas.to_numpy(dtype=float)[orden]
+        self.fechas = fechas[orden].astype(np.int64)
+        self.columnas = numericas.columns
+        self.acumulado = np.vstack([np.zeros(valores.shape[1]), np.cumsum(np.nan_to_num(valores), axis=0)])
+        self.validos = np.vstack([np.zeros(valores.shape[1], np.int64),
+                                  np.cumsum(~np.isnan(valores), axis=0)])
+        self.primer_dia = self.fechas[0] if len(self.fechas) else np.iinfo(np.int64).max
+
+    def medias(self, inicios, fines):
+        """Promedio de cada columna en cada ventana [inicios[k], fines[k]] (días
+        int): DataFrame ventanas x columnas, NaN donde no hay datos."""
+        i = np.searchsorted(self.fechas, np.asarray(inicios), 'left')
+        j = np.searchsorted(self.fechas, np.asarray(fines), 'right')
+        total = self.acumulado[j] - self.acumulado[i]
+        dias = self.validos[j] - self.validos[i]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame(np.where(dias > 0, total / dias, np.nan), columns=self.columnas)
+
+    def barrido_anual(self, fecha_inicio, fecha_fin):
+        """Promedios y derivadas de la misma ventana en el año actual y en cada
+        año anterior que los datos alcancen a cubrir, indexado por años atrás."""
+        anios = 0
+        while fecha_a_dia(mismo_periodo(fecha_inicio, fecha_fin, anios + 1)[1]) >= self.primer_dia:
+            anios += 1
+        ventanas = [mismo_periodo(fecha_inicio, fecha_fin, k) for k in range(anios + 1)]
+        medias = self.medias([fecha_a_dia(i) for i, _ in ventanas], [fecha_a_dia(f) for _, f in ventanas])
+        derivadas = sobre_agregados(medias)
+        derivadas = derivadas.loc[:, derivadas.columns.str.startswith(PREFIJOS_DERIVADAS)]
+        resultado = pd.concat([medias, derivadas], axis=1)
+        resultado.index = pd.Index(range(anios + 1), name='anios_atras')
+        resultado.insert(0, 'desde', [i for i, _ in ventanas])
+        resultado.insert(1, 'hasta', [f for _, f in ventanas])
+        return resultado
+
+
+class AcumuladosBD(Acumulados):
+    """El mismo barrido sobre tablas de la base (motor/consultas.py): los
+    promedios de todas las ventanas son un AVG agrupado en SQLite, sin traer
+    el histórico a memoria."""
+
+    def __init__(self, *tablas):
+        self.tablas = tablas
+        vistas, self.columnas_por_tabla = set(), []
+        for tabla in tablas:
+            columnas = [c for c in tabla.columns if c != 'Fecha' and c not in DERIVADAS and c not in vistas]
+            vistas.update(columnas)
+            self.columnas_por_tabla.append(columnas)
+        self.columnas = pd.Index([c for columnas in self.columnas_por_tabla for c in columnas])
+        primeras = [tabla.rango()[0] for tabla in tablas]
+        self.primer_dia = min((fecha_a_dia(f) for f in primeras if pd.notna(f)), default=np.iinfo(np.int64).max)
+
+    def medias(self, inicios, fines):
+        return pd.concat([
+            tabla.medias(inicios, fines, columnas)
+            for tabla, columnas in zip(self.tablas, self.columnas_por_tabla)
+        ], axis=1)
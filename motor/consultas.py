@@ -0,0 +1,192 @@
+"""
+PrediGas - Backend de consultas
+Las tablas de predicciones (con sus series derivadas) guardadas en un archivo
+SQLite, una fila por fecha con Fecha como clave entera (días desde 1970-01-01).
+Los filtros por ventana de fechas y por columnas, los agregados mensuales, los
+promedios por ventana del barrido anual y las sumas de la jerarquía se
+resuelven en SQLite; a Python solo llega el resultado.
+
+    python -m motor.consultas --bd data/proyectagas.sqlite
+    PROYECTAGAS_BD=data/proyectagas.sqlite streamlit run app.py
+"""
+
+import argparse
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from motor.compactacion import compactar, dias_a_fechas, fecha_a_dia
+
+FILAS_POR_LOTE = 50_000
+
+# Mes de un día entero de la clave
+_MES = "CAST(strftime('%m', Fecha * 86400, 'unixepoch') AS INTEGER)"
+
+
+def _conectar(ruta):
+    # Solo lectura: cada consulta abre su conexión, no hay estado compartido entre sesiones
+    return sqlite3.connect(f'file:{Path(ruta).resolve()}?mode=ro', uri=True)
+
+
+def _citar(columna):
+    return '"' + columna.replace('"', '""') + '"'
+
+
+class TablaBD:
+    """Tabla de predicciones en la base. Expone `columns` igual que un
+    DataFrame para que los tabs sepan qué variables tiene sin leer filas."""
+
+    def __init__(self, ruta, nombre):
+        if not Path(ruta).exists():
+            raise FileNotFoundError(f"No existe la base {ruta}; créala con python -m motor.consultas")
+        self.ruta = str(ruta)
+        self.nombre = nombre
+        with closing(_conectar(self.ruta)) as conexion:
+            info = conexion.execute(f'PRAGMA table_info({_citar(nombre)})').fetchall()
+        if not info:
+            raise FileNotFoundError(f"La tabla {nombre} no existe en {self.ruta}")
+        self.columns = pd.Index([fila[1] for fila in info])
+
+    def __repr__(self):
+        return f"TablaBD({self.ruta!r}, {self.nombre!r})"
+
+    def rango(self):
+        """Primera y última fecha (búsqueda en el índice de la clave)."""
+        with closing(_conectar(self.ruta)) as conexion:
+            minimo, maximo = conexion.execute(
+                f'SELECT MIN(Fecha), MAX(Fecha) FROM {_citar(self.nombre)}'
+            ).fetchone()
+        return tuple(dias_a_fechas([minimo, maximo]))
+
+    def ventana(self, fecha_inicio, fecha_fin, columnas=None):
+        """Filas con Fecha en [fecha_inicio, fecha_fin] y solo `columnas`
+        (todas si es None); Fecha en días int32 como las tablas compactas."""
+        columnas = ['Fecha'] + [c for c in (columnas or self.columns) if c != 'Fecha']
+        consulta = (f"SELECT {', '.join(map(_citar, columnas))} FROM {_citar(self.nombre)} "
+                    f"WHERE Fecha BETWEEN ? AND ? ORDER BY Fecha")
+        with closing(_conectar(self.ruta)) as conexion:
+            df = pd.read_sql_query(
+                consulta, conexion, params=[fecha_a_dia(fecha_inicio), fecha_a_dia(fecha_fin)]
+            )
+        # Una ventana sin valores llega como object; el tipo se fija antes de compactar
+        return compactar(df.astype({'Fecha': 'int32', **{c: 'float64' for c in columnas[1:]}}))
+
+    def mensual(self, fecha_inicio, fecha_fin, columna):
+        """Promedio, mínimo y máximo de `columna` por mes del año dentro de la ventana."""
+        c = _citar(columna)
+        consulta = (f"SELECT {_MES} AS Mes, AVG({c}) AS mean, MIN({c}) AS min, MAX({c}) AS max "
+                    f"FROM {_citar(self.nombre)} WHERE Fecha BETWEEN ? AND ? GROUP BY Mes ORDER BY Mes")
+        with closing(_conectar(self.ruta)) as conexion:
+            return pd.read_sql_query(
+                consulta, conexion, params=[fecha_a_dia(fecha_inicio), fecha_a_dia(fecha_fin)],
+                index_col='Mes'
+            )
+
+
+    def medias(self, inicios, fines, columnas=None):
+        """Promedio de cada columna en cada ventana [inicios[k], fines[k]] (días
+        int), todas en una sola consulta: DataFrame ventanas x columnas, NaN
+        donde no hay datos."""
+        columnas = [c for c in (self.columns if columnas is None else columnas) if c != 'Fecha']
+        inicios, fines = list(inicios), list(fines)
+        if not columnas or not inicios:
+            return pd.DataFrame(index=range(len(inicios)), columns=columnas, dtype=float)
+        valores = ', '.join(['(?, ?, ?)'] * len(inicios))
+        promedios = ', '.join(f'AVG({_citar(c)})' for c in columnas)
+        consulta = (f"WITH ventanas(k, desde, hasta) AS (VALUES {valores}) "
+                    f"SELECT k, {promedios} FROM ventanas LEFT JOIN {_citar(self.nombre)} "
+                    f"ON Fecha BETWEEN desde AND hasta GROUP BY k ORDER BY k")
+        parametros = [v for k, (i, f) in enumerate(zip(inicios, fines)) for v in (k, int(i), int(f))]
+        with closing(_conectar(self.ruta)) as conexion:
+            filas = conexion.execute(consulta, parametros).fetchall()
+        return pd.DataFrame([fila[1:] for fila in filas], columns=columnas, dtype=float)
+
+
+def sumas_por_grupo(tablas, grupos, fecha_inicio, fecha_fin, por_dia=False):
+    """Suma de cada grupo de columnas (lista de listas) y si hay algún valor,
+    sobre tablas de la misma base unidas por Fecha (las fechas de todas).
+
+    Con `por_dia=False` devuelve (totales, dias) por grupo en la ventana; con
+    `por_dia=True`, un DataFrame con Fecha (días int) y `suma_k`/`valido_k`."""
+    if len({t.ruta for t in tablas}) > 1:
+        raise ValueError("Las tablas deben estar en la misma base")
+    # Cada columna se lee de la primera tabla que la tiene
+    duenas = {}
+    for tabla in tablas:
+        for columna in tabla.columns:
+            duenas.setdefault(columna, tabla.nombre)
+    faltantes = sorted({c for grupo in grupos for c in grupo} - set(duenas))
+    if faltantes:
+        raise ValueError(f"Columnas que no están en la base: {faltantes}")
+    citada = lambda c: f'{_citar(duenas[c])}.{_citar(c)}'
+
+    # Las fechas son las de todas las tablas, aunque un grupo solo use una
+    usadas = list(dict.fromkeys(tabla.nombre for tabla in tablas))
+    if len(usadas) == 1:
+        origen = _citar(usadas[0])
+    else:
+        fechas = ' UNION '.join(f'SELECT Fecha FROM {_citar(n)}' for n in usadas)
+        origen = f'({fechas}) AS f ' + ' '.join(f'LEFT JOIN {_citar(n)} USING (Fecha)' for n in usadas)
+
+    sumas = [' + '.join(f'COALESCE({citada(c)}, 0)' for c in grupo) or '0' for grupo in grupos]
+    validos = [f"({' OR '.join(f'{citada(c)} IS NOT NULL' for c in grupo) or '0'})" for grupo in grupos]
+    parametros = [fecha_a_dia(fecha_inicio), fecha_a_dia(fecha_fin)]
+    with closing(_conectar(tablas[0].ruta)) as conexion:
+        if por_dia:
+            columnas = [f'{s} AS suma_{k}, {v} AS valido_{k}' for k, (s, v) in enumerate(zip(sumas, validos))]
+            consulta = (f"SELECT Fecha, {', '.join(columnas)} FROM {origen} "
+                        f"WHERE Fecha BETWEEN ? AND ? ORDER BY Fecha")
+            return pd.read_sql_query(consulta, conexion, params=parametros)
+        columnas = [f'TOTAL({s}), TOTAL({v})' for s, v in zip(sumas, validos)]
+        consulta = f"SELECT {', '.join(columnas)} FROM {origen} WHERE Fecha BETWEEN ? AND ?"
+        fila = conexion.execute(consulta, parametros).fetchone()
+    return np.array(fila[0::2], dtype=float), np.array(fila[1::2], dtype=np.int64)
+
+
+def publicar(tablas, ruta):
+    """Escribe `tablas` (nombre -> DataFrame con Fecha en días int32 y columnas
+    numéricas) en `ruta`, reemplazando las que ya existan. El archivo nuevo se
+    arma aparte y se renombra al final: las sesiones abiertas nunca leen uno a medias."""
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_suffix(ruta.suffix + '.tmp')
+    temporal.unlink(missing_ok=True)
+
+    with closing(sqlite3.connect(temporal)) as conexion:
+        for nombre, df in tablas.items():
+            columnas = [c for c in df.columns if c != 'Fecha']
+            definicion = ', '.join(f'{_citar(c)} REAL' for c in columnas)
+            conexion.execute(f'CREATE TABLE {_citar(nombre)} (Fecha INTEGER PRIMARY KEY, {definicion})')
+            marcadores = ', '.join('?' * (len(columnas) + 1))
+            for inicio in range(0, len(df), FILAS_POR_LOTE):
+                lote = df.iloc[inicio:inicio + FILAS_POR_LOTE]
+                conexion.executemany(
+                    f'INSERT INTO {_citar(nombre)} VALUES ({marcadores})',
+                    zip(lote['Fecha'].astype(int).tolist(), *(lote[c].astype(float).tolist() for c in columnas)),
+                )
+            conexion.commit()
+    temporal.replace(ruta)
+
+
+def main():
+    from motor import artefactos
+
+    parser = argparse.ArgumentParser(description="Carga las predicciones en la base SQLite del backend de consultas.")
+    parser.add_argument('--bd', default='data/proyectagas.sqlite')
+    args = parser.parse_args()
+
+    publicar({
+        'modelo1': artefactos.cargar('modelo1'),
+        'desagregado': artefactos.cargar('desagregado_ancho'),
+    }, args.bd)
+    for nombre in ('modelo1', 'desagregado'):
+        tabla = TablaBD(args.bd, nombre)
+        desde, hasta = tabla.rango()
+        print(f"{nombre}: {len(tabla.columns) - 1} columnas, {desde:%Y-%m-%d} a {hasta:%Y-%m-%d}")
+
+
+if __name__ == '__main__':
+    main()
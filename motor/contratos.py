@@ -0,0 +1,159 @@
+"""
+PrediGas - Mezcla de contratos
+Volumen firme (take-or-pay) y capacidad flexible que minimizan el costo
+diario esperado frente a la demanda proyectada de la ventana:
+
+    costo(B, F) = c_firme·B + c_reserva·F
+                  + c_flexible·E[min((d − B)⁺, F)] + c_deficit·E[(d − B − F)⁺]
+
+El firme se paga se use o no; del flexible se paga la reserva de capacidad y
+el gas que se usa; lo que no cubren ambos se compra al costo de déficit
+(spot o penalización). La distribución de d es la de la demanda proyectada en
+la ventana suavizada con un kernel gaussiano (ancho de Silverman), así el
+costo esperado es derivable y convexo y L-BFGS-B lo resuelve con gradiente
+analítico, arrancando de los cuantiles del problema sin suavizar. Todas las
+zonas y sectores van en una sola optimización (son separables).
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from scipy.special import ndtr
+
+from motor.derivadas import COSTA, INTERIOR, SECTORES
+
+ENTIDADES = {
+    'Nacional': 'Demanda_Total_pred',
+    'Costa': COSTA,
+    'Interior': INTERIOR,
+    **{sector: f'Demanda_{sector}_Total_MBTUD_pred' for sector in SECTORES},
+}
+
+# USD por MBTU: firme, reserva de capacidad flexible, gas flexible usado y déficit
+COSTOS_POR_DEFECTO = {'firme': 4.0, 'reserva': 0.5, 'flexible': 4.5, 'deficit': 12.0}
+NOMBRES_COSTOS = {
+    'firme': 'firme (take-or-pay)',
+    'reserva': 'reserva de capacidad flexible',
+    'flexible': 'gas flexible usado',
+    'deficit': 'déficit (spot/penalización)',
+}
+
+# Regla anterior del dashboard: 70% firme / 30% flexible sobre el pico
+REGLA_FIJA = (0.7, 0.3)
+
+_RAIZ_2PI = np.sqrt(2 * np.pi)
+
+
+def _anchos(demanda, validos):
+    """Ancho de Silverman por columna (n x k, con NaN fuera de `validos`)."""
+    n = validos.sum(axis=0)
+    desv = np.nanstd(demanda, axis=0, ddof=1)
+    p25, p75 = np.nanpercentile(demanda, [25, 75], axis=0)
+    dispersion = np.fmin(desv, (p75 - p25) / 1.34)
+    dispersion = np.where(dispersion > 0, dispersion, desv)
+    # Series constantes: un ancho mínimo relativo al nivel para que el costo siga siendo derivable
+    minimo = np.abs(np.nanmean(demanda, axis=0)) * 1e-3 + 1e-9
+    return np.fmax(0.9 * dispersion * n ** -0.2, minimo)
+
+
+def _exceso(x, demanda, pesos, anchos):
+    """E[(d − x)⁺] y P(d > x) por columna bajo la mezcla gaussiana."""
+    z = (x - demanda) / anchos
+    cola = 1 - ndtr(z)
+    densidad = np.exp(-0.5 * z ** 2) / _RAIZ_2PI
+    esperado = ((anchos * densidad + (demanda - x) * cola) * pesos).sum(axis=0)
+    return esperado, (cola * pesos).sum(axis=0)
+
+
+def _costo(firme, flexible, demanda, pesos, anchos, costos):
+    """Costo diario esperado por columna y su gradiente respecto de firme y flexible."""
+    exceso_firme, cola_firme = _exceso(firme, demanda, pesos, anchos)
+    exceso_total, cola_total = _exceso(firme + flexible, demanda, pesos, anchos)
+    costo = (costos['firme'] * firme + costos['reserva'] * flexible
+             + costos['flexible'] * (exceso_firme - exceso_total)
+             + costos['deficit'] * exceso_total)
+    gradiente_firme = (costos['firme'] - costos['flexible'] * cola_firme
+                       + (costos['flexible'] - costos['deficit']) * cola_total)
+    gradiente_flexible = costos['reserva'] + (costos['flexible'] - costos['deficit']) * cola_total
+    return costo, gradiente_firme, gradiente_flexible
+
+
+def validar_costos(costos):
+    """Problemas de los costos (lista vacía si sirven): todos deben ser
+    positivos y el déficit más caro que el gas flexible; si no, el costo
+    esperado no tiene mínimo acotado o alguna razón del arranque divide por cero."""
+    problemas = [f"{nombre.capitalize()}: el costo debe ser mayor que cero"
+                 for clave, nombre in NOMBRES_COSTOS.items() if not costos[clave] > 0]
+    if not costos['deficit'] > costos['flexible']:
+        problemas.append("El costo de déficit debe ser mayor que el del gas flexible")
+    return problemas
+
+
+def _arranque(demanda, costos):
+    """Cuantiles del problema sin suavizar (newsvendor de dos niveles):
+    P(d > B) = (c_firme − c_reserva) / c_flexible y
+    P(d > B + F) = c_reserva / (c_deficit − c_flexible), recortados a [0, 1]."""
+    cola_firme = np.clip((costos['firme'] - costos['reserva']) / costos['flexible'], 0, 1)
+    cola_total = np.clip(costos['reserva'] / (costos['deficit'] - costos['flexible']), 0, 1)
+    firme = np.nanquantile(demanda, 1 - cola_firme, axis=0)
+    total = np.fmax(np.nanquantile(demanda, 1 - min(cola_total, cola_firme), axis=0), firme)
+    return firme, total - firme
+
+
+def optimizar(marco, costos=COSTOS_POR_DEFECTO, entidades=ENTIDADES):
+    """Mezcla óptima por zona y sector sobre las columnas de `marco` (una fila
+    por día). Devuelve una tabla por entidad (vacía si no hay datos); los
+    costos deben pasar `validar_costos` (ValueError si no)."""
+    problemas = validar_costos(costos)
+    if problemas:
+        raise ValueError('; '.join(problemas))
+    entidades = {nombre: columna for nombre, columna in entidades.items() if columna in marco.columns}
+    demanda = marco[list(entidades.values())].to_numpy(dtype=float)
+    validos = ~np.isnan(demanda)
+    presentes = validos.any(axis=0)
+    if not presentes.any():
+        return pd.DataFrame()
+    demanda, validos = demanda[:, presentes], validos[:, presentes]
+    nombres = [nombre for nombre, presente in zip(entidades, presentes) if presente]
+
+    pesos = validos / validos.sum(axis=0)
+    demanda = np.where(validos, demanda, 0.0)
+    anchos = _anchos(np.where(validos, demanda, np.nan), validos)
+    pico = np.where(validos, demanda, -np.inf).max(axis=0)
+
+    # Variables en unidades del pico de cada entidad para que el problema quede bien escalado
+    escala = np.where(pico > 0, pico, 1.0)
+    k = len(nombres)
+    normalizacion = escala.sum() * max(costos.values())
+
+    def objetivo(x):
+        firme, flexible = x[:k] * escala, x[k:] * escala
+        costo, g_firme, g_flexible = _costo(firme, flexible, demanda, pesos, anchos, costos)
+        return costo.sum() / normalizacion, np.concatenate([g_firme, g_flexible]) * np.tile(escala, 2) / normalizacion
+
+    # Los cuantiles ya están cerca del óptimo suavizado: partir de la solución
+    # anterior (otros costos) no ahorra iteraciones frente a este arranque
+    firme, flexible = _arranque(np.where(validos, demanda, np.nan), costos)
+    inicial = np.concatenate([firme, flexible]) / np.tile(escala, 2)
+    resultado = minimize(objetivo, inicial, jac=True, method='L-BFGS-B',
+                         bounds=[(0, None)] * (2 * k), options={'ftol': 1e-10, 'gtol': 1e-7})
+
+    firme, flexible = resultado.x[:k] * escala, resultado.x[k:] * escala
+    costo, _, _ = _costo(firme, flexible, demanda, pesos, anchos, costos)
+    costo_regla, _, _ = _costo(REGLA_FIJA[0] * pico, REGLA_FIJA[1] * pico, demanda, pesos, anchos, costos)
+    cubiertos = ((demanda <= firme + flexible) & validos).sum(axis=0) / validos.sum(axis=0)
+    media = (demanda * pesos).sum(axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tabla = pd.DataFrame({
+            'firme': firme,
+            'flexible': flexible,
+            'participacion_firme': firme / (firme + flexible) * 100,
+            'cobertura': cubiertos * 100,
+            'costo_diario': costo,
+            'costo_unitario': costo / media,
+            'costo_regla': costo_regla,
+            'ahorro_pct': (1 - costo / costo_regla) * 100,
+        }, index=pd.Index(nombres, name='entidad'))
+    tabla.attrs['iteraciones'] = resultado.nit
+    return tabla
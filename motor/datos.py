@@ -0,0 +1,57 @@
+"""
+PrediGas - Preparación de datos
+Transformaciones de las tablas de predicciones a la forma que consumen los tabs.
+"""
+
+import pandas as pd
+
+from motor.compactacion import dias_a_fechas, expandir_fechas, fecha_a_dia
+from motor.consultas import TablaBD
+
+
+def pivotar_desagregado(pred_modelo2):
+    """Pasa el modelo 2 de formato largo (Fecha, Variable, Real, Pred_XGBoost)
+    a una fila por fecha con columnas `<Variable>_pred` y `<Variable>_real`."""
+    ancho = pred_modelo2.pivot(index='Fecha', columns='Variable', values=['Pred_XGBoost', 'Real'])
+    sufijos = {'Pred_XGBoost': 'pred', 'Real': 'real'}
+    ancho.columns = [f"{var}_{sufijos[valor]}" for valor, var in ancho.columns]
+    return ancho.reset_index()
+
+
+def rango_fechas(df):
+    """Primera y última fecha de `df` como Timestamps."""
+    if isinstance(df, TablaBD):
+        return df.rango()
+    fechas = df['Fecha']
+    if fechas.dtype.kind == 'i':
+        return tuple(dias_a_fechas([fechas.min(), fechas.max()]))
+    return fechas.min(), fechas.max()
+
+
+def filtrar_ventana(df, fecha_inicio, fecha_fin, columnas=None):
+    """Filas de `df` con Fecha dentro de [fecha_inicio, fecha_fin] (solo Fecha
+    y `columnas` si se indican).
+
+    En tablas compactas el filtro se hace sobre los días int32 y solo la
+    ventana resultante vuelve a tener fechas. En una `TablaBD` el filtro se
+    resuelve en la base."""
+    if isinstance(df, TablaBD):
+        return expandir_fechas(df.ventana(fecha_inicio, fecha_fin, columnas))
+    if columnas is not None:
+        df = df[['Fecha'] + [c for c in columnas if c != 'Fecha']]
+    if df['Fecha'].dtype.kind == 'i':
+        dias = df['Fecha']
+        ventana = df[(dias >= fecha_a_dia(fecha_inicio)) & (dias <= fecha_a_dia(fecha_fin))]
+        return expandir_fechas(ventana)
+    return df[
+        (df['Fecha'] >= pd.to_datetime(fecha_inicio)) &
+        (df['Fecha'] <= pd.to_datetime(fecha_fin))
+    ]
+
+
+def agregado_mensual(df, fecha_inicio, fecha_fin, columna):
+    """Promedio, mínimo y máximo de `columna` por mes (1-12) dentro de la ventana."""
+    if isinstance(df, TablaBD):
+        return df.mensual(fecha_inicio, fecha_fin, columna)
+    ventana = filtrar_ventana(df, fecha_inicio, fecha_fin, [columna])
+    return ventana.groupby(ventana['Fecha'].dt.month.rename('Mes'))[columna].agg(['mean', 'min', 'max'])
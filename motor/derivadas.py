@@ -0,0 +1,109 @@
+"""
+PrediGas - Series derivadas
+Spreads, participaciones, razones y crecimientos declarados una sola vez.
+
+Cada definición es una expresión de `DataFrame.eval` sobre columnas base (o una
+función para las que necesitan alinear fechas). La misma expresión se puede
+evaluar fila a fila sobre una tabla completa (se calcula una vez al cargar y
+queda cacheada junto a las series base) o sobre los agregados de una ventana
+(p. ej. la media de la tabla resumen), que da las participaciones como razón
+de promedios, igual que los KPIs.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+COSTA = 'Demanda_Costa_Total_MBTUD_pred'
+INTERIOR = 'Demanda_Interior_Total_MBTUD_pred'
+SECTORES = ['Industrial', 'Refineria', 'Petrolero', 'GeneracionTermica',
+            'Residencial', 'Comercial', 'GNVC', 'Compresora']
+
+
+def crecimiento_anual(columna, tolerancia=pd.Timedelta(days=7)):
+    """Variación % frente al mismo día del año anterior (29-feb pasa a 28-feb).
+
+    Si ese día no tiene fila (fin de semana, festivo) se toma la última fecha
+    anterior con fila, hasta `tolerancia` antes; más allá queda NaN."""
+    def calcular(df):
+        fechas = df['Fecha'].to_numpy()
+        if fechas.dtype.kind != 'M':
+            fechas = fechas.astype(np.int64).astype('datetime64[D]')
+        fechas = pd.DatetimeIndex(fechas).as_unit('ns')
+        consulta = pd.DataFrame({
+            'Fecha': fechas - pd.DateOffset(years=1),
+            'fila': np.arange(len(df)),
+        }).sort_values('Fecha', kind='stable')
+        historia = pd.DataFrame({
+            'Fecha': fechas,
+            'anterior': df[columna].to_numpy(dtype=float),
+        }).sort_values('Fecha', kind='stable')
+        alineado = pd.merge_asof(consulta, historia, on='Fecha', direction='backward', tolerance=tolerancia)
+        anterior = np.empty(len(df))
+        anterior[alineado['fila'].to_numpy()] = alineado['anterior'].to_numpy()
+        return (df[columna].to_numpy(dtype=float) / anterior - 1) * 100
+    calcular.columnas = ['Fecha', columna]
+    return calcular
+
+
+DERIVADAS = {
+    'Spread_TTF_HH': 'TTF_pred - Henry_Hub_pred',
+    'Ratio_Costa_Interior': f'{COSTA} / {INTERIOR}',
+    'Participacion_Costa': f'{COSTA} / ({COSTA} + {INTERIOR}) * 100',
+    'Participacion_Interior': f'{INTERIOR} / ({COSTA} + {INTERIOR}) * 100',
+    **{f'Participacion_{sector}': f'Demanda_{sector}_Total_MBTUD_pred / Demanda_Total_pred * 100'
+       for sector in SECTORES},
+    'Crecimiento_Anual_Demanda': crecimiento_anual('Demanda_Total_pred'),
+    'Crecimiento_Anual_HH': crecimiento_anual('Henry_Hub_pred'),
+    'Crecimiento_Anual_TTF': crecimiento_anual('TTF_pred'),
+}
+
+_IDENTIFICADOR = re.compile(r'[A-Za-z_]\w*')
+
+
+def dependencias(definicion):
+    """Columnas base que usa una definición."""
+    if callable(definicion):
+        return set(definicion.columnas)
+    return set(_IDENTIFICADOR.findall(definicion))
+
+
+def ampliar(df, definiciones=DERIVADAS):
+    """`df` con las series derivadas cuyas columnas base están todas en `df`.
+
+    Se evalúan vectorizadas sobre los arreglos completos; las que dependen de
+    otra tabla se omiten (se pueden evaluar sobre agregados)."""
+    nuevas = {}
+    for nombre, definicion in definiciones.items():
+        if nombre in df.columns or not dependencias(definicion) <= set(df.columns):
+            continue
+        if callable(definicion):
+            nuevas[nombre] = definicion(df)
+        else:
+            nuevas[nombre] = df.eval(definicion, engine='python').to_numpy()
+    if not nuevas:
+        return df
+    tipo = np.result_type(*[df[c].dtype for c in df.columns if df[c].dtype.kind == 'f'])
+    return df.assign(**{nombre: np.asarray(valores, dtype=tipo) for nombre, valores in nuevas.items()})
+
+
+def sobre_agregados(valores, definiciones=DERIVADAS):
+    """Evalúa las definiciones de expresión sobre una Serie de agregados
+    indexada por columna (p. ej. `resumen['media']`), o sobre un DataFrame con
+    una fila por ventana y una columna por variable (devuelve un DataFrame)."""
+    por_ventana = isinstance(valores, pd.DataFrame)
+    marco = valores if por_ventana else valores.to_frame().T
+    resultado = {}
+    for nombre, definicion in definiciones.items():
+        if callable(definicion) or not dependencias(definicion) <= set(marco.columns):
+            continue
+        resultado[nombre] = marco.eval(definicion, engine='python').to_numpy(dtype=float)
+    if por_ventana:
+        return pd.DataFrame(resultado, index=valores.index, dtype=float)
+    return pd.Series({nombre: evaluado[0] for nombre, evaluado in resultado.items()}, dtype=float)
+
+
+def nombre_participacion(columna):
+    """'Demanda_Industrial_Total_MBTUD_pred' -> 'Participacion_Industrial'."""
+    return 'Participacion_' + columna.removeprefix('Demanda_').removesuffix('_Total_MBTUD_pred')
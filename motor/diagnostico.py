@@ -0,0 +1,68 @@
+"""
+PrediGas - Diagnóstico de residuos
+Residuos Real - Pred, autocorrelación por FFT (O(n log n)) y autocorrelación
+parcial por Durbin-Levinson.
+"""
+
+import numpy as np
+
+
+def variables_con_residuo(*tablas):
+    """Nombres base con columnas `<base>_real` y `<base>_pred` en alguna tabla."""
+    bases = []
+    for df in tablas:
+        for columna in df.columns:
+            if columna.endswith('_pred') and columna[:-5] + '_real' in df.columns:
+                bases.append(columna[:-5])
+    return bases
+
+
+def acf_fft(x, nlags):
+    """Autocorrelación muestral hasta `nlags` (incluye el rezago 0)."""
+    x = np.asarray(x, dtype=float)
+    x = x - x.mean()
+    n = len(x)
+    tamano = 1 << (2 * n - 1).bit_length()
+    espectro = np.fft.rfft(x, tamano)
+    autocov = np.fft.irfft(espectro * np.conj(espectro), tamano)[:nlags + 1]
+    if autocov[0] == 0:
+        return np.full(nlags + 1, np.nan)
+    return autocov / autocov[0]
+
+
+def pacf_desde_acf(acf):
+    """Autocorrelación parcial a partir de la ACF (recursión de Durbin-Levinson)."""
+    nlags = len(acf) - 1
+    pacf = np.ones(nlags + 1)
+    phi = np.zeros(nlags + 1)
+    varianza = 1.0
+    for k in range(1, nlags + 1):
+        reflexion = (acf[k] - phi[1:k] @ acf[k - 1:0:-1]) / varianza
+        phi[1:k] = phi[1:k] - reflexion * phi[k - 1:0:-1]
+        phi[k] = reflexion
+        varianza *= 1 - reflexion ** 2
+        pacf[k] = reflexion
+    return pacf
+
+
+def diagnostico(df, base, nlags=30):
+    """Residuos y autocorrelaciones de `base` en la ventana `df`.
+
+    Devuelve un dict con fecha, pred, residuo, acf, pacf y la banda de
+    confianza del 95% (±1.96/√n)."""
+    datos = df[['Fecha', f'{base}_real', f'{base}_pred']].dropna()
+    real = datos[f'{base}_real'].to_numpy(dtype=float)
+    pred = datos[f'{base}_pred'].to_numpy(dtype=float)
+    residuo = real - pred
+
+    n = len(residuo)
+    nlags = max(0, min(nlags, n - 1))
+    acf = acf_fft(residuo, nlags) if n > 1 else np.array([np.nan])
+    return {
+        'fecha': datos['Fecha'].to_numpy(),
+        'pred': pred,
+        'residuo': residuo,
+        'acf': acf,
+        'pacf': pacf_desde_acf(acf) if n > 1 else acf,
+        'banda': 1.96 / np.sqrt(n) if n else np.nan,
+    }
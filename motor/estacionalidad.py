@@ -0,0 +1,124 @@
+"""
+PrediGas - Descomposición estacional
+Tendencia lineal + estacionalidad anual y semanal por armónicos de Fourier,
+ajustada por mínimos cuadrados para todas las variables a la vez (una sola
+resolución con la matriz de diseño compartida). Se calcula una vez al cargar y
+deja como consulta inmediata el perfil mensual, la amplitud y los meses pico.
+
+Con menos de `MINIMO_DIAS_TENDENCIA` de historia la pendiente y el ciclo anual
+no se distinguen (la pendiente se come parte de la oscilación): en ese caso no
+se ajusta tendencia, solo el nivel, y la pendiente queda en NaN.
+"""
+
+import numpy as np
+import pandas as pd
+
+ARMONICOS_ANUALES = 2
+ARMONICOS_SEMANALES = 2
+MINIMO_DIAS_TENDENCIA = 2 * 365
+MESES = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+
+_EPOCA = np.datetime64('1970-01-01', 'D')
+
+
+def _dias(fechas):
+    fechas = np.asarray(fechas)
+    if fechas.dtype.kind == 'M':
+        return (fechas.astype('datetime64[D]') - _EPOCA).astype(np.int64)
+    return fechas.astype(np.int64)
+
+
+def _armonicos(dias, periodo, cantidad):
+    angulo = 2 * np.pi * np.outer(dias / periodo, np.arange(1, cantidad + 1))
+    return np.hstack([np.cos(angulo), np.sin(angulo)])
+
+
+def _diseno(dias, origen, con_tendencia):
+    anios = (dias - origen) / 365.25
+    return np.hstack([
+        np.ones((len(dias), 1)),
+        anios[:, None][:, :int(con_tendencia)],
+        _armonicos(dias, 365.25, ARMONICOS_ANUALES),
+        _armonicos(dias, 7, ARMONICOS_SEMANALES),
+    ])
+
+
+def _ajustar(X, Y):
+    """Coeficientes por columna; las columnas con NaN se ajustan solo con sus filas válidas."""
+    validas = ~np.isnan(Y)
+    completas = validas.all(axis=0)
+    beta = np.full((X.shape[1], Y.shape[1]), np.nan)
+    if completas.any():
+        beta[:, completas] = np.linalg.lstsq(X, Y[:, completas], rcond=None)[0]
+    for j in np.flatnonzero(~completas):
+        if validas[:, j].sum() > X.shape[1]:
+            beta[:, j] = np.linalg.lstsq(X[validas[:, j]], Y[validas[:, j], j], rcond=None)[0]
+    return beta
+
+
+def descomponer(*tablas, sufijo='_pred'):
+    """Descomposición de todas las columnas `*<sufijo>` de las tablas dadas.
+
+    Devuelve un dict con:
+      - 'tendencia', 'estacional': DataFrames por tabla (Fecha + variables)
+      - 'perfil_mensual': 12 x variables, desviación estacional media de cada mes
+      - 'resumen': por variable, amplitud, mes_pico, mes_valle y pendiente_anual
+        (NaN si la tabla cubre menos de `MINIMO_DIAS_TENDENCIA`)
+    """
+    tendencias, estacionales, perfiles, pendientes = [], [], [], []
+    for df in tablas:
+        columnas = [c for c in df.columns if c.endswith(sufijo)]
+        dias = _dias(df['Fecha'].to_numpy())
+        origen = dias.min()
+        con_tendencia = dias.max() - origen >= MINIMO_DIAS_TENDENCIA
+        X = _diseno(dias, origen, con_tendencia)
+        beta = _ajustar(X, df[columnas].to_numpy(dtype=float))
+
+        # Nivel (y pendiente si se ajustó) van a la tendencia; el resto es estacional
+        nivel = 1 + con_tendencia
+        fechas = pd.to_datetime(dias, unit='D')
+        tendencia = pd.DataFrame(X[:, :nivel] @ beta[:nivel], columns=columnas)
+        estacional = pd.DataFrame(X[:, nivel:] @ beta[nivel:], columns=columnas)
+        tendencia.insert(0, 'Fecha', fechas)
+        estacional.insert(0, 'Fecha', fechas)
+        tendencias.append(tendencia)
+        estacionales.append(estacional)
+
+        # Perfil mensual: componente anual evaluada en cada día de un año de referencia
+        anual = slice(nivel, nivel + 2 * ARMONICOS_ANUALES)
+        referencia = np.arange(np.datetime64('2001-01-01'), np.datetime64('2002-01-01'))
+        X_ref = _diseno(_dias(referencia), origen, con_tendencia)
+        anual_ref = pd.DataFrame(X_ref[:, anual] @ beta[anual], columns=columnas)
+        perfiles.append(anual_ref.groupby(pd.DatetimeIndex(referencia).month).mean())
+        pendientes.append(pd.Series(beta[1] if con_tendencia else np.nan, index=columnas))
+
+    perfil = pd.concat(perfiles, axis=1)
+    perfil.index = MESES
+    resumen = pd.DataFrame({
+        'amplitud': perfil.max() - perfil.min(),
+        'mes_pico': perfil.idxmax(),
+        'mes_valle': perfil.idxmin(),
+        'pendiente_anual': pd.concat(pendientes),
+    })
+    return {
+        'tendencia': tendencias,
+        'estacional': estacionales,
+        'perfil_mensual': perfil,
+        'resumen': resumen,
+    }
+
+
+def descomponer_bd(*tablas, sufijo='_pred'):
+    """`descomponer` sobre tablas de la base (motor/consultas.py), leyendo una
+    columna a la vez: en memoria nunca hay más de una serie del histórico.
+
+    Devuelve solo 'perfil_mensual' y 'resumen' (las componentes diarias
+    ocuparían tanto como las tablas)."""
+    perfiles, resumenes = [], []
+    for tabla in tablas:
+        desde, hasta = tabla.rango()
+        for columna in [c for c in tabla.columns if c.endswith(sufijo)]:
+            parte = descomponer(tabla.ventana(desde, hasta, [columna]), sufijo=sufijo)
+            perfiles.append(parte['perfil_mensual'])
+            resumenes.append(parte['resumen'])
+    return {'perfil_mensual': pd.concat(perfiles, axis=1), 'resumen': pd.concat(resumenes)}
@@ -0,0 +1,83 @@
+"""
+PrediGas - Exportación
+Escritura por bloques de tablas a CSV, Parquet o XLSX. Ningún formato arma el
+archivo completo como un string en memoria: los bloques se escriben a un
+archivo temporal en disco que se entrega abierto en modo binario.
+"""
+
+import importlib.util
+import tempfile
+
+FILAS_POR_BLOQUE = 50_000
+
+FORMATOS = {
+    'CSV': {'extension': 'csv', 'mime': 'text/csv', 'requiere': None},
+    'Parquet': {'extension': 'parquet', 'mime': 'application/vnd.apache.parquet', 'requiere': 'pyarrow'},
+    'XLSX': {
+        'extension': 'xlsx',
+        'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'requiere': 'openpyxl',
+    },
+}
+
+
+def formatos_disponibles():
+    """Formatos cuya dependencia opcional está instalada."""
+    return [nombre for nombre, info in FORMATOS.items()
+            if info['requiere'] is None or importlib.util.find_spec(info['requiere'])]
+
+
+def bloques(df, filas=FILAS_POR_BLOQUE):
+    for inicio in range(0, len(df), filas):
+        yield df.iloc[inicio:inicio + filas]
+
+
+def bloques_csv(df, filas=FILAS_POR_BLOQUE):
+    """Genera el CSV de `df` en trozos de bytes (encabezado en el primero)."""
+    for i, bloque in enumerate(bloques(df, filas)):
+        yield bloque.to_csv(index=False, header=i == 0).encode('utf-8')
+    if not len(df):
+        yield df.to_csv(index=False).encode('utf-8')
+
+
+def _escribir_csv(df, destino):
+    for trozo in bloques_csv(df):
+        destino.write(trozo)
+
+
+def _escribir_parquet(df, destino):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(destino, esquema) as escritor:
+        for bloque in bloques(df):
+            escritor.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+
+
+def _escribir_xlsx(df, destino):
+    from openpyxl import Workbook
+
+    # write_only no mantiene las celdas en memoria
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet()
+    hoja.append(list(df.columns))
+    for bloque in bloques(df):
+        for fila in bloque.itertuples(index=False):
+            hoja.append([valor.to_pydatetime() if hasattr(valor, 'to_pydatetime') else valor
+                         for valor in fila])
+    libro.save(destino)
+
+
+_ESCRITORES = {'CSV': _escribir_csv, 'Parquet': _escribir_parquet, 'XLSX': _escribir_xlsx}
+
+
+def exportar(df, formato):
+    """Archivo binario (io.BufferedReader, al inicio) con `df` en `formato`.
+
+    Es uno de los tipos que acepta `st.download_button`; el temporal se borra
+    al cerrarlo, el lector lo sigue teniendo abierto hasta que se libera."""
+    with tempfile.NamedTemporaryFile(suffix=f".{FORMATOS[formato]['extension']}") as destino:
+        _ESCRITORES[formato](df, destino)
+        destino.flush()
+        return open(destino.name, 'rb')
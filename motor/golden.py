@@ -0,0 +1,399 @@
+"""
+PrediGas - Salidas de referencia (golden)
+Guarda los números ejecutivos (KPIs de la tabla resumen, spread,
+participaciones, distribución mensual, Top 5 y leaderboard de métricas) que
+produce la implementación de referencia en pandas, la misma lógica del
+dashboard original, para muchas ventanas de fechas sobre los datos reales y
+sobre datos sintéticos. Cada motor optimizado se compara contra esas
+instantáneas dentro de las tolerancias y se cronometra en la misma pasada.
+
+    python -m motor.golden capturar
+    python -m motor.golden verificar --motores motor sqlite
+"""
+
+import argparse
+import gzip
+import json
+import math
+import sys
+import tempfile
+import time
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DIRECTORIO_GOLDEN = Path('golden')
+ARCHIVO = 'instantaneas.json.gz'
+TOLERANCIAS = {'rtol': 1e-5, 'atol': 1e-8}
+
+VENTANAS_ALEATORIAS = 24
+SEMILLAS_SINTETICAS = (1, 2, 3)
+
+VARIABLES_DESAGREGADAS = [
+    'Demanda_Total_MBTUD', 'Demanda_Costa_Total_MBTUD', 'Demanda_Interior_Total_MBTUD',
+    'Demanda_Industrial_Total_MBTUD', 'Demanda_Refineria_Total_MBTUD', 'Demanda_Petrolero_Total_MBTUD',
+    'Demanda_GeneracionTermica_Total_MBTUD', 'Demanda_Residencial_Total_MBTUD',
+    'Demanda_Comercial_Total_MBTUD', 'Demanda_GNVC_Total_MBTUD', 'Demanda_Compresora_Total_MBTUD',
+]
+COSTA = 'Demanda_Costa_Total_MBTUD_pred'
+INTERIOR = 'Demanda_Interior_Total_MBTUD_pred'
+SECTORES = [f'{v}_pred' for v in VARIABLES_DESAGREGADAS[3:]]
+
+
+# ===========================================================================
+# Conjuntos de datos
+# ===========================================================================
+
+def datos_reales():
+    """Los CSV de data/ tal como se leen (sin compactar)."""
+    from motor.artefactos import RUTAS, leer_metricas
+
+    metricas_agregado, metricas_desagregado = leer_metricas()
+    return {
+        'modelo1': pd.read_csv(RUTAS['pred_modelo1'], parse_dates=['Fecha']),
+        'modelo2': pd.read_csv(RUTAS['pred_modelo2'], parse_dates=['Fecha']),
+        'metricas_agregado': metricas_agregado,
+        'metricas_desagregado': metricas_desagregado,
+    }
+
+
+def datos_sinteticos(semilla, dias=900):
+    """Tablas con el esquema de los CSV: estacionalidad anual, ruido, huecos
+    en el modelo 2, NaN sueltos en el modelo 1 y el modelo 2 empezando antes.
+    Las semillas pares quedan representables en float32 (camino compacto)."""
+    azar = np.random.default_rng(semilla)
+    inicio = pd.Timestamp('2020-01-01') + pd.Timedelta(days=int(azar.integers(0, 365)))
+    fechas = pd.date_range(inicio, periods=dias, freq='D')
+    anual = np.sin(2 * np.pi * fechas.dayofyear.to_numpy() / 365.25)
+
+    def serie(nivel, amplitud, ruido):
+        return nivel * (1 + amplitud * anual + ruido * azar.standard_normal(dias))
+
+    niveles = azar.uniform(2_000, 300_000, len(SECTORES))
+    sectores = {v: serie(n, azar.uniform(0.02, 0.3), azar.uniform(0.01, 0.2))
+                for v, n in zip(VARIABLES_DESAGREGADAS[3:], niveles)}
+    total = sum(sectores.values())
+    proporcion_costa = azar.uniform(0.4, 0.7)
+    pred = {'Demanda_Total_MBTUD': total, 'Demanda_Costa_Total_MBTUD': total * proporcion_costa,
+            'Demanda_Interior_Total_MBTUD': total * (1 - proporcion_costa), **sectores}
+
+    largo = pd.concat([
+        pd.DataFrame({'Fecha': fechas, 'Variable': variable, 'Real': valores * (1 + 0.05 * azar.standard_normal(dias)),
+                      'Pred_XGBoost': valores})
+        for variable, valores in pred.items()
+    ], ignore_index=True)
+    largo = largo.sample(frac=0.97, random_state=semilla).sort_values(['Variable', 'Fecha'], ignore_index=True)
+
+    desfase = int(azar.integers(0, 30))
+    modelo1 = pd.DataFrame({
+        'Fecha': fechas[desfase:],
+        'Demanda_Total_real': total[desfase:] * (1 + 0.05 * azar.standard_normal(dias - desfase)),
+        'Demanda_Total_pred': total[desfase:],
+        'Henry_Hub_real': serie(3, 0.2, 0.1)[desfase:],
+        'Henry_Hub_pred': serie(3, 0.2, 0.05)[desfase:],
+        'TTF_real': serie(35, 0.3, 0.1)[desfase:],
+        'TTF_pred': serie(35, 0.3, 0.05)[desfase:],
+    })
+    modelo1.loc[azar.choice(len(modelo1), 5, replace=False), 'Henry_Hub_pred'] = np.nan
+
+    if semilla % 2 == 0:
+        for tabla, columnas in ((modelo1, modelo1.columns[1:]), (largo, ['Real', 'Pred_XGBoost'])):
+            tabla[columnas] = tabla[columnas].astype(np.float32).astype(float)
+
+    metricas = lambda variables: pd.DataFrame({
+        'Variable': variables,
+        'MAE_Test': azar.uniform(0.1, 5e4, len(variables)),
+        'RMSE_Test': azar.uniform(0.1, 8e4, len(variables)),
+        'MAPE_Test': azar.uniform(0.5, 60, len(variables)),
+        'R2_Test': azar.uniform(-1, 1, len(variables)),
+    })
+    metricas_agregado = metricas(['Demanda', 'Henry Hub', 'TTF']).assign(Modelo='XGBoost')
+    return {
+        'modelo1': modelo1,
+        'modelo2': largo,
+        'metricas_agregado': metricas_agregado,
+        'metricas_desagregado': metricas(VARIABLES_DESAGREGADAS),
+    }
+
+
+def ventanas(datos, semilla, n=VENTANAS_ALEATORIAS):
+    """Ventanas [inicio, fin]: todo el rango, cada mes, n aleatorias, un solo
+    día, una que empieza antes del modelo 1 y una fuera del rango (vacía)."""
+    fechas = pd.concat([datos['modelo1']['Fecha'], datos['modelo2']['Fecha']])
+    desde, hasta = fechas.min(), fechas.max()
+    resultado = [(desde, hasta), (hasta, hasta), (desde, desde + pd.Timedelta(days=10)),
+                 (hasta + pd.Timedelta(days=1), hasta + pd.Timedelta(days=60))]
+    for mes in pd.date_range(desde.to_period('M').start_time, hasta, freq='MS'):
+        resultado.append((mes, mes + pd.offsets.MonthEnd(0)))
+    azar = np.random.default_rng(semilla)
+    dias = (hasta - desde).days
+    for _ in range(n):
+        inicio = desde + pd.Timedelta(days=int(azar.integers(0, dias)))
+        resultado.append((inicio, min(hasta, inicio + pd.Timedelta(days=int(azar.integers(1, dias))))))
+    return [(a.normalize(), b.normalize()) for a, b in resultado]
+
+
+def conjuntos():
+    """Nombre -> datos de todos los conjuntos del arnés."""
+    resultado = {'reales': datos_reales()}
+    for semilla in SEMILLAS_SINTETICAS:
+        resultado[f'sintetico_{semilla}'] = datos_sinteticos(semilla)
+    return resultado
+
+
+# ===========================================================================
+# Motores: preparar(datos) -> estado; calcular(estado, inicio, fin) -> salidas
+# ===========================================================================
+
+def _ordenar_metricas(datos):
+    """Leaderboard de referencia: todas las filas por MAPE ascendente."""
+    agregado = datos['metricas_agregado'].assign(Variable=lambda d: d['Variable'].str.strip())
+    desagregado = datos['metricas_desagregado'].assign(
+        Variable=lambda d: d['Variable'].str.strip(), Modelo='XGBoost desagregado'
+    )
+    tabla = pd.concat([agregado, desagregado], ignore_index=True)
+    tabla = tabla.sort_values(['MAPE_Test', 'Variable'], kind='stable', ignore_index=True)
+    return tabla.rename(columns={'Modelo': 'modelo', 'Variable': 'variable', 'MAPE_Test': 'MAPE'})
+
+
+def _preparar_referencia(datos):
+    modelo2 = datos['modelo2'].pivot_table(index='Fecha', columns='Variable', values='Pred_XGBoost')
+    modelo2.columns = [f'{c}_pred' for c in modelo2.columns]
+    return {'modelo1': datos['modelo1'], 'modelo2': modelo2.reset_index(), 'metricas': _ordenar_metricas(datos)}
+
+
+def _calcular_referencia(estado, inicio, fin):
+    """Cálculos del dashboard original, columna a columna con pandas."""
+    m1 = estado['modelo1'][(estado['modelo1']['Fecha'] >= inicio) & (estado['modelo1']['Fecha'] <= fin)]
+    m2 = estado['modelo2'][(estado['modelo2']['Fecha'] >= inicio) & (estado['modelo2']['Fecha'] <= fin)]
+
+    columnas = {**{c: m1[c] for c in ('Demanda_Total_pred', 'Henry_Hub_pred', 'TTF_pred')},
+                **{c: m2[c] for c in m2.columns if c != 'Fecha'},
+                'Spread_TTF_HH': m1['TTF_pred'] - m1['Henry_Hub_pred']}
+    resumen = pd.DataFrame({
+        nombre: {
+            'media': s.mean(), 'mediana': s.median(), 'desv': s.std(), 'min': s.min(), 'max': s.max(),
+            'p5': s.quantile(0.05), 'p95': s.quantile(0.95), 'cv': s.std() / s.mean() * 100,
+        } for nombre, s in columnas.items()
+    }).T
+
+    demanda_total_prom = m1['Demanda_Total_pred'].mean()
+    costa_prom, interior_prom = m2[COSTA].mean(), m2[INTERIOR].mean()
+    participaciones = {
+        'Participacion_Costa': costa_prom / (costa_prom + interior_prom) * 100,
+        'Participacion_Interior': interior_prom / (costa_prom + interior_prom) * 100,
+        **{_participacion(c): m2[c].mean() / demanda_total_prom * 100 for c in SECTORES},
+    }
+
+    mensual = m1.groupby(m1['Fecha'].dt.month)['Demanda_Total_pred'].agg(['mean', 'min', 'max'])
+    mensual.columns = [f'Demanda_Total_pred/{c}' for c in mensual.columns]
+    mensual_sectores = m2.groupby(m2['Fecha'].dt.month)[SECTORES].mean()
+    mensual_sectores.columns = [f'{c}/mean' for c in mensual_sectores.columns]
+
+    promedios = pd.Series({_nombre_sector(c): m2[c].mean() for c in SECTORES})
+    return {
+        'resumen': resumen,
+        'spread': columnas['Spread_TTF_HH'].agg(['mean', 'max', 'min']),
+        'participaciones': pd.Series(participaciones),
+        'mensual': pd.concat([mensual, mensual_sectores], axis=1),
+        'top5': promedios.nlargest(5),
+        'metricas': estado['metricas'][['modelo', 'variable', 'MAPE']],
+    }
+
+
+def _participacion(columna):
+    return 'Participacion_' + columna.removeprefix('Demanda_').removesuffix('_Total_MBTUD_pred')
+
+
+def _nombre_sector(columna):
+    return columna.removeprefix('Demanda_').removesuffix('_Total_MBTUD_pred').replace('_', ' ')
+
+
+def _preparar_motor(datos, backend=None):
+    from motor import consultas, metricas
+    from motor.compactacion import compactar
+    from motor.datos import pivotar_desagregado
+    from motor.derivadas import ampliar
+
+    modelo1 = ampliar(compactar(datos['modelo1']))
+    modelo2 = ampliar(pivotar_desagregado(compactar(datos['modelo2'])))
+    temporal = tempfile.TemporaryDirectory()
+    ruta_metricas = Path(temporal.name) / 'metricas.sqlite'
+    with closing(metricas.conectar(ruta_metricas)) as conexion:
+        metricas.registrar_corrida(conexion, 'golden', [
+            (datos['metricas_agregado'], 'XGBoost'), (datos['metricas_desagregado'], 'XGBoost desagregado'),
+        ])
+    if backend == 'sqlite':
+        ruta = Path(temporal.name) / 'predicciones.sqlite'
+        consultas.publicar({'modelo1': modelo1, 'desagregado': modelo2}, ruta)
+        modelo1, modelo2 = consultas.TablaBD(ruta, 'modelo1'), consultas.TablaBD(ruta, 'desagregado')
+    return {'modelo1': modelo1, 'modelo2': modelo2, 'metricas': ruta_metricas, 'temporal': temporal}
+
+
+def _calcular_motor(estado, inicio, fin):
+    """Los mismos números por el camino del dashboard actual (motor/)."""
+    from motor import metricas
+    from motor.datos import agregado_mensual, filtrar_ventana
+    from motor.derivadas import sobre_agregados
+    from motor.resumen import marco_ventana, tabla_resumen, top_sectores
+
+    m1 = filtrar_ventana(estado['modelo1'], inicio, fin)
+    m2 = filtrar_ventana(estado['modelo2'], inicio, fin)
+    resumen = tabla_resumen(marco_ventana(m1, m2))
+    agregados = sobre_agregados(resumen['media'])
+
+    mensual = agregado_mensual(estado['modelo1'], inicio, fin, 'Demanda_Total_pred')
+    mensual.columns = [f'Demanda_Total_pred/{c}' for c in mensual.columns]
+    mensual_sectores = pd.DataFrame({
+        f'{c}/mean': agregado_mensual(estado['modelo2'], inicio, fin, c)['mean'] for c in SECTORES
+    })
+
+    filas = metricas.contar(estado['metricas'])
+    return {
+        'resumen': resumen,
+        'spread': resumen.loc['Spread_TTF_HH', ['media', 'max', 'min']].set_axis(['mean', 'max', 'min']),
+        'participaciones': agregados,
+        'mensual': pd.concat([mensual, mensual_sectores], axis=1),
+        'top5': top_sectores(resumen),
+        'metricas': metricas.consultar(estado['metricas'], filas=filas)[['modelo', 'variable', 'MAPE']],
+    }
+
+
+MOTORES = {
+    'referencia': (_preparar_referencia, _calcular_referencia),
+    'motor': (_preparar_motor, _calcular_motor),
+    'sqlite': (lambda datos: _preparar_motor(datos, 'sqlite'), _calcular_motor),
+}
+
+
+# ===========================================================================
+# Instantáneas y comparación
+# ===========================================================================
+
+def _numero(valor):
+    valor = float(valor)
+    return None if math.isnan(valor) else valor
+
+
+def aplanar(salidas):
+    """Salidas de un motor -> dict plano clave -> número o texto."""
+    plano = {}
+    for variable, fila in salidas['resumen'].iterrows():
+        for estadistica, valor in fila.items():
+            plano[f'resumen/{variable}/{estadistica}'] = _numero(valor)
+    for nombre in ('spread', 'participaciones'):
+        for clave, valor in salidas[nombre].items():
+            plano[f'{nombre}/{clave}'] = _numero(valor)
+    for mes, fila in salidas['mensual'].iterrows():
+        for columna, valor in fila.items():
+            plano[f'mensual/{int(mes)}/{columna}'] = _numero(valor)
+    # En una ventana sin datos no hay ranking: el orden de los NaN no cuenta
+    top5 = salidas['top5'].dropna()
+    plano['top5'] = ' | '.join(top5.index)
+    for i, valor in enumerate(top5.to_numpy()):
+        plano[f'top5/{i}'] = _numero(valor)
+    metricas = salidas['metricas'].reset_index(drop=True)
+    plano['metricas'] = ' | '.join(metricas['modelo'] + ':' + metricas['variable'])
+    for i, valor in enumerate(metricas['MAPE']):
+        plano[f'metricas/{i}/MAPE'] = _numero(valor)
+    return plano
+
+
+def _casos(nombre, datos):
+    return [f'{nombre}/{a:%Y-%m-%d}/{b:%Y-%m-%d}' for a, b in ventanas(datos, semilla=len(nombre))]
+
+
+def ejecutar(motor, datos_por_conjunto):
+    """Corre un motor sobre todos los casos. Devuelve (salidas planas por caso,
+    tiempos con preparar_ms y los ms de cada ventana)."""
+    preparar, calcular = MOTORES[motor]
+    salidas, tiempos = {}, {'preparar_ms': 0.0, 'ventana_ms': []}
+    for nombre, datos in datos_por_conjunto.items():
+        inicio = time.perf_counter()
+        estado = preparar(datos)
+        tiempos['preparar_ms'] += (time.perf_counter() - inicio) * 1000
+        for caso in _casos(nombre, datos):
+            desde, hasta = (pd.Timestamp(f) for f in caso.split('/')[1:])
+            inicio = time.perf_counter()
+            resultado = calcular(estado, desde, hasta)
+            tiempos['ventana_ms'].append((time.perf_counter() - inicio) * 1000)
+            salidas[caso] = aplanar(resultado)
+    return salidas, tiempos
+
+
+def comparar(esperado, obtenido, tolerancias=TOLERANCIAS):
+    """Diferencias [(caso, clave, esperado, obtenido)] fuera de tolerancia.
+    Solo se revisan las claves de la instantánea; un motor puede calcular más."""
+    diferencias = []
+    for caso, valores in esperado.items():
+        actual = obtenido.get(caso, {})
+        for clave, valor in valores.items():
+            otro = actual.get(clave, 'falta')
+            if isinstance(valor, str) or valor is None or otro is None or isinstance(otro, str):
+                iguales = valor == otro
+            else:
+                iguales = math.isclose(valor, otro, rel_tol=tolerancias['rtol'], abs_tol=tolerancias['atol'])
+            if not iguales:
+                diferencias.append((caso, clave, valor, otro))
+    return diferencias
+
+
+def capturar(directorio=DIRECTORIO_GOLDEN):
+    """Guarda las salidas del motor de referencia como instantáneas."""
+    salidas, _ = ejecutar('referencia', conjuntos())
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    with gzip.open(directorio / ARCHIVO, 'wt', encoding='utf-8') as f:
+        json.dump(salidas, f, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return salidas
+
+
+def verificar(motores, directorio=DIRECTORIO_GOLDEN, tolerancias=TOLERANCIAS):
+    """Compara y cronometra cada motor. Devuelve (tabla, diferencias por motor)."""
+    with gzip.open(Path(directorio) / ARCHIVO, 'rt', encoding='utf-8') as f:
+        esperado = json.load(f)
+    datos = conjuntos()
+    filas, diferencias = [], {}
+    for motor in motores:
+        salidas, tiempos = ejecutar(motor, datos)
+        diferencias[motor] = comparar(esperado, salidas, tolerancias)
+        ventana_ms = np.array(tiempos['ventana_ms'])
+        filas.append({
+            'motor': motor,
+            'casos': len(salidas),
+            'diferencias': len(diferencias[motor]),
+            'preparar_ms': tiempos['preparar_ms'],
+            'ventana_p50_ms': np.percentile(ventana_ms, 50),
+            'ventana_p95_ms': np.percentile(ventana_ms, 95),
+            'total_ms': tiempos['preparar_ms'] + ventana_ms.sum(),
+        })
+    return pd.DataFrame(filas), diferencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Instantáneas de referencia de los números del dashboard.")
+    parser.add_argument('accion', choices=['capturar', 'verificar'])
+    parser.add_argument('--directorio', default=str(DIRECTORIO_GOLDEN))
+    parser.add_argument('--motores', nargs='+', default=list(MOTORES), choices=list(MOTORES))
+    parser.add_argument('--rtol', type=float, default=TOLERANCIAS['rtol'])
+    parser.add_argument('--atol', type=float, default=TOLERANCIAS['atol'])
+    args = parser.parse_args()
+
+    if args.accion == 'capturar':
+        salidas = capturar(args.directorio)
+        print(f"{len(salidas)} casos guardados en {Path(args.directorio) / ARCHIVO}")
+        return
+
+    tabla, diferencias = verificar(args.motores, args.directorio, {'rtol': args.rtol, 'atol': args.atol})
+    print(tabla.to_string(index=False, float_format='{:,.2f}'.format))
+    for motor, lista in diferencias.items():
+        for caso, clave, esperado, obtenido in lista[:10]:
+            print(f"{motor}: {caso} {clave}: esperado {esperado!r}, obtenido {obtenido!r}")
+    if any(diferencias.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+PrediGas - Transporte de gráficos
+Cada st.plotly_chart serializa la figura completa en cada rerun. plotly ya
+manda los arreglos numpy como binario (base64 con su dtype), pero las fechas
+van como texto ISO repetido en cada traza y los valores como float64.
+
+compactar_figura deja las fechas como milisegundos (float64, el número que
+entiende un eje de tipo fecha) y los valores como float32, ambos en binario.
+Se desactiva con PROYECTAGAS_GRAFICOS_BINARIOS=0.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from motor.compactacion import cabe_en_float32
+
+BINARIOS = os.environ.get('PROYECTAGAS_GRAFICOS_BINARIOS', '1') != '0'
+
+# Por debajo de esto la lista JSON es igual o más corta que el base64
+MINIMO_PUNTOS = 16
+
+_EJES = ('x', 'y')
+
+
+def _fechas(arreglo):
+    if arreglo.dtype.kind == 'M':
+        return arreglo
+    if arreglo.dtype == object and pd.api.types.infer_dtype(arreglo, skipna=True) in ('datetime', 'datetime64', 'date'):
+        return pd.to_datetime(arreglo).to_numpy()
+    return None
+
+
+def compactar_figura(fig):
+    """Modifica `fig` en el sitio (y la devuelve): fechas de x/y como ms en
+    float64 con su eje marcado como fecha, valores numéricos como float32."""
+    ejes_fecha = set()
+    for traza in fig.data:
+        for eje in _EJES:
+            if eje not in traza or traza[eje] is None:
+                continue
+            arreglo = np.asarray(traza[eje])
+            if arreglo.ndim != 1 or len(arreglo) < MINIMO_PUNTOS:
+                continue
+            fechas = _fechas(arreglo)
+            if fechas is not None:
+                traza[eje] = fechas.astype('datetime64[ms]').astype(np.int64).astype(np.float64)
+                ejes_fecha.add(traza[f'{eje}axis'] or eje)
+            elif arreglo.dtype.kind in 'iuf' and cabe_en_float32(arreglo.astype(np.float64)):
+                traza[eje] = arreglo.astype(np.float32)
+
+    # 'x2' -> layout.xaxis2; sin tipo explícito plotly tomaría los ms como eje lineal
+    for eje in ejes_fecha:
+        disposicion = fig.layout[f'{eje[0]}axis{eje[1:]}']
+        if disposicion.type is None:
+            disposicion.type = 'date'
+    return fig
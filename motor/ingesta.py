@@ -0,0 +1,232 @@
+"""
+PrediGas - Ingesta de CSV grandes
+Lectura de los CSV de predicciones por trozos en procesos paralelos. El archivo
+se parte por bytes en límites de fila, cada proceso lee su trozo con tipos
+fijos (tomados de una muestra del encabezado) y fechas ISO parseadas directo a
+días, y el proceso principal copia cada trozo una sola vez en los arreglos
+finales ya reservados. Cada proceso tiene un techo para la memoria que
+reserva (RLIMIT_DATA por encima de lo que hereda del padre).
+
+El resultado es el mismo que compactar(pd.read_csv(...)) (motor/compactacion.py).
+Los archivos por debajo de UMBRAL_PARALELO_MB se leen en un solo trozo sin
+levantar procesos.
+
+    python -m motor.ingesta data/predicciones_modelo2_desagregado.csv --trozo-mb 1
+"""
+
+import argparse
+import concurrent.futures
+import io
+import multiprocessing
+import os
+import resource
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from motor.compactacion import EPOCA, cabe_en_float32
+
+UMBRAL_PARALELO_MB = float(os.environ.get('PROYECTAGAS_INGESTA_UMBRAL_MB', 256))
+TROZO_MB = float(os.environ.get('PROYECTAGAS_INGESTA_TROZO_MB', 64))
+MEMORIA_PROCESO_MB = int(os.environ.get('PROYECTAGAS_INGESTA_MEMORIA_MB', 2048))
+FILAS_MUESTRA = 1000
+
+
+def particiones(ruta, tamano_trozo):
+    """Rangos de bytes [inicio, fin) de ~`tamano_trozo` cada uno, sin el
+    encabezado; cada corte se corre al siguiente salto de línea."""
+    total = os.path.getsize(ruta)
+    with open(ruta, 'rb') as f:
+        f.readline()
+        inicio = f.tell()
+        rangos = []
+        while inicio < total:
+            f.seek(min(inicio + tamano_trozo, total))
+            f.readline()
+            fin = min(f.tell(), total)
+            rangos.append((inicio, fin))
+            inicio = fin
+    return rangos
+
+
+def esquema(ruta, fechas=('Fecha',)):
+    """Nombres, tipos fijos y columnas enteras a partir de las primeras filas:
+    fechas como texto sin convertir, texto como categoría, lo numérico como float64 (las enteras
+    vuelven a int64 al unir si ningún trozo trae faltantes ni decimales)."""
+    muestra = pd.read_csv(ruta, nrows=FILAS_MUESTRA)
+    tipos, enteras = {}, set()
+    for columna, tipo in muestra.dtypes.items():
+        if columna in fechas:
+            tipos[columna] = object
+        elif tipo.kind not in 'iufb':
+            tipos[columna] = 'category'
+        else:
+            tipos[columna] = np.float64
+            if tipo.kind in 'iu':
+                enteras.add(columna)
+    return list(muestra.columns), tipos, enteras
+
+
+def _memoria_datos():
+    """Segmento de datos del proceso en bytes (VmData; 0 si no hay /proc)."""
+    try:
+        with open('/proc/self/status') as f:
+            for linea in f:
+                if linea.startswith('VmData:'):
+                    return int(linea.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def _limitar_memoria(limite_mb):
+    # Techo de memoria de datos (heap y mapeos privados) para lo que reserve el
+    # trozo: con fork el hijo hereda los mapeos del padre (Streamlit, sus hilos),
+    # que ya cuentan en RLIMIT_DATA, así que el techo se suma a lo heredado.
+    # Un trozo que no cabe falla con MemoryError.
+    if limite_mb:
+        limite = _memoria_datos() + limite_mb * 1024 ** 2
+        duro = resource.getrlimit(resource.RLIMIT_DATA)[1]
+        if duro != resource.RLIM_INFINITY:
+            limite = min(limite, duro)
+        resource.setrlimit(resource.RLIMIT_DATA, (limite, duro))
+
+
+def leer_trozo(ruta, inicio, fin, nombres, tipos, fechas=('Fecha',)):
+    """Columnas del trozo [inicio, fin) como arreglos, con lo que el proceso
+    principal necesita para elegir el tipo final sin volver a leerlas:
+    `(columna, arreglo, entero, cabe_float32)`. Fechas como días int32,
+    texto como categoría."""
+    with open(ruta, 'rb') as f:
+        f.seek(inicio)
+        texto = f.read(fin - inicio)
+    try:
+        df = pd.read_csv(io.BytesIO(texto), header=None, names=nombres, dtype=tipos, engine='c')
+    except pd.errors.ParserError as e:
+        # El tokenizador de C reporta el techo de memoria como error de parseo
+        if 'out of memory' in str(e):
+            raise MemoryError(str(e)) from e
+        raise
+    del texto
+
+    columnas = []
+    for columna in nombres:
+        valores = df[columna]
+        if columna in fechas:
+            dias = (valores.to_numpy().astype('datetime64[D]') - EPOCA).astype(np.int32)
+            columnas.append((columna, dias, True, True))
+        elif tipos[columna] == 'category':
+            columnas.append((columna, valores, False, False))
+        else:
+            arreglo = valores.to_numpy()
+            entero = not np.isnan(arreglo).any() and np.array_equal(arreglo, np.trunc(arreglo))
+            columnas.append((columna, arreglo, entero, cabe_en_float32(arreglo)))
+    return len(df), columnas
+
+
+def leer_csv(ruta, fechas=('Fecha',), progreso=None, procesos=None,
+             tamano_trozo=None, limite_memoria_mb=MEMORIA_PROCESO_MB):
+    """CSV compactado (igual que compactar(pd.read_csv(ruta, parse_dates=fechas))).
+
+    `progreso(bytes_leidos, bytes_totales)` se llama en el proceso principal
+    cada vez que termina un trozo."""
+    total = os.path.getsize(ruta)
+    nombres, tipos, enteras = esquema(ruta, fechas)
+    if tamano_trozo is None:
+        tamano_trozo = total if total < UMBRAL_PARALELO_MB * 1024 ** 2 else int(TROZO_MB * 1024 ** 2)
+    rangos = particiones(ruta, tamano_trozo)
+
+    trozos = [None] * len(rangos)
+    if len(rangos) <= 1:
+        for k, (inicio, fin) in enumerate(rangos):
+            trozos[k] = leer_trozo(ruta, inicio, fin, nombres, tipos, fechas)
+            if progreso:
+                progreso(fin, total)
+    else:
+        # fork y no spawn: Streamlit instala el script como __main__ y spawn lo
+        # volvería a ejecutar en cada proceso; aquí los hijos solo parsean su trozo
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=min(procesos or os.cpu_count(), len(rangos)),
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_limitar_memoria,
+            initargs=(limite_memoria_mb,),
+        ) as ejecutor:
+            pendientes = {
+                ejecutor.submit(leer_trozo, ruta, inicio, fin, nombres, tipos, fechas): k
+                for k, (inicio, fin) in enumerate(rangos)
+            }
+            leidos = rangos[0][0]
+            for tarea in concurrent.futures.as_completed(pendientes):
+                k = pendientes[tarea]
+                try:
+                    trozos[k] = tarea.result()
+                except MemoryError as e:
+                    raise MemoryError(
+                        f"Un trozo de {ruta} superó el techo de {limite_memoria_mb} MB por proceso; "
+                        f"baja PROYECTAGAS_INGESTA_TROZO_MB o sube PROYECTAGAS_INGESTA_MEMORIA_MB"
+                    ) from e
+                leidos += rangos[k][1] - rangos[k][0]
+                if progreso:
+                    progreso(leidos, total)
+
+    return _unir(nombres, trozos, enteras)
+
+
+def _unir(nombres, trozos, enteras):
+    """Un arreglo final por columna, reservado una vez y llenado trozo a trozo."""
+    filas = [n for n, _ in trozos]
+    limites = np.concatenate([[0], np.cumsum(filas, dtype=np.int64)])
+    resultado = {}
+    for j, columna in enumerate(nombres):
+        partes = [columnas[j] for _, columnas in trozos]
+        primera = partes[0][1] if partes else np.array([], np.float64)
+        if isinstance(primera, pd.Series):
+            serie = pd.Series(union_categoricals([p[1] for p in partes], sort_categories=True))
+            for _, columnas in trozos:
+                columnas[j] = None
+            # compactar solo deja como categoría el texto repetido
+            resultado[columna] = serie if len(serie.cat.categories) <= len(serie) // 2 else serie.astype(str)
+            continue
+        if primera.dtype == np.int32:
+            tipo = np.int32
+        elif columna in enteras and all(p[2] for p in partes):
+            tipo = np.int64
+        elif all(p[3] for p in partes):
+            tipo = np.float32
+        else:
+            tipo = np.float64
+        final = np.empty(limites[-1], dtype=tipo)
+        for k, parte in enumerate(partes):
+            final[limites[k]:limites[k + 1]] = parte[1]
+        resultado[columna] = final
+        # Los trozos de esta columna ya no hacen falta
+        for _, columnas in trozos:
+            columnas[j] = None
+    return pd.DataFrame(resultado, copy=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lee un CSV de predicciones por trozos en paralelo.")
+    parser.add_argument('ruta')
+    parser.add_argument('--trozo-mb', type=float, default=TROZO_MB)
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--memoria-mb', type=int, default=MEMORIA_PROCESO_MB)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    df = leer_csv(
+        args.ruta,
+        progreso=lambda leidos, total: print(f"\r{leidos / total:6.1%}", end='', flush=True),
+        procesos=args.procesos,
+        tamano_trozo=int(args.trozo_mb * 1024 ** 2),
+        limite_memoria_mb=args.memoria_mb,
+    )
+    print(f"\n{len(df):,} filas en {time.perf_counter() - inicio:.2f} s, "
+          f"{df.memory_usage(deep=True).sum() / 1024 ** 2:,.1f} MB")
+    print(df.dtypes.to_string())
+
+
+if __name__ == '__main__':
+    main()
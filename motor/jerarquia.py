@@ -0,0 +1,247 @@
+"""
+PrediGas - Jerarquía de agregación
+Árbol de nodos (zona → sector → subregión, o lo que defina un CSV) guardado
+como arreglos: padre por nodo, hijos en formato CSR y una matriz nodos x días
+con la serie de cada nodo. Los nodos sin columna propia se agregan de abajo
+hacia arriba una sola vez; después se guardan sumas acumuladas en el tiempo,
+así el total o promedio de cualquier nodo en cualquier ventana es una resta
+(O(nodos) por consulta, sin volver a recorrer las hojas). Con el backend
+SQLite (JerarquiaBD) no se guarda el histórico: las sumas se piden a la base.
+
+Definición opcional en CSV (PROYECTAGAS_JERARQUIA o data/jerarquia.csv):
+
+    nodo,padre,columna
+    Nacional,,Demanda_Total_MBTUD_pred
+    Costa,Nacional,Demanda_Costa_Total_MBTUD_pred
+    Atlántico,Costa,Demanda_Atlantico_pred
+    Bolívar,Costa,
+    ...
+
+`padre` vacío marca una raíz; `columna` vacía, un nodo que se agrega de sus hijos.
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from motor.compactacion import fecha_a_dia
+from motor.consultas import sumas_por_grupo
+from motor.derivadas import COSTA, INTERIOR, SECTORES
+
+RUTA_DEFINICION = Path(os.environ.get('PROYECTAGAS_JERARQUIA', 'data/jerarquia.csv'))
+
+
+def definicion_por_defecto():
+    """Zonas bajo el total nacional y los sectores bajo su suma."""
+    filas = [
+        ('Nacional', None, 'Demanda_Total_MBTUD_pred'),
+        ('Costa', 'Nacional', COSTA),
+        ('Interior', 'Nacional', INTERIOR),
+        ('Total sectores', None, None),
+    ]
+    filas += [(sector, 'Total sectores', f'Demanda_{sector}_Total_MBTUD_pred') for sector in SECTORES]
+    return pd.DataFrame(filas, columns=['nodo', 'padre', 'columna'])
+
+
+def leer_definicion(ruta=RUTA_DEFINICION):
+    """Definición del CSV si existe; si no, la de por defecto."""
+    if not Path(ruta).exists():
+        return definicion_por_defecto()
+    return pd.read_csv(ruta, dtype=str)[['nodo', 'padre', 'columna']]
+
+
+class Jerarquia:
+    """Árbol con sumas acumuladas por nodo.
+
+    Atributos (arreglos alineados por índice de nodo, padres antes que hijos):
+    `nombres`, `padre` (-1 en raíces), `profundidad`, `inicio_hijos`/`hijos`
+    (CSR), `fechas` (días int) y `acumulado`/`validos` (nodos x (días + 1))."""
+
+    def __init__(self, definicion, marco):
+        self._arbol(definicion)
+        columnas = self.columnas
+
+        # Serie diaria de cada nodo: la columna propia o la suma de sus hijos
+        marco = marco.sort_values('Fecha')
+        self.fechas = marco['Fecha'].to_numpy().astype(np.int64)
+        valores = np.zeros((len(self.nombres), len(marco)))
+        validos = np.zeros((len(self.nombres), len(marco)), dtype=bool)
+        propias = np.flatnonzero([c is not None for c in columnas])
+        faltantes = sorted(set(columnas[propias]) - set(marco.columns))
+        if faltantes:
+            raise ValueError(f"Columnas de la jerarquía que no están en los datos: {faltantes}")
+        datos = marco[list(columnas[propias])].to_numpy(dtype=float).T
+        validos[propias] = ~np.isnan(datos)
+        valores[propias] = np.nan_to_num(datos)
+
+        agregados = np.array([c is None for c in columnas])
+        for nivel in range(self.profundidad.max(initial=0), 0, -1):
+            nodos = np.flatnonzero((self.profundidad == nivel) & (self.padre >= 0))
+            nodos = nodos[agregados[self.padre[nodos]]]
+            np.add.at(valores, self.padre[nodos], valores[nodos])
+            np.logical_or.at(validos, self.padre[nodos], validos[nodos])
+
+        ceros = np.zeros((len(self.nombres), 1))
+        self.acumulado = np.hstack([ceros, np.cumsum(valores, axis=1)])
+        self.validos = np.hstack([ceros.astype(np.int64), np.cumsum(validos, axis=1)])
+
+    def _arbol(self, definicion):
+        """Nombres, padres, profundidad, hijos (CSR) y columna de cada nodo."""
+        # Padre o columna vacíos (None, NaN o '') marcan raíces y nodos agregados
+        vacio = lambda v: v is None or v == '' or (isinstance(v, float) and np.isnan(v))
+        nombres = list(definicion['nodo'])
+        padres = [None if vacio(p) else p for p in definicion['padre']]
+        columnas = np.array([None if vacio(c) else c for c in definicion['columna']], dtype=object)
+        indice = {nombre: i for i, nombre in enumerate(nombres)}
+        if len(indice) != len(nombres):
+            raise ValueError("La jerarquía tiene nodos repetidos")
+        desconocidos = {p for p in padres if p is not None} - set(indice)
+        if desconocidos:
+            raise ValueError(f"Padres que no son nodos: {sorted(desconocidos)}")
+        padre = np.array([indice[p] if p is not None else -1 for p in padres], dtype=np.int64)
+
+        # Orden por profundidad: los padres quedan antes que sus hijos
+        profundidad = np.zeros(len(padre), dtype=np.int64)
+        for _ in range(len(padre)):
+            nueva = np.where(padre >= 0, profundidad[padre] + 1, 0)
+            if np.array_equal(nueva, profundidad):
+                break
+            profundidad = nueva
+        else:
+            raise ValueError("La jerarquía tiene ciclos")
+        orden = np.argsort(profundidad, kind='stable')
+        nuevo = np.empty_like(orden)
+        nuevo[orden] = np.arange(len(orden))
+        self.nombres = np.array(nombres, dtype=object)[orden]
+        self.padre = np.where(padre[orden] >= 0, nuevo[padre[orden]], -1)
+        self.profundidad = profundidad[orden]
+        self.columnas = columnas[orden]
+
+        # Hijos en CSR: los de i son hijos[inicio_hijos[i]:inicio_hijos[i + 1]]
+        con_padre = np.flatnonzero(self.padre >= 0)
+        self.hijos = con_padre[np.argsort(self.padre[con_padre], kind='stable')]
+        self.inicio_hijos = np.searchsorted(self.padre[self.hijos], np.arange(len(self.nombres) + 1))
+        self._indice = {nombre: i for i, nombre in enumerate(self.nombres)}
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def indice(self, nodo):
+        return self._indice[nodo]
+
+    def raices(self):
+        return list(self.nombres[self.padre < 0])
+
+    def hijos_de(self, nodo):
+        i = self._indice[nodo]
+        return list(self.nombres[self.hijos[self.inicio_hijos[i]:self.inicio_hijos[i + 1]]])
+
+    def ruta(self, nodo):
+        """Ancestros de `nodo` desde la raíz (incluido el nodo)."""
+        i, ruta = self._indice[nodo], []
+        while i >= 0:
+            ruta.append(self.nombres[i])
+            i = self.padre[i]
+        return ruta[::-1]
+
+    def descendientes(self, nodo):
+        """`nodo` y todo su subárbol en orden de recorrido (para listas con sangría)."""
+        pila, resultado = [self._indice[nodo]], []
+        while pila:
+            i = pila.pop()
+            resultado.append(self.nombres[i])
+            pila.extend(self.hijos[self.inicio_hijos[i]:self.inicio_hijos[i + 1]][::-1])
+        return resultado
+
+    def _posiciones(self, fecha_inicio, fecha_fin):
+        return (np.searchsorted(self.fechas, fecha_a_dia(fecha_inicio), 'left'),
+                np.searchsorted(self.fechas, fecha_a_dia(fecha_fin), 'right'))
+
+    def _sumas(self, fecha_inicio, fecha_fin):
+        """Total y días con datos de cada nodo en la ventana."""
+        i, j = self._posiciones(fecha_inicio, fecha_fin)
+        return self.acumulado[:, j] - self.acumulado[:, i], self.validos[:, j] - self.validos[:, i]
+
+    def ventana(self, fecha_inicio, fecha_fin, nodos=None):
+        """Total, días con datos, promedio y participación en el padre de cada
+        nodo (o solo de `nodos`) en la ventana."""
+        total, dias = self._sumas(fecha_inicio, fecha_fin)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media = np.where(dias > 0, total / dias, np.nan)
+            participacion = np.where(self.padre >= 0, media / media[self.padre] * 100, np.nan)
+        tabla = pd.DataFrame({
+            'padre': np.where(self.padre >= 0, self.nombres[self.padre], None),
+            'profundidad': self.profundidad,
+            'total': total,
+            'dias': dias,
+            'media': media,
+            'participacion': participacion,
+        }, index=pd.Index(self.nombres, name='nodo'))
+        return tabla if nodos is None else tabla.loc[list(nodos)]
+
+    def serie(self, nodo, fecha_inicio, fecha_fin):
+        """Serie diaria de `nodo` en la ventana (diferencias del acumulado)."""
+        k = self._indice[nodo]
+        i, j = self._posiciones(fecha_inicio, fecha_fin)
+        valores = np.diff(self.acumulado[k, i:j + 1])
+        validos = np.diff(self.validos[k, i:j + 1]) > 0
+        return pd.Series(np.where(validos, valores, np.nan),
+                         index=pd.to_datetime(self.fechas[i:j], unit='D'), name=nodo)
+
+
+class JerarquiaBD(Jerarquia):
+    """La misma jerarquía sobre tablas de la base (motor/consultas.py). No se
+    guardan series: cada nodo es la suma de sus columnas hoja y los totales
+    de una ventana (o la serie de un nodo) se piden a SQLite."""
+
+    def __init__(self, definicion, tablas):
+        self._arbol(definicion)
+        # Como en construir: cada columna sale de la primera tabla que la tiene y
+        # solo entran (con sus fechas) las tablas que aportan alguna
+        necesarias = {c for c in self.columnas if c is not None}
+        self.tablas = []
+        for tabla in tablas:
+            if necesarias & set(tabla.columns):
+                self.tablas.append(tabla)
+                necesarias -= set(tabla.columns)
+        # Columnas hoja de cada nodo: la propia o las de sus hijos (los hijos van después)
+        self.grupos = [None] * len(self.nombres)
+        for i in range(len(self.nombres) - 1, -1, -1):
+            if self.columnas[i] is not None:
+                self.grupos[i] = [self.columnas[i]]
+            else:
+                hijos = self.hijos[self.inicio_hijos[i]:self.inicio_hijos[i + 1]]
+                self.grupos[i] = list(dict.fromkeys(c for h in hijos for c in self.grupos[h]))
+        if necesarias:
+            raise ValueError(f"Columnas de la jerarquía que no están en los datos: {sorted(necesarias)}")
+        if not self.tablas:
+            raise ValueError("La jerarquía no tiene nodos con columna")
+
+    def _sumas(self, fecha_inicio, fecha_fin):
+        return sumas_por_grupo(self.tablas, self.grupos, fecha_inicio, fecha_fin)
+
+    def serie(self, nodo, fecha_inicio, fecha_fin):
+        dias = sumas_por_grupo(self.tablas, [self.grupos[self._indice[nodo]]], fecha_inicio, fecha_fin, por_dia=True)
+        return pd.Series(np.where(dias['valido_0'] > 0, dias['suma_0'], np.nan),
+                         index=pd.to_datetime(dias['Fecha'].to_numpy(dtype=np.int64), unit='D'), name=nodo)
+
+
+def construir(tablas, definicion=None):
+    """Jerarquía sobre las tablas (Fecha en días o fechas + columnas), unidas por Fecha."""
+    definicion = leer_definicion() if definicion is None else definicion
+    necesarias = {c for c in definicion['columna'].dropna() if c}
+    partes = []
+    for df in tablas:
+        columnas = [c for c in df.columns if c in necesarias]
+        if not columnas:
+            continue
+        parte = df[['Fecha'] + columnas]
+        if parte['Fecha'].dtype.kind == 'M':
+            parte = parte.assign(Fecha=(parte['Fecha'].to_numpy().astype('datetime64[D]')
+                                        - np.datetime64('1970-01-01', 'D')).astype(np.int64))
+        partes.append(parte.set_index('Fecha'))
+        necesarias -= set(columnas)
+    marco = pd.concat(partes, axis=1).reset_index() if partes else pd.DataFrame({'Fecha': []})
+    return Jerarquia(definicion, marco)
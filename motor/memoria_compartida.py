@@ -0,0 +1,105 @@
+"""
+PrediGas - Datos compartidos entre procesos
+Un proceso cargador publica las tablas de predicciones como arreglos numéricos
+en archivos mapeados en memoria (idealmente bajo /dev/shm), un archivo por
+columna con su tipo compactado (float32, int32, ...). Cada worker de Streamlit
+se adjunta sin copiar: el sistema operativo comparte las páginas.
+
+Cada publicación crea una generación nueva; los workers comparan el contador
+en cada rerun y se vuelven a adjuntar cuando cambia (recarga en caliente).
+
+    python -m motor.memoria_compartida --directorio /dev/shm/proyectagas --vigilar 60
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_ARCHIVO_GENERACION = 'generacion'
+
+
+def generacion_actual(directorio):
+    """Contador de la última publicación completa (0 si no hay ninguna)."""
+    try:
+        return int((Path(directorio) / _ARCHIVO_GENERACION).read_text())
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def publicar(tablas, directorio):
+    """Escribe `tablas` (nombre -> DataFrame de columnas numéricas) como una
+    generación nueva y la marca como vigente. Devuelve su número."""
+    directorio = Path(directorio)
+    generacion = generacion_actual(directorio) + 1
+    destino = directorio / f'g{generacion}'
+    destino.mkdir(parents=True, exist_ok=True)
+
+    manifiesto = {}
+    for nombre, df in tablas.items():
+        # Una columna por archivo: una sola matriz forzaría un tipo común (float64)
+        for j, columna in enumerate(df.columns):
+            np.save(destino / f'{nombre}_{j}.npy', df[columna].to_numpy())
+        manifiesto[nombre] = {'columnas': list(df.columns), 'filas': len(df)}
+    (destino / 'manifiesto.json').write_text(json.dumps(manifiesto))
+
+    # El cambio de generación es atómico: un worker nunca ve una publicación a medias
+    temporal = directorio / f'{_ARCHIVO_GENERACION}.tmp'
+    temporal.write_text(str(generacion))
+    os.replace(temporal, directorio / _ARCHIVO_GENERACION)
+
+    # Se conserva la generación anterior para los workers que aún no cambian;
+    # los mapeos abiertos siguen siendo válidos aunque se borren los archivos.
+    for previa in directorio.glob('g*'):
+        if previa.is_dir() and previa.name[1:].isdigit() and int(previa.name[1:]) < generacion - 1:
+            shutil.rmtree(previa, ignore_errors=True)
+    return generacion
+
+
+def adjuntar(directorio, generacion=None):
+    """DataFrames respaldados por los archivos mapeados (solo lectura, sin copia)."""
+    generacion = generacion or generacion_actual(directorio)
+    origen = Path(directorio) / f'g{generacion}'
+    manifiesto = json.loads((origen / 'manifiesto.json').read_text())
+
+    tablas = {}
+    for nombre, info in manifiesto.items():
+        tablas[nombre] = pd.DataFrame({
+            columna: np.load(origen / f'{nombre}_{j}.npy', mmap_mode='r')
+            for j, columna in enumerate(info['columnas'])
+        }, copy=False)
+    return tablas
+
+
+def main():
+    from motor import artefactos, cache_disco
+
+    parser = argparse.ArgumentParser(description="Publica las predicciones en memoria compartida.")
+    parser.add_argument('--directorio', default='/dev/shm/proyectagas')
+    parser.add_argument('--vigilar', type=float, default=0,
+                        help="segundos entre revisiones de data/; 0 publica una vez y termina")
+    args = parser.parse_args()
+
+    huella_publicada = None
+    while True:
+        huella = cache_disco.huella(artefactos.RUTAS.values())
+        if huella != huella_publicada:
+            generacion = publicar({
+                'pred_modelo1': artefactos.cargar('modelo1'),
+                'desagregado_ancho': artefactos.cargar('desagregado_ancho'),
+            }, args.directorio)
+            artefactos.cargar('alertas')
+            huella_publicada = huella
+            print(f"Generación {generacion} publicada en {args.directorio}")
+        if not args.vigilar:
+            break
+        time.sleep(args.vigilar)
+
+
+if __name__ == '__main__':
+    main()
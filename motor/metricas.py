@@ -0,0 +1,222 @@
+"""
+PrediGas - Almacén de métricas
+Base SQLite local con una fila por (corrida, modelo, variable, partición,
+métrica). Cada reentrenamiento registra una corrida nueva; el Tab 6 consulta
+con filtros y paginación en SQL y solo trae las filas visibles.
+
+Registrar las métricas actuales de data/ como una corrida:
+    python -m motor.metricas --corrida "reentrenamiento 2024-06"
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# Historial de corridas: va junto a los datos, no en la caché (que se poda y se borra)
+RUTA_BD = Path(os.environ.get('PROYECTAGAS_METRICAS_BD', 'data/metricas.sqlite'))
+FILAS_POR_PAGINA = 25
+
+# Columnas de los CSV de métricas: <METRICA>_<Particion>
+PARTICIONES = {'Train': 'train', 'Val': 'validacion', 'Test': 'test'}
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS corridas (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    registrada TEXT NOT NULL,
+    huella TEXT UNIQUE
+);
+CREATE TABLE IF NOT EXISTS metricas (
+    corrida INTEGER NOT NULL REFERENCES corridas(id),
+    modelo TEXT NOT NULL,
+    variable TEXT NOT NULL,
+    particion TEXT NOT NULL,
+    metrica TEXT NOT NULL,
+    valor REAL,
+    PRIMARY KEY (corrida, modelo, variable, particion, metrica)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS metricas_variable ON metricas (variable, metrica);
+CREATE INDEX IF NOT EXISTS metricas_metrica ON metricas (metrica, particion, valor);
+"""
+
+_FILTROS = ('corrida', 'modelo', 'variable', 'particion')
+
+# Bases cuyo esquema ya se creó en este proceso
+_CON_ESQUEMA = set()
+
+
+def conectar(ruta=RUTA_BD):
+    """Conexión con el esquema creado (solo la primera vez por proceso, o si
+    el archivo desapareció)."""
+    ruta = Path(ruta)
+    nueva = str(ruta) not in _CON_ESQUEMA or not ruta.exists()
+    if nueva:
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+    conexion = sqlite3.connect(ruta)
+    if nueva:
+        conexion.executescript(_ESQUEMA)
+        _CON_ESQUEMA.add(str(ruta))
+    return conexion
+
+
+def _largo(tabla, modelo):
+    """Tabla ancha de los CSV (Variable, [Modelo], MAE_Test, ...) -> filas largas."""
+    tabla = tabla.assign(Variable=tabla['Variable'].str.strip())
+    if 'Modelo' not in tabla.columns:
+        tabla = tabla.assign(Modelo=modelo)
+    valores = [c for c in tabla.columns if c.rpartition('_')[2] in PARTICIONES]
+    largo = tabla.melt(id_vars=['Modelo', 'Variable'], value_vars=valores, var_name='columna', value_name='valor')
+    partes = largo.pop('columna').str.rpartition('_')
+    return largo.assign(metrica=partes[0], particion=partes[2].map(PARTICIONES))
+
+
+def registrar_corrida(conexion, nombre, tablas, huella=None):
+    """Guarda una corrida. `tablas` es una lista de (DataFrame ancho, modelo por
+    defecto). Si ya hay una corrida con la misma `huella` no hace nada.
+    Devuelve el id de la corrida."""
+    if huella:
+        existente = conexion.execute('SELECT id FROM corridas WHERE huella = ?', (huella,)).fetchone()
+        if existente:
+            return existente[0]
+
+    with conexion:
+        corrida = conexion.execute(
+            'INSERT INTO corridas (nombre, registrada, huella) VALUES (?, ?, ?)',
+            (nombre, datetime.now().isoformat(timespec='seconds'), huella),
+        ).lastrowid
+        filas = pd.concat([_largo(tabla, modelo) for tabla, modelo in tablas])
+        conexion.executemany(
+            'INSERT OR REPLACE INTO metricas VALUES (?, ?, ?, ?, ?, ?)',
+            [(corrida, m, v, p, me, float(va)) for m, v, va, me, p in
+             filas[['Modelo', 'Variable', 'valor', 'metrica', 'particion']].itertuples(index=False)],
+        )
+    return corrida
+
+
+def registrar_actuales(ruta=RUTA_BD, nombre=None):
+    """Registra las métricas de data/ (una vez por contenido de los CSV).
+
+    Devuelve (id de la corrida, si es nueva). Si el contenido ya estaba
+    registrado y se da `nombre`, la corrida existente pasa a llamarse así."""
+    from motor import artefactos
+
+    # La huella es solo del contenido: cambiar el código no crea corridas duplicadas
+    huella = hashlib.sha256()
+    for clave in ('metricas_agregado', 'metricas_desagregado'):
+        huella.update(Path(artefactos.RUTAS[clave]).read_bytes())
+    with closing(conectar(ruta)) as conexion:
+        existente = conexion.execute('SELECT id FROM corridas WHERE huella = ?', (huella.hexdigest(),)).fetchone()
+        if existente:
+            if nombre:
+                with conexion:
+                    conexion.execute('UPDATE corridas SET nombre = ? WHERE id = ?', (nombre, existente[0]))
+            return existente[0], False
+
+        agregado, desagregado = artefactos.leer_metricas()
+        corrida = registrar_corrida(
+            conexion,
+            nombre or f"data/ {datetime.now():%Y-%m-%d}",
+            [(agregado, 'XGBoost'), (desagregado, 'XGBoost desagregado')],
+            huella.hexdigest(),
+        )
+        return corrida, True
+
+
+def opciones(ruta=RUTA_BD):
+    """Valores disponibles para cada filtro (corridas como id -> nombre)."""
+    with closing(conectar(ruta)) as conexion:
+        resultado = {
+            'corrida': dict(conexion.execute('SELECT id, nombre FROM corridas ORDER BY id DESC').fetchall()),
+        }
+        for columna in ('modelo', 'variable', 'particion', 'metrica'):
+            resultado[columna] = [fila[0] for fila in conexion.execute(
+                f'SELECT DISTINCT {columna} FROM metricas ORDER BY {columna}'
+            )]
+    return resultado
+
+
+def _donde(filtros):
+    condiciones, parametros = [], []
+    for columna in _FILTROS:
+        valores = filtros.get(columna)
+        if valores:
+            condiciones.append(f"m.{columna} IN ({', '.join('?' * len(valores))})")
+            parametros.extend(valores)
+    return (' WHERE ' + ' AND '.join(condiciones)) if condiciones else '', parametros
+
+
+def _claves(filtros):
+    donde, parametros = _donde(filtros or {})
+    return ('SELECT corrida, modelo, variable, particion FROM metricas m' + donde +
+            ' GROUP BY corrida, modelo, variable, particion'), parametros
+
+
+def contar(ruta=RUTA_BD, filtros=None):
+    """Filas del leaderboard que cumplen `filtros`."""
+    clave, parametros = _claves(filtros)
+    with closing(conectar(ruta)) as conexion:
+        return conexion.execute(f'SELECT COUNT(*) FROM ({clave})', parametros).fetchone()[0]
+
+
+def consultar(ruta=RUTA_BD, filtros=None, ordenar_por='MAPE', ascendente=True,
+              pagina=0, filas=FILAS_POR_PAGINA):
+    """Página del leaderboard: una fila por (corrida, modelo, variable, partición)
+    y una columna por métrica, ordenada por `ordenar_por`.
+
+    `filtros` mapea corrida/modelo/variable/particion a listas de valores
+    permitidos (vacío = todos)."""
+    clave, parametros = _claves(filtros)
+    sentido = 'ASC' if ascendente else 'DESC'
+
+    with closing(conectar(ruta)) as conexion:
+        # Solo las claves de la página; el orden lo resuelve SQLite con el índice por métrica
+        claves = pd.read_sql_query(f"""
+            SELECT g.corrida, g.modelo, g.variable, g.particion
+            FROM ({clave}) g
+            LEFT JOIN metricas o
+              ON o.corrida = g.corrida AND o.modelo = g.modelo AND o.variable = g.variable
+             AND o.particion = g.particion AND o.metrica = ?
+            ORDER BY o.valor IS NULL, o.valor {sentido}, g.variable
+            LIMIT ? OFFSET ?
+        """, conexion, params=[*parametros, ordenar_por, filas, pagina * filas])
+        if claves.empty:
+            return claves
+
+        # Métricas de las filas visibles
+        pares = ' OR '.join(['(corrida = ? AND modelo = ? AND variable = ? AND particion = ?)'] * len(claves))
+        valores = pd.read_sql_query(
+            f'SELECT * FROM metricas WHERE {pares}', conexion,
+            params=[v for fila in claves.itertuples(index=False) for v in fila],
+        )
+        nombres = pd.read_sql_query('SELECT id AS corrida, nombre FROM corridas', conexion)
+
+    ancho = valores.pivot_table(index=['corrida', 'modelo', 'variable', 'particion'],
+                                columns='metrica', values='valor', aggfunc='first')
+    resultado = ancho.reindex(pd.MultiIndex.from_frame(claves)).reset_index()
+    resultado.columns.name = None
+    return resultado.merge(nombres, on='corrida', how='left')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registra las métricas de data/ en el almacén SQLite.")
+    parser.add_argument('--bd', default=str(RUTA_BD))
+    parser.add_argument('--corrida', help="nombre de la corrida (por defecto la fecha de hoy)")
+    args = parser.parse_args()
+
+    corrida, nueva = registrar_actuales(args.bd, args.corrida)
+    if not nueva:
+        print(f"Las métricas de data/ ya estaban registradas como la corrida {corrida}"
+              + (f"; ahora se llama '{args.corrida}'" if args.corrida else ""))
+    filtros = {'corrida': [corrida]}
+    print(f"Corrida {corrida} en {args.bd}: {contar(args.bd, filtros)} filas")
+    print(consultar(args.bd, filtros, filas=100).drop(columns='corrida').to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+PrediGas - Prueba de carga
+Simula N sesiones simultáneas del dashboard, cada una en su propio proceso con
+`streamlit.testing.v1.AppTest`, y reporta latencia de rerun (p50/p95/p99),
+throughput y memoria por proceso a medida que crece la concurrencia.
+
+    python -m motor.prueba_carga --concurrencia 1 2 4 8 --repeticiones 2
+"""
+
+import argparse
+import random
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RUTA_APP = Path(__file__).resolve().parent.parent / 'app.py'
+SECTORES = ['Residencial', 'Industrial', 'Comercial', 'Generación Térmica',
+            'Refinería', 'Petrolero', 'GNVC (Transporte)', 'Compresora']
+
+
+def _rerun(at, paso, tiempos):
+    inicio = time.perf_counter()
+    at.run()
+    tiempos.append((paso, (time.perf_counter() - inicio) * 1000))
+    if at.exception:
+        raise RuntimeError(f"{paso}: {at.exception[0].value}")
+
+
+def sesion(semilla, repeticiones=1):
+    """Guion de un ejecutivo: elige un período, recorre los tabs y cambia el
+    sector del Tab 4. Devuelve (tiempos, rss_kb) con tiempos = [(paso, ms)]."""
+    from streamlit.testing.v1 import AppTest
+
+    azar = random.Random(semilla)
+    tiempos = []
+    at = AppTest.from_file(str(RUTA_APP), default_timeout=300)
+    _rerun(at, 'inicio', tiempos)
+    pestanas = [t.label for t in at.tabs]
+
+    for _ in range(repeticiones):
+        # Período de análisis aleatorio dentro del rango disponible
+        desde, hasta = at.date_input[0].min, at.date_input[1].max
+        dias = (hasta - desde).days
+        inicio = desde + timedelta(days=azar.randint(0, dias // 2))
+        at.date_input[0].set_value(inicio)
+        at.date_input[1].set_value(inicio + timedelta(days=azar.randint(30, dias // 2)))
+        _rerun(at, 'periodo', tiempos)
+
+        for pestana in pestanas:
+            at.session_state['tab_activo'] = pestana
+            _rerun(at, f'tab:{pestana}', tiempos)
+            if at.selectbox and at.selectbox[0].options[0] in SECTORES:
+                at.selectbox[0].set_value(azar.choice(SECTORES))
+                _rerun(at, 'sector', tiempos)
+
+    return tiempos, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def medir(concurrencia, repeticiones=1):
+    """Lanza `concurrencia` sesiones a la vez y resume sus latencias."""
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=concurrencia) as pool:
+        resultados = list(pool.map(sesion, range(concurrencia), [repeticiones] * concurrencia))
+    duracion = time.perf_counter() - inicio
+
+    latencias = np.array([ms for tiempos, _ in resultados for _, ms in tiempos])
+    rss_mb = np.array([rss for _, rss in resultados]) / 1024
+    p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+    return {
+        'sesiones': concurrencia,
+        'reruns': len(latencias),
+        'p50_ms': p50,
+        'p95_ms': p95,
+        'p99_ms': p99,
+        'reruns_s': len(latencias) / duracion,
+        'rss_mb_proceso': rss_mb.mean(),
+        'rss_mb_max': rss_mb.max(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de sesiones concurrentes de app.py.")
+    parser.add_argument('--concurrencia', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--repeticiones', type=int, default=1, help="veces que cada sesión repite el guion")
+    parser.add_argument('--csv', help="guardar el resultado en este archivo")
+    args = parser.parse_args()
+
+    filas = []
+    for concurrencia in args.concurrencia:
+        filas.append(medir(concurrencia, args.repeticiones))
+        print(f"{concurrencia} sesiones: p95 {filas[-1]['p95_ms']:,.0f} ms", flush=True)
+
+    resultado = pd.DataFrame(filas)
+    print()
+    print(resultado.to_string(index=False, float_format='{:,.1f}'.format))
+    if args.csv:
+        resultado.to_csv(args.csv, index=False)
+
+
+if __name__ == '__main__':
+    main()
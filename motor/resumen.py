@@ -0,0 +1,62 @@
+"""
+PrediGas - Tabla resumen
+Estadísticas de todas las variables de la ventana en una sola reducción vectorizada.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ESTADISTICAS = ['media', 'mediana', 'desv', 'min', 'max', 'p5', 'p95', 'cv']
+
+SUFIJO_SECTOR = '_Total_MBTUD_pred'
+COLUMNAS_ZONA = [
+    'Demanda_Total_MBTUD_pred',
+    'Demanda_Costa_Total_MBTUD_pred',
+    'Demanda_Interior_Total_MBTUD_pred'
+]
+
+
+def marco_ventana(*tablas):
+    """Une las tablas filtradas en un solo marco indexado por Fecha.
+
+    Las variables que no cubren toda la ventana quedan con NaN y las
+    reducciones las ignoran, igual que al filtrar cada tabla por separado."""
+    return pd.concat([t.set_index('Fecha') for t in tablas], axis=1)
+
+
+def tabla_resumen(marco):
+    """Media, mediana, desviación, mínimo, máximo, P5, P95 y CV (%) por variable.
+
+    Devuelve un DataFrame con una fila por columna numérica de `marco`."""
+    numericas = marco.select_dtypes('number')
+    valores = numericas.to_numpy(dtype=float)
+    if not len(valores):
+        valores = np.full((1, valores.shape[1]), np.nan)
+
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        # Ventanas vacías o columnas sin datos producen NaN, como en pandas
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        media = np.nanmean(valores, axis=0)
+        p5, mediana, p95 = np.nanpercentile(valores, [5, 50, 95], axis=0)
+        desv = np.nanstd(valores, axis=0, ddof=1)
+        minimo = np.nanmin(valores, axis=0)
+        maximo = np.nanmax(valores, axis=0)
+        cv = desv / media * 100
+
+    return pd.DataFrame(
+        {'media': media, 'mediana': mediana, 'desv': desv, 'min': minimo,
+         'max': maximo, 'p5': p5, 'p95': p95, 'cv': cv},
+        index=numericas.columns,
+        columns=ESTADISTICAS
+    )
+
+
+def top_sectores(resumen, n=5):
+    """Los `n` sectores de mayor demanda promedio, con nombre corto como índice."""
+    es_sector = resumen.index.str.endswith(SUFIJO_SECTOR) & ~resumen.index.isin(COLUMNAS_ZONA)
+    sectores = resumen.loc[es_sector, 'media']
+    nombres = (sectores.index.str.replace('Demanda_', '')
+               .str.replace(SUFIJO_SECTOR, '').str.replace('_', ' '))
+    return sectores.set_axis(nombres).nlargest(n)
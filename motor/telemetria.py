@@ -0,0 +1,192 @@
+"""
+PrediGas - Telemetría
+Métricas del proceso en formato de texto de Prometheus: reruns y latencia por
+tab, llamadas y fallos de cada caché, sesiones activas, memoria (RSS) y hora
+del último cálculo de cada caché (la última carga de datos).
+
+Los registros viven en este módulo, que Streamlit importa una sola vez por
+proceso; el endpoint es opcional y se activa con PROYECTAGAS_TELEMETRIA_PUERTO:
+
+    PROYECTAGAS_TELEMETRIA_PUERTO=9464 streamlit run app.py
+    curl localhost:9464/metrics
+"""
+
+import functools
+import logging
+import os
+import resource
+import threading
+import time
+
+PUERTO = os.environ.get('PROYECTAGAS_TELEMETRIA_PUERTO')
+HOST = os.environ.get('PROYECTAGAS_TELEMETRIA_HOST', '127.0.0.1')
+
+LIMITES_RERUN_S = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SESION_ACTIVA_S = 300
+
+_DESCRIPCIONES = {
+    'proyectagas_rerun_segundos': ('histogram', "Duración de cada rerun del script, por tab abierto."),
+    'proyectagas_cache_llamadas_total': ('counter', "Llamadas a cada función cacheada."),
+    'proyectagas_cache_fallos_total': ('counter', "Llamadas que no estaban en la caché y se calcularon."),
+    'proyectagas_cache_ultimo_calculo_timestamp_segundos': (
+        'gauge', "Hora Unix del último cálculo de cada caché (p. ej. la última carga de datos)."),
+    'proyectagas_sesiones_activas': ('gauge', f"Sesiones con algún rerun en los últimos {SESION_ACTIVA_S} s."),
+    'proyectagas_rss_bytes': ('gauge', "Memoria residente del proceso."),
+    'proyectagas_inicio_timestamp_segundos': ('gauge', "Hora Unix de inicio del proceso."),
+}
+
+_registro = logging.getLogger(__name__)
+
+_candado = threading.Lock()
+_contadores = {}
+_medidores = {}
+_histogramas = {}
+# (host, puerto) -> servidor en marcha u OSError del intento fallido
+_servidores = {}
+_sesiones = {}
+_INICIO = time.time()
+
+
+def _clave(nombre, etiquetas):
+    return nombre, tuple(sorted(etiquetas.items()))
+
+
+def contar(nombre, valor=1, **etiquetas):
+    with _candado:
+        clave = _clave(nombre, etiquetas)
+        _contadores[clave] = _contadores.get(clave, 0) + valor
+
+
+def fijar(nombre, valor, **etiquetas):
+    with _candado:
+        _medidores[_clave(nombre, etiquetas)] = valor
+
+
+def observar(nombre, valor, limites=LIMITES_RERUN_S, **etiquetas):
+    """Suma `valor` a un histograma acumulado (cubetas `le` de Prometheus)."""
+    with _candado:
+        clave = _clave(nombre, etiquetas)
+        cubetas, suma, cuenta = _histogramas.get(clave, ([0] * len(limites), 0.0, 0))
+        cubetas = [c + (valor <= limite) for c, limite in zip(cubetas, limites)]
+        _histogramas[clave] = (cubetas, suma + valor, cuenta + 1)
+
+
+def medir_cache(nombre, cache):
+    """Decorador: `cache` (p. ej. `st.cache_data(max_entries=64)`) con contadores
+    de llamadas y fallos. El cuerpo solo corre en un fallo, así que los aciertos
+    son llamadas - fallos."""
+    def decorar(funcion):
+        @functools.wraps(funcion)
+        def calcular(*args, **kwargs):
+            contar('proyectagas_cache_fallos_total', cache=nombre)
+            resultado = funcion(*args, **kwargs)
+            fijar('proyectagas_cache_ultimo_calculo_timestamp_segundos', time.time(), cache=nombre)
+            return resultado
+
+        cacheada = cache(calcular)
+
+        @functools.wraps(funcion)
+        def llamar(*args, **kwargs):
+            contar('proyectagas_cache_llamadas_total', cache=nombre)
+            return cacheada(*args, **kwargs)
+
+        llamar.clear = cacheada.clear
+        return llamar
+    return decorar
+
+
+def registrar_rerun(sesion, tab, segundos):
+    """Latencia de un rerun completo y marca de actividad de la sesión."""
+    observar('proyectagas_rerun_segundos', segundos, tab=tab or '')
+    with _candado:
+        _sesiones[sesion] = time.time()
+
+
+def _rss_bytes():
+    # RSS actual en Linux; en otros sistemas el máximo que reporta getrusage
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _etiquetas(pares):
+    if not pares:
+        return ''
+    escapar = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escapar(v)}"' for k, v in pares) + '}'
+
+
+def texto():
+    """Todas las métricas en el formato de exposición de texto de Prometheus."""
+    ahora = time.time()
+    with _candado:
+        for sesion in [s for s, visto in _sesiones.items() if ahora - visto > SESION_ACTIVA_S]:
+            del _sesiones[sesion]
+        series = {}
+        for (nombre, pares), valor in {**_contadores, **_medidores}.items():
+            series.setdefault(nombre, []).append(f'{nombre}{_etiquetas(pares)} {valor}')
+        for (nombre, pares), (cubetas, suma, cuenta) in _histogramas.items():
+            lineas = series.setdefault(nombre, [])
+            for limite, acumulado in zip(LIMITES_RERUN_S, cubetas):
+                lineas.append(f'{nombre}_bucket{_etiquetas(pares + (("le", limite),))} {acumulado}')
+            lineas.append(f'{nombre}_bucket{_etiquetas(pares + (("le", "+Inf"),))} {cuenta}')
+            lineas.append(f'{nombre}_sum{_etiquetas(pares)} {suma}')
+            lineas.append(f'{nombre}_count{_etiquetas(pares)} {cuenta}')
+        series['proyectagas_sesiones_activas'] = [f'proyectagas_sesiones_activas {len(_sesiones)}']
+    series['proyectagas_rss_bytes'] = [f'proyectagas_rss_bytes {_rss_bytes()}']
+    series['proyectagas_inicio_timestamp_segundos'] = [f'proyectagas_inicio_timestamp_segundos {_INICIO}']
+
+    salida = []
+    for nombre, lineas in series.items():
+        tipo, ayuda = _DESCRIPCIONES.get(nombre, ('untyped', ''))
+        salida += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} {tipo}', *lineas]
+    return '\n'.join(salida) + '\n'
+
+
+def iniciar_servidor(puerto, host=HOST):
+    """Servidor HTTP de /metrics en un hilo daemon; devuelve el servidor.
+
+    Se intenta una sola vez por proceso: si el puerto no se puede abrir el
+    error va al log y las llamadas siguientes lo vuelven a lanzar sin reintentar."""
+    clave = (host, int(puerto))
+    with _candado:
+        previo = _servidores.get(clave)
+        if isinstance(previo, OSError):
+            raise previo
+        if previo is not None:
+            return previo
+        try:
+            servidor = _crear_servidor(*clave)
+        except OSError as e:
+            _registro.warning("Telemetría desactivada: no se pudo abrir %s:%s (%s)", host, puerto, e)
+            _servidores[clave] = e
+            raise
+        _servidores[clave] = servidor
+    threading.Thread(target=servidor.serve_forever, name='telemetria', daemon=True).start()
+    return servidor
+
+
+def _crear_servidor(host, puerto):
+    # Se importa aquí: sin puerto configurado el arranque no paga http.server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            cuerpo = texto().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer((host, puerto), Manejador)
+    servidor.daemon_threads = True
+    return servidor
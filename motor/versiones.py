@@ -0,0 +1,199 @@
+"""
+PrediGas - Versiones del pronóstico
+Cada reentrenamiento sobrescribe los CSV de predicciones; aquí se guarda cada
+emisión (fecha en que se publicó el pronóstico) para poder comparar cómo
+cambió la proyección de una misma fecha entre versiones.
+
+Cada versión se guarda por tabla como un .npz comprimido. Los valores van como
+XOR de sus bits contra la versión anterior alineada por fecha: lo que no
+cambió queda en cero y casi no ocupa, y la reconstrucción es exacta. Cada
+`INTERVALO_COMPLETO` versiones se guarda una completa para acotar la cadena.
+
+    python -m motor.versiones registrar --emision 2025-06-01
+    python -m motor.versiones listar
+"""
+
+import argparse
+import datetime
+import functools
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from motor.compactacion import dias_a_fechas, fecha_a_dia
+
+DIRECTORIO_VERSIONES = Path(os.environ.get('PROYECTAGAS_VERSIONES', 'data/versiones'))
+INTERVALO_COMPLETO = 8
+TABLAS = ('modelo1', 'desagregado')
+
+_INDICE = 'indice.json'
+
+
+def listar(directorio=DIRECTORIO_VERSIONES):
+    """Versiones registradas, de la más antigua a la más reciente."""
+    try:
+        return json.loads((Path(directorio) / _INDICE).read_text())
+    except FileNotFoundError:
+        return []
+
+
+def _validar_emision(emision):
+    """La emisión es parte de nombres de archivo: solo fechas 'AAAA-MM-DD'."""
+    try:
+        valida = datetime.date.fromisoformat(emision).isoformat() == emision
+    except (TypeError, ValueError):
+        valida = False
+    if not valida:
+        raise ValueError(f"Emisión inválida {emision!r}: se espera una fecha AAAA-MM-DD")
+
+
+def _bits(valores):
+    return valores.view(np.dtype(f'u{valores.dtype.itemsize}'))
+
+
+def _alinear(fechas, base):
+    """Posición de cada fecha en la versión base y si existe allí."""
+    if not len(base['Fecha']):
+        return np.zeros(len(fechas), np.intp), np.zeros(len(fechas), bool)
+    posicion = np.searchsorted(base['Fecha'], fechas).clip(0, len(base['Fecha']) - 1)
+    return posicion, base['Fecha'][posicion] == fechas
+
+
+def _codificar(tabla, base):
+    """Arreglos del .npz de `tabla` (dict Fecha/columnas) contra `base`
+    (mismo formato, o None para una versión completa)."""
+    fechas = tabla['Fecha']
+    arreglos = {'Fecha': np.diff(fechas, prepend=0).astype(np.int32)}
+    if base is not None:
+        posicion, existe = _alinear(fechas, base)
+    for i, (columna, valores) in enumerate((c, v) for c, v in tabla.items() if c != 'Fecha'):
+        bits = _bits(valores)
+        if base is not None and columna in base and base[columna].dtype == valores.dtype:
+            referencia = np.zeros_like(bits)
+            referencia[existe] = _bits(base[columna])[posicion[existe]]
+            bits = bits ^ referencia
+        arreglos[f'c{i}'] = bits
+    return arreglos
+
+
+def _decodificar(arreglos, info, base):
+    fechas = np.cumsum(arreglos['Fecha'], dtype=np.int64).astype(np.int32)
+    tabla = {'Fecha': fechas}
+    if base is not None:
+        posicion, existe = _alinear(fechas, base)
+    for i, (columna, tipo) in enumerate(info['columnas'].items()):
+        bits = arreglos[f'c{i}']
+        if info['base'] and columna in base and base[columna].dtype == np.dtype(tipo):
+            referencia = np.zeros_like(bits)
+            referencia[existe] = _bits(base[columna])[posicion[existe]]
+            bits = bits ^ referencia
+        tabla[columna] = bits.view(np.dtype(tipo))
+    return tabla
+
+
+@functools.lru_cache(maxsize=64)
+def _cargar_arreglos(directorio, tabla, emision):
+    # Las versiones no cambian una vez escritas: se decodifica cada una una sola vez por proceso.
+    # Los arreglos se comparten entre llamadas, por eso quedan de solo lectura.
+    _validar_emision(emision)
+    indice = {v['emision']: v for v in listar(directorio)}
+    info = indice[emision]['tablas'][tabla]
+    base = _cargar_arreglos(directorio, tabla, info['base']) if info['base'] else None
+    with np.load(Path(directorio) / tabla / f'{emision}.npz') as arreglos:
+        decodificada = _decodificar(dict(arreglos), info, base)
+    for valores in decodificada.values():
+        valores.setflags(write=False)
+    return decodificada
+
+
+def cargar(tabla, emision, directorio=DIRECTORIO_VERSIONES):
+    """DataFrame de `tabla` en la versión `emision` (Fecha en días int32)."""
+    return pd.DataFrame(_cargar_arreglos(str(directorio), tabla, emision))
+
+
+def registrar(tablas, emision, directorio=DIRECTORIO_VERSIONES):
+    """Guarda `tablas` (nombre -> DataFrame compacto con Fecha en días) como la
+    versión `emision` ('AAAA-MM-DD'), que debe ser posterior a la última."""
+    _validar_emision(emision)
+    directorio = Path(directorio)
+    versiones = listar(directorio)
+    if versiones and emision <= versiones[-1]['emision']:
+        raise ValueError(f"La emisión {emision} no es posterior a la última ({versiones[-1]['emision']})")
+
+    completa = len(versiones) % INTERVALO_COMPLETO == 0
+    previa = None if completa else versiones[-1]['emision']
+    registro = {'emision': emision, 'tablas': {}}
+    for nombre, df in tablas.items():
+        df = df.sort_values('Fecha')
+        tabla = {columna: df[columna].to_numpy() for columna in df.columns}
+        base = _cargar_arreglos(str(directorio), nombre, previa) if previa else None
+        (directorio / nombre).mkdir(parents=True, exist_ok=True)
+        archivo = directorio / nombre / f'{emision}.npz'
+        np.savez_compressed(archivo, **_codificar(tabla, base))
+        registro['tablas'][nombre] = {
+            'base': previa,
+            'columnas': {c: str(v.dtype) for c, v in tabla.items() if c != 'Fecha'},
+            'filas': len(df),
+            'bytes': archivo.stat().st_size,
+        }
+
+    temporal = directorio / f'{_INDICE}.tmp'
+    temporal.write_text(json.dumps(versiones + [registro], indent=1))
+    os.replace(temporal, directorio / _INDICE)
+    return registro
+
+
+def historial(tabla, columna, fecha, directorio=DIRECTORIO_VERSIONES):
+    """Valor proyectado para `fecha` en cada versión (NaN si no la cubre),
+    indexado por fecha de emisión."""
+    dia = fecha_a_dia(fecha)
+    valores = {}
+    for version in listar(directorio):
+        if tabla not in version['tablas'] or columna not in version['tablas'][tabla]['columnas']:
+            continue
+        arreglos = _cargar_arreglos(str(directorio), tabla, version['emision'])
+        posicion = np.searchsorted(arreglos['Fecha'], dia)
+        existe = posicion < len(arreglos['Fecha']) and arreglos['Fecha'][posicion] == dia
+        valores[version['emision']] = float(arreglos[columna][posicion]) if existe else np.nan
+    return pd.Series(valores, name=columna, dtype=float).rename_axis('emision')
+
+
+def curvas(tabla, columna, emisiones, directorio=DIRECTORIO_VERSIONES):
+    """Serie completa de `columna` por versión: DataFrame Fecha x emisión."""
+    series = {}
+    for emision in emisiones:
+        arreglos = _cargar_arreglos(str(directorio), tabla, emision)
+        series[emision] = pd.Series(arreglos[columna], index=dias_a_fechas(arreglos['Fecha']))
+    return pd.DataFrame(series).rename_axis('Fecha')
+
+
+def main():
+    from motor.artefactos import leer_tablas
+    from motor.datos import pivotar_desagregado
+
+    parser = argparse.ArgumentParser(description="Versiones del pronóstico por fecha de emisión.")
+    parser.add_argument('accion', choices=['registrar', 'listar'])
+    parser.add_argument('--emision', default=pd.Timestamp.today().strftime('%Y-%m-%d'))
+    parser.add_argument('--directorio', default=str(DIRECTORIO_VERSIONES))
+    args = parser.parse_args()
+
+    if args.accion == 'registrar':
+        _, _, pred_modelo1, pred_modelo2 = leer_tablas()
+        registro = registrar({
+            'modelo1': pred_modelo1,
+            'desagregado': pivotar_desagregado(pred_modelo2),
+        }, args.emision, args.directorio)
+        print(f"Versión {args.emision} registrada "
+              f"({'completa' if registro['tablas']['modelo1']['base'] is None else 'delta'})")
+
+    for version in listar(args.directorio):
+        tamano = sum(t['bytes'] for t in version['tablas'].values())
+        tipo = 'completa' if version['tablas']['modelo1']['base'] is None else 'delta'
+        print(f"{version['emision']}  {tipo:8}  {tamano / 1024:,.1f} KB")
+
+
+if __name__ == '__main__':
+    main()
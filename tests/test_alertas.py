@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from motor.alertas import linea_tiempo_alertas, estado_en
+
+
+def _pred_modelo1():
+    # Solo días hábiles; el spread alterna entre 1 y 8 cada semana (cambia los lunes)
+    fechas = pd.bdate_range('2025-01-06', periods=60)
+    spread = np.where(fechas.isocalendar().week.to_numpy() % 2 == 0, 8.0, 1.0)
+    return pd.DataFrame({
+        'Fecha': fechas,
+        'Spread_TTF_HH': spread,
+        'Demanda_Total_pred': np.linspace(900_000, 950_000, len(fechas)),
+    })
+
+
+def test_tramos_contiguos():
+    linea = linea_tiempo_alertas(_pred_modelo1(), ventanas=(1,))
+    for _, tramos in linea.groupby('regla'):
+        tramos = tramos.sort_values('inicio')
+        assert (tramos['fin'].iloc[:-1].to_numpy() + pd.Timedelta(days=1)
+                == tramos['inicio'].iloc[1:].to_numpy()).all()
+
+
+def test_estado_en_fin_de_semana():
+    pred = _pred_modelo1()
+    linea = linea_tiempo_alertas(pred, ventanas=(1,))
+    calendario = pd.date_range(pred['Fecha'].iloc[0], pred['Fecha'].iloc[-1])
+    for regla in ('spread_elevado', 'volatilidad_demanda', 'clasificacion_spread'):
+        estados = [estado_en(linea, regla, 1, fecha) for fecha in calendario]
+        assert None not in estados
+        # Sábado y domingo conservan el estado del viernes
+        for fecha, estado in zip(calendario, estados):
+            if fecha.dayofweek >= 5:
+                viernes = fecha - pd.Timedelta(days=fecha.dayofweek - 4)
+                assert estado == estado_en(linea, regla, 1, viernes)
+
+
+def test_estado_en_fuera_del_historico():
+    pred = _pred_modelo1()
+    linea = linea_tiempo_alertas(pred, ventanas=(1,))
+    assert estado_en(linea, 'spread_elevado', 1, pred['Fecha'].iloc[-1] + pd.Timedelta(days=1)) is None
+    assert estado_en(linea, 'spread_elevado', 1, pred['Fecha'].iloc[0] - pd.Timedelta(days=1)) is None
+
+
+def test_sin_alertas_antes_de_completar_la_ventana():
+    pred = _pred_modelo1()
+    pred['Spread_TTF_HH'] = 8.0
+    linea = linea_tiempo_alertas(pred, ventanas=(30,))
+    inicio = pred['Fecha'].iloc[0]
+    for regla in ('spread_elevado', 'volatilidad_demanda', 'clasificacion_spread'):
+        assert estado_en(linea, regla, 30, inicio + pd.Timedelta(days=28)) == 'sin datos'
+    assert estado_en(linea, 'spread_elevado', 30, inicio + pd.Timedelta(days=29)) == 'elevado'
+    assert estado_en(linea, 'clasificacion_spread', 30, inicio + pd.Timedelta(days=29)) == 'oportunidad'
@@ -0,0 +1,14 @@
+from motor.arranque import modulos_arranque
+
+
+def test_submodulos_de_from_import(tmp_path):
+    app = tmp_path / 'app.py'
+    app.write_text(
+        "import os\n"
+        "from motor import artefactos, graficos\n"
+        "from motor.alertas import UMBRAL_SPREAD, estado_en\n"
+        "if True:\n"
+        "    from motor import contratos\n"
+    )
+    modulos = modulos_arranque(app)
+    assert modulos == ['os', 'motor', 'motor.artefactos', 'motor.graficos', 'motor.alertas']
@@ -0,0 +1,31 @@
+import os
+
+from motor import cache_disco
+
+
+def test_huella_no_reescribe_el_registro_sin_cambios(tmp_path, monkeypatch):
+    entrada = tmp_path / 'datos.csv'
+    entrada.write_text('Fecha,Valor\n2024-01-01,1\n')
+    directorio = tmp_path / 'cache'
+
+    escrituras = []
+    escribir = cache_disco._escribir_atomico
+    monkeypatch.setattr(cache_disco, '_escribir_atomico',
+                        lambda destino, contenido: escrituras.append(destino) or escribir(destino, contenido))
+
+    primera = cache_disco.huella([entrada], directorio)
+    assert cache_disco.huella([entrada], directorio) == primera
+    assert len(escrituras) == 1
+
+    # Cambia el contenido (y el mtime): se vuelve a hashear y a registrar
+    entrada.write_text('Fecha,Valor\n2024-01-01,2\n')
+    os.utime(entrada, ns=(0, entrada.stat().st_mtime_ns + 1))
+    assert cache_disco.huella([entrada], directorio) != primera
+    assert len(escrituras) == 2
+
+
+def test_version_codigo_una_vez_por_proceso():
+    cache_disco.version_codigo()
+    llamadas = cache_disco.version_codigo.cache_info().misses
+    cache_disco.version_codigo()
+    assert cache_disco.version_codigo.cache_info().misses == llamadas
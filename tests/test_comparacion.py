@@ -0,0 +1,20 @@
+import datetime
+
+import pytest
+
+from motor.comparacion import cobertura, mismo_periodo
+
+PRIMERA, ULTIMA = datetime.date(2024, 9, 17), datetime.date(2025, 10, 27)
+
+
+def test_cobertura_del_anio_anterior():
+    # Oct-2025 un año antes cae casi entero antes del inicio de los datos
+    desde, hasta = mismo_periodo(datetime.date(2025, 9, 1), datetime.date(2025, 9, 30))
+    assert cobertura(desde, hasta, PRIMERA, ULTIMA) == pytest.approx(14 / 30)
+    desde, hasta = mismo_periodo(datetime.date(2025, 10, 1), datetime.date(2025, 10, 27))
+    assert cobertura(desde, hasta, PRIMERA, ULTIMA) == 1.0
+
+
+def test_cobertura_fuera_de_rango_y_ventana_invertida():
+    assert cobertura(datetime.date(2023, 1, 1), datetime.date(2023, 12, 31), PRIMERA, ULTIMA) == 0.0
+    assert cobertura(datetime.date(2025, 1, 10), datetime.date(2025, 1, 1), PRIMERA, ULTIMA) == 0.0
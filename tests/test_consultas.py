@@ -0,0 +1,72 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from motor.comparacion import Acumulados, AcumuladosBD
+from motor.consultas import TablaBD, publicar
+from motor.derivadas import COSTA, INTERIOR
+from motor.estacionalidad import descomponer, descomponer_bd
+from motor.jerarquia import JerarquiaBD, construir
+from motor.resumen import marco_ventana
+
+
+def _dias(fechas):
+    return (fechas.to_numpy().astype('datetime64[D]') - np.datetime64('1970-01-01', 'D')).astype(np.int32)
+
+
+def _tablas():
+    rng = np.random.default_rng(0)
+    fechas1 = pd.bdate_range('2023-01-02', '2024-12-31')
+    fechas2 = pd.bdate_range('2022-12-01', '2024-12-31')
+    total = pd.DataFrame({'Fecha': _dias(fechas1), 'Demanda_Total_pred': rng.uniform(800, 1000, len(fechas1))})
+    zonas = pd.DataFrame({
+        'Fecha': _dias(fechas2),
+        COSTA: rng.uniform(300, 400, len(fechas2)),
+        INTERIOR: rng.uniform(400, 600, len(fechas2)),
+    })
+    zonas.loc[10:20, COSTA] = np.nan
+    return total, zonas
+
+
+def _base(tmp_path):
+    total, zonas = _tablas()
+    ruta = tmp_path / 'bd.sqlite'
+    publicar({'total': total, 'zonas': zonas}, ruta)
+    return (total, zonas), (TablaBD(ruta, 'total'), TablaBD(ruta, 'zonas'))
+
+
+def test_jerarquia_bd_igual_a_memoria(tmp_path):
+    (total, zonas), tablas_bd = _base(tmp_path)
+    definicion = pd.DataFrame([
+        ('Nacional', None, 'Demanda_Total_pred'),
+        ('Zonas', 'Nacional', None),
+        ('Costa', 'Zonas', COSTA),
+        ('Interior', 'Zonas', INTERIOR),
+    ], columns=['nodo', 'padre', 'columna'])
+    memoria = construir([total, zonas], definicion)
+    base = JerarquiaBD(definicion, tablas_bd)
+    for inicio, fin in [('2022-12-01', '2023-02-28'), ('2024-06-01', '2024-12-31'), ('2020-01-01', '2020-02-01')]:
+        pd.testing.assert_frame_equal(base.ventana(inicio, fin), memoria.ventana(inicio, fin), check_dtype=False)
+        for nodo in memoria.nombres:
+            pd.testing.assert_series_equal(base.serie(nodo, inicio, fin), memoria.serie(nodo, inicio, fin),
+                                           check_dtype=False, check_index_type=False)
+
+
+def test_barrido_anual_bd_igual_a_memoria(tmp_path):
+    (total, zonas), tablas_bd = _base(tmp_path)
+    memoria = Acumulados(marco_ventana(total, zonas))
+    base = AcumuladosBD(*tablas_bd)
+    esperado = memoria.barrido_anual(datetime.date(2024, 11, 1), datetime.date(2024, 12, 15))
+    obtenido = base.barrido_anual(datetime.date(2024, 11, 1), datetime.date(2024, 12, 15))
+    assert len(esperado) == 3
+    pd.testing.assert_frame_equal(obtenido[esperado.columns], esperado, check_dtype=False)
+
+
+def test_estacionalidad_bd_igual_a_memoria(tmp_path):
+    (total, zonas), tablas_bd = _base(tmp_path)
+    memoria = descomponer(total, zonas)
+    base = descomponer_bd(*tablas_bd)
+    pd.testing.assert_frame_equal(base['perfil_mensual'], memoria['perfil_mensual'], rtol=1e-4)
+    pd.testing.assert_frame_equal(base['resumen'][['mes_pico', 'mes_valle']],
+                                  memoria['resumen'][['mes_pico', 'mes_valle']])
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from motor.contratos import COSTOS_POR_DEFECTO, optimizar, validar_costos
+
+
+def _marco():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'Demanda_Total_pred': rng.normal(1000, 100, 400),
+        'Demanda_Costa_Total_MBTUD_pred': rng.gamma(4, 100, 400),
+    })
+
+
+@pytest.mark.parametrize('cambios', [
+    {'flexible': 0.0},
+    {'reserva': 0.0, 'deficit': 4.5},
+    {clave: 0.0 for clave in COSTOS_POR_DEFECTO},
+    {'deficit': 4.0},
+])
+def test_costos_no_validos(cambios):
+    costos = dict(COSTOS_POR_DEFECTO, **cambios)
+    assert validar_costos(costos)
+    with pytest.raises(ValueError):
+        optimizar(_marco(), costos)
+
+
+def test_cerca_de_los_cuantiles_del_newsvendor():
+    marco = _marco()
+    tabla = optimizar(marco)
+    assert validar_costos(COSTOS_POR_DEFECTO) == []
+    c = COSTOS_POR_DEFECTO
+    for entidad, columna in [('Nacional', 'Demanda_Total_pred'), ('Costa', 'Demanda_Costa_Total_MBTUD_pred')]:
+        demanda = marco[columna]
+        firme = demanda.quantile(1 - (c['firme'] - c['reserva']) / c['flexible'])
+        total = demanda.quantile(1 - c['reserva'] / (c['deficit'] - c['flexible']))
+        assert tabla.loc[entidad, 'firme'] == pytest.approx(firme, rel=0.05)
+        assert tabla.loc[entidad, 'firme'] + tabla.loc[entidad, 'flexible'] == pytest.approx(total, rel=0.05)
+        assert tabla.loc[entidad, 'ahorro_pct'] >= 0
+
+
+def test_esquinas():
+    # Firme más caro que reserva + uso: todo flexible; déficit apenas más caro que el flexible: sin flexible
+    solo_flexible = optimizar(_marco(), dict(COSTOS_POR_DEFECTO, firme=6.0))
+    assert (solo_flexible['firme'] < 1e-6 * solo_flexible['flexible']).all()
+    sin_flexible = optimizar(_marco(), dict(COSTOS_POR_DEFECTO, deficit=4.6, reserva=0.5))
+    assert (sin_flexible['flexible'] < 1e-3 * sin_flexible['firme']).all()
+
+
+def test_sin_datos():
+    assert optimizar(_marco().iloc[:0]).empty
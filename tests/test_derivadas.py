@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from motor.derivadas import ampliar, crecimiento_anual
+
+
+def _serie(fechas):
+    return pd.DataFrame({'Fecha': fechas, 'Demanda_Total_pred': np.arange(1.0, len(fechas) + 1)})
+
+
+def test_cubre_todas_las_fechas_con_un_anio_de_historia():
+    fechas = pd.bdate_range('2023-06-01', '2025-06-30')
+    df = _serie(fechas)
+    crecimiento = crecimiento_anual('Demanda_Total_pred')(df)
+    con_historia = fechas >= fechas[0] + pd.DateOffset(years=1)
+    assert np.isfinite(crecimiento[con_historia]).all()
+    assert np.isnan(crecimiento[~con_historia]).all()
+
+
+def test_fin_de_semana_y_bisiesto():
+    fechas = pd.bdate_range('2023-01-02', '2025-03-31')
+    df = _serie(fechas)
+    crecimiento = pd.Series(crecimiento_anual('Demanda_Total_pred')(df), index=fechas)
+    valores = df.set_index('Fecha')['Demanda_Total_pred']
+    # 2025-03-03 (lunes): un año antes es domingo 2024-03-03 -> viernes 2024-03-01
+    esperado = (valores['2025-03-03'] / valores['2024-03-01'] - 1) * 100
+    assert np.isclose(crecimiento['2025-03-03'], esperado)
+    # 2024-02-29 pasa a 2023-02-28
+    esperado = (valores['2024-02-29'] / valores['2023-02-28'] - 1) * 100
+    assert np.isclose(crecimiento['2024-02-29'], esperado)
+
+
+def test_fechas_como_dias_y_orden_original():
+    fechas = pd.bdate_range('2023-06-01', '2024-09-30')
+    df = _serie(fechas)
+    dias = (fechas.to_numpy().astype('datetime64[D]') - np.datetime64('1970-01-01', 'D')).astype(np.int32)
+    como_dias = df.assign(Fecha=dias).iloc[::-1]
+    esperado = ampliar(df)['Crecimiento_Anual_Demanda'].to_numpy()
+    obtenido = ampliar(como_dias)['Crecimiento_Anual_Demanda'].to_numpy()[::-1]
+    np.testing.assert_allclose(obtenido, esperado, equal_nan=True)
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from motor.diagnostico import acf_fft, diagnostico, pacf_desde_acf, variables_con_residuo
+
+
+def _acf_directa(x, nlags):
+    x = np.asarray(x, dtype=float) - np.mean(x)
+    return np.array([x[:len(x) - k] @ x[k:] for k in range(nlags + 1)]) / (x @ x)
+
+
+def test_acf_fft_igual_a_la_definicion():
+    x = np.random.default_rng(0).normal(size=200).cumsum()
+    np.testing.assert_allclose(acf_fft(x, 20), _acf_directa(x, 20), atol=1e-12)
+
+
+def test_pacf_de_un_ar1():
+    # ACF teórica de un AR(1): phi^k; la PACF se anula después del rezago 1
+    phi = 0.6
+    pacf = pacf_desde_acf(phi ** np.arange(6))
+    np.testing.assert_allclose(pacf, [1, phi, 0, 0, 0, 0], atol=1e-12)
+
+
+def test_serie_constante_y_ventana_corta():
+    assert np.isnan(acf_fft(np.ones(10), 3)).all()
+    df = pd.DataFrame({'Fecha': pd.bdate_range('2024-01-01', periods=1),
+                       'Demanda_real': [1.0], 'Demanda_pred': [0.5]})
+    resultado = diagnostico(df, 'Demanda')
+    assert resultado['residuo'].tolist() == [0.5]
+    assert len(resultado['acf']) == 1
+
+
+def test_diagnostico_descarta_faltantes():
+    df = pd.DataFrame({'Fecha': pd.bdate_range('2024-01-01', periods=5),
+                       'Demanda_real': [1.0, np.nan, 3.0, 4.0, 5.0],
+                       'Demanda_pred': [0.0, 2.0, 2.0, np.nan, 4.0],
+                       'Otra_pred': 0.0})
+    assert variables_con_residuo(df) == ['Demanda']
+    resultado = diagnostico(df, 'Demanda', nlags=30)
+    assert resultado['residuo'].tolist() == [1.0, 1.0, 1.0]
+    assert len(resultado['acf']) == 3
+    assert np.isclose(resultado['banda'], 1.96 / np.sqrt(3))
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from motor.estacionalidad import descomponer
+
+
+def _serie(inicio, fin, pendiente):
+    fechas = pd.bdate_range(inicio, fin)
+    anios = (fechas - fechas[0]).days / 365.25
+    # Pico anual a comienzos de noviembre (día del año ~305)
+    ciclo = 100 * np.cos(2 * np.pi * (fechas.dayofyear - 305) / 365.25)
+    return pd.DataFrame({'Fecha': fechas, 'Demanda_pred': 1000 + pendiente * anios + ciclo})
+
+
+def test_con_dos_anios_separa_tendencia_y_ciclo():
+    resumen = descomponer(_serie('2021-01-04', '2024-12-31', 50))['resumen'].loc['Demanda_pred']
+    assert np.isclose(resumen['pendiente_anual'], 50, rtol=0.05)
+    assert resumen['mes_pico'] == 'Nov'
+    assert resumen['mes_valle'] == 'May'
+
+
+def test_con_un_anio_no_ajusta_tendencia():
+    resultado = descomponer(_serie('2024-09-02', '2025-09-30', 0))
+    resumen = resultado['resumen'].loc['Demanda_pred']
+    assert np.isnan(resumen['pendiente_anual'])
+    assert resumen['mes_pico'] == 'Nov'
+    # Sin pendiente la tendencia es el nivel constante
+    assert np.ptp(resultado['tendencia'][0]['Demanda_pred']) < 1e-6
@@ -0,0 +1,36 @@
+import io
+
+import pandas as pd
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from motor.exportacion import exportar, formatos_disponibles
+
+
+@pytest.fixture
+def tabla():
+    return pd.DataFrame({'Fecha': pd.bdate_range('2024-01-01', periods=60_000),
+                         'Demanda_Total_pred': 1.5, 'Sector': 'Industrial'})
+
+
+@pytest.mark.parametrize('formato', formatos_disponibles())
+def test_download_button_acepta_cada_formato(tabla, formato):
+    archivo = exportar(tabla, formato)
+    datos, _ = convert_data_to_bytes_and_infer_mime(archivo, TypeError(formato))
+    archivo.close()
+
+    if formato == 'CSV':
+        leida = pd.read_csv(io.BytesIO(datos), parse_dates=['Fecha'])
+    elif formato == 'Parquet':
+        leida = pd.read_parquet(io.BytesIO(datos))
+    else:
+        leida = pd.read_excel(io.BytesIO(datos))
+    assert len(leida) == len(tabla)
+    assert list(leida.columns) == list(tabla.columns)
+    assert (leida['Fecha'].to_numpy() == tabla['Fecha'].to_numpy()).all()
+
+
+def test_csv_vacio_lleva_encabezado():
+    archivo = exportar(pd.DataFrame(columns=['Fecha', 'Demanda']), 'CSV')
+    datos, _ = convert_data_to_bytes_and_infer_mime(archivo, TypeError('CSV'))
+    assert datos.decode().strip() == 'Fecha,Demanda'
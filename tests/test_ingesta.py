@@ -0,0 +1,48 @@
+import concurrent.futures
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from motor.compactacion import compactar
+from motor.ingesta import _limitar_memoria, leer_csv
+
+
+def _csv(tmp_path):
+    fechas = pd.bdate_range('2024-01-01', periods=400)
+    variables = ['Demanda_Costa', 'Demanda_Interior', 'Henry_Hub']
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'Fecha': np.repeat(fechas, len(variables)).strftime('%Y-%m-%d'),
+        'Variable': np.tile(variables, len(fechas)),
+        'Real': rng.integers(100, 1000, len(fechas) * len(variables)).astype(float),
+        'Pred_XGBoost': rng.uniform(100, 1000, len(fechas) * len(variables)),
+    })
+    ruta = tmp_path / 'predicciones.csv'
+    df.to_csv(ruta, index=False)
+    return ruta
+
+
+def test_por_trozos_igual_a_read_csv(tmp_path):
+    ruta = _csv(tmp_path)
+    esperado = compactar(pd.read_csv(ruta, parse_dates=['Fecha']))
+    obtenido = leer_csv(ruta, procesos=2, tamano_trozo=4096)
+    pd.testing.assert_frame_equal(obtenido, esperado)
+
+
+def _reservar_con_techo(limite_mb, megas):
+    _limitar_memoria(limite_mb)
+    try:
+        return int(np.ones(megas * 1024 ** 2, dtype=np.uint8).sum() // (1024 ** 2))
+    except MemoryError:
+        return -1
+
+
+def test_techo_no_cuenta_memoria_heredada():
+    # El padre ya reservó más que el techo; el hijo hereda esa reserva con fork
+    lastre = np.empty(512 * 1024 ** 2, dtype=np.uint8)
+    contexto = multiprocessing.get_context('fork')
+    with concurrent.futures.ProcessPoolExecutor(1, mp_context=contexto) as ejecutor:
+        assert ejecutor.submit(_reservar_con_techo, 256, 64).result() == 64
+        assert ejecutor.submit(_reservar_con_techo, 256, 1024).result() == -1
+    del lastre
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from motor.memoria_compartida import adjuntar, generacion_actual, publicar
+
+
+def _tabla():
+    return pd.DataFrame({
+        'Fecha': np.arange(20_000, 20_010, dtype=np.int32),
+        'Demanda_Total_pred': np.linspace(900_000, 950_000, 10, dtype=np.float32),
+        'Henry_Hub_real': np.linspace(2.5, 3.5, 10),
+        'Contador': np.arange(10, dtype=np.int64),
+    })
+
+
+def test_conserva_tipos_por_columna(tmp_path):
+    tabla = _tabla()
+    generacion = publicar({'pred_modelo1': tabla}, tmp_path)
+    adjunta = adjuntar(tmp_path, generacion)['pred_modelo1']
+    assert list(adjunta.columns) == list(tabla.columns)
+    assert adjunta.dtypes.to_dict() == tabla.dtypes.to_dict()
+    for columna in tabla.columns:
+        np.testing.assert_array_equal(np.asarray(adjunta[columna]), tabla[columna].to_numpy())
+
+
+def test_generaciones(tmp_path):
+    assert generacion_actual(tmp_path) == 0
+    publicar({'pred_modelo1': _tabla()}, tmp_path)
+    segunda = _tabla().assign(Henry_Hub_real=0.0)
+    assert publicar({'pred_modelo1': segunda}, tmp_path) == 2
+    assert generacion_actual(tmp_path) == 2
+    assert (adjuntar(tmp_path)['pred_modelo1']['Henry_Hub_real'] == 0).all()
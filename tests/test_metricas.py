@@ -0,0 +1,20 @@
+from motor import metricas
+
+
+def test_registrar_con_nombre_renombra_la_corrida_existente(tmp_path):
+    ruta = tmp_path / 'metricas.sqlite'
+    corrida, nueva = metricas.registrar_actuales(ruta)
+    assert nueva
+    assert metricas.registrar_actuales(ruta) == (corrida, False)
+
+    assert metricas.registrar_actuales(ruta, 'reentrenamiento 2024-06') == (corrida, False)
+    assert metricas.opciones(ruta)['corrida'] == {corrida: 'reentrenamiento 2024-06'}
+
+
+def test_esquema_una_vez_por_proceso(tmp_path):
+    ruta = tmp_path / 'metricas.sqlite'
+    metricas.conectar(ruta).close()
+    assert str(ruta) in metricas._CON_ESQUEMA
+    # Si el archivo se borra se vuelve a crear el esquema
+    ruta.unlink()
+    assert metricas.contar(ruta) == 0
@@ -0,0 +1,37 @@
+import socket
+import urllib.request
+
+import pytest
+
+from motor import telemetria
+
+
+def test_puerto_ocupado_se_intenta_una_vez(monkeypatch, caplog):
+    ocupado = socket.socket()
+    ocupado.bind(('127.0.0.1', 0))
+    ocupado.listen()
+    puerto = ocupado.getsockname()[1]
+
+    intentos = []
+    crear = telemetria._crear_servidor
+    monkeypatch.setattr(telemetria, '_crear_servidor', lambda *a: intentos.append(a) or crear(*a))
+    try:
+        for _ in range(3):
+            with pytest.raises(OSError):
+                telemetria.iniciar_servidor(puerto, '127.0.0.1')
+    finally:
+        ocupado.close()
+    assert len(intentos) == 1
+    assert sum('Telemetría desactivada' in r.message for r in caplog.records) == 1
+
+
+def test_servidor_responde_metricas():
+    servidor = telemetria.iniciar_servidor(0, '127.0.0.1')
+    try:
+        assert telemetria.iniciar_servidor(0, '127.0.0.1') is servidor
+        puerto = servidor.server_address[1]
+        with urllib.request.urlopen(f'http://127.0.0.1:{puerto}/metrics') as respuesta:
+            assert b'proyectagas_inicio_timestamp_segundos' in respuesta.read()
+    finally:
+        servidor.shutdown()
+        telemetria._servidores.clear()
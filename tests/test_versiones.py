@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from motor import versiones
+
+
+def _tabla(dias, valores):
+    return pd.DataFrame({'Fecha': np.asarray(dias, np.int32),
+                         'Demanda_Total_pred': np.asarray(valores, np.float32)})
+
+
+def test_reconstruccion_exacta_de_la_cadena(tmp_path):
+    rng = np.random.default_rng(0)
+    dias = np.arange(19000, 19100)
+    emitidas = {}
+    for i in range(versiones.INTERVALO_COMPLETO + 2):
+        # Cada emisión corre el horizonte un día y cambia solo parte de los valores
+        dias_version = dias + i
+        valores = rng.normal(100, 10, len(dias)) if i == 0 else np.r_[emitidas[i - 1][1:], 0.0]
+        valores[-5:] = rng.normal(100, 10, 5)
+        emitidas[i] = valores.astype(np.float32)
+        versiones.registrar({'modelo1': _tabla(dias_version, valores)}, f'2025-01-{i + 1:02d}', tmp_path)
+
+    registradas = versiones.listar(tmp_path)
+    assert [v['tablas']['modelo1']['base'] is None for v in registradas] == \
+        [i % versiones.INTERVALO_COMPLETO == 0 for i in range(len(emitidas))]
+    versiones._cargar_arreglos.cache_clear()
+    for i, valores in emitidas.items():
+        tabla = versiones.cargar('modelo1', f'2025-01-{i + 1:02d}', tmp_path)
+        np.testing.assert_array_equal(tabla['Fecha'], dias + i)
+        np.testing.assert_array_equal(tabla['Demanda_Total_pred'], valores)
+        assert tabla['Demanda_Total_pred'].dtype == np.float32
+
+
+def test_historial_y_emision_no_posterior(tmp_path):
+    versiones.registrar({'modelo1': _tabla([19000, 19001], [1, 2])}, '2025-01-01', tmp_path)
+    versiones.registrar({'modelo1': _tabla([19001, 19002], [3, 4])}, '2025-02-01', tmp_path)
+    historial = versiones.historial('modelo1', 'Demanda_Total_pred',
+                                    pd.Timestamp('1970-01-01') + pd.Timedelta(days=19001), tmp_path)
+    assert historial.to_dict() == {'2025-01-01': 2.0, '2025-02-01': 3.0}
+    with pytest.raises(ValueError):
+        versiones.registrar({'modelo1': _tabla([19002], [5])}, '2025-02-01', tmp_path)
+
+
+def test_arreglos_compartidos_de_solo_lectura(tmp_path):
+    versiones.registrar({'modelo1': _tabla([19000, 19001], [1, 2])}, '2025-01-01', tmp_path)
+    arreglos = versiones._cargar_arreglos(str(tmp_path), 'modelo1', '2025-01-01')
+    with pytest.raises(ValueError):
+        arreglos['Demanda_Total_pred'][0] = 99
+    tabla = versiones.cargar('modelo1', '2025-01-01', tmp_path)
+    tabla.loc[0, 'Demanda_Total_pred'] = 99
+    assert versiones.cargar('modelo1', '2025-01-01', tmp_path)['Demanda_Total_pred'].iloc[0] == 1
+
+
+@pytest.mark.parametrize('emision', ['../modelo1', '2025-1-1', '2025-02-30', 20250101])
+def test_emision_invalida(tmp_path, emision):
+    with pytest.raises(ValueError):
+        versiones.registrar({'modelo1': _tabla([19000], [1])}, emision, tmp_path)
+    with pytest.raises(ValueError):
+        versiones.cargar('modelo1', emision, tmp_path)